@@ -1,65 +1,1122 @@
 import sqlite3
 import re
-from datetime import datetime, timedelta
+import base64
+import json
+import os
+import atexit
+import random
+import threading
+import time
+import weakref
+import bisect
+import heapq
+import unicodedata
+from array import array
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import date, datetime, timedelta
 
-def connect_db():
-    conn = sqlite3.connect('biblioteca.db')
+import metricas
+import validacao
+from metricas import instrumentado
+
+
+# Configuração aplicada a cada conexão nova. Os PRAGMAs são executados uma
+# única vez por conexão, que depois é reutilizada pela mesma thread.
+_config_db = {
+    "caminho": os.environ.get("BIBLIOTECA_DB", "biblioteca.db"),
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "cache_size": -8000,
+    # Banco de arquivo do histórico; por padrão, <caminho>_arquivo.db.
+    "arquivo": os.environ.get("BIBLIOTECA_ARQUIVO"),
+}
+
+_conexoes_thread = threading.local()
+_conexoes_abertas = weakref.WeakSet()
+_lock_conexoes = threading.Lock()
+_geracao_conexoes = 0
+
+
+class ConexaoReutilizavel(sqlite3.Connection):
+    # close() devolve a conexão ao pool da thread em vez de fechá-la; qualquer
+    # transação não confirmada é desfeita, como aconteceria num close() real.
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.usos = 0
+
+    def cursor(self, *args, **kwargs):
+        if not args and not kwargs and metricas.instrumentacao_ativa():
+            return super().cursor(metricas.CursorInstrumentado)
+        return super().cursor(*args, **kwargs)
+
+    def execute(self, *args):
+        if metricas.instrumentacao_ativa():
+            return self.cursor().execute(*args)
+        return super().execute(*args)
+
+    def executemany(self, *args):
+        if metricas.instrumentacao_ativa():
+            return self.cursor().executemany(*args)
+        return super().executemany(*args)
+
+    def close(self):
+        self.usos = max(self.usos - 1, 0)
+        if self.usos == 0 and self.in_transaction:
+            self.rollback()
+
+    def fechar(self):
+        super().close()
+
+
+def configurar_db(caminho=None, journal_mode=None, synchronous=None, busy_timeout=None, cache_size=None,
+                  arquivo=None):
+    novos = {
+        "caminho": caminho,
+        "journal_mode": journal_mode,
+        "synchronous": synchronous,
+        "busy_timeout": busy_timeout,
+        "cache_size": cache_size,
+        "arquivo": arquivo,
+    }
+    fechar_conexoes()
+    # O índice de sugestões pertence ao banco anterior.
+    descartar_sugestoes()
+    _config_db.update({chave: valor for chave, valor in novos.items() if valor is not None})
+    return dict(_config_db)
+
+
+def _abrir_conexao(somente_leitura=False):
+    if somente_leitura:
+        # mode=ro: o SQLite recusa qualquer escrita por esta conexão. O modo
+        # de journal pertence ao arquivo e é definido pela conexão de escrita,
+        # aberta antes para criar o banco e ativar o WAL.
+        _conexao_da_thread(False)
+        uri = Path(_config_db["caminho"]).resolve().as_uri() + '?mode=ro'
+        conn = sqlite3.connect(uri, uri=True, factory=ConexaoReutilizavel, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(_config_db["caminho"], factory=ConexaoReutilizavel, check_same_thread=False)
+    conn.somente_leitura = somente_leitura
+    conn.execute(f'PRAGMA busy_timeout = {int(_config_db["busy_timeout"])}')
+    if not somente_leitura:
+        conn.execute(f'PRAGMA journal_mode = {_config_db["journal_mode"]}')
+        conn.execute(f'PRAGMA synchronous = {_config_db["synchronous"]}')
+    conn.execute(f'PRAGMA cache_size = {int(_config_db["cache_size"])}')
+    return conn
+
+
+def _conexao_da_thread(somente_leitura):
+    # Uma conexão de escrita e uma somente leitura por thread (e por
+    # processo, para sobreviver a fork).
+    nome = "leitura" if somente_leitura else "conn"
+    chave = (os.getpid(), _geracao_conexoes)
+    conn = getattr(_conexoes_thread, nome, None)
+    if conn is None or getattr(_conexoes_thread, "chave_" + nome, None) != chave:
+        conn = _abrir_conexao(somente_leitura)
+        setattr(_conexoes_thread, nome, conn)
+        setattr(_conexoes_thread, "chave_" + nome, chave)
+        with _lock_conexoes:
+            _conexoes_abertas.add(conn)
     return conn
 
+
+def connect_db(somente_leitura=False):
+    # As consultas usam somente_leitura=True: em WAL, leitores não bloqueiam
+    # as escritas de empréstimo e devolução, nem são bloqueados por elas.
+    inicio = time.perf_counter() if metricas.ativo() else None
+    conn = _conexao_da_thread(somente_leitura)
+    conn.usos += 1
+    if inicio is not None:
+        metricas.registro.registrar_conexao(time.perf_counter() - inicio)
+    return conn
+
+
+@contextmanager
+def instantaneo():
+    # Fixa um snapshot de leitura para a thread: as consultas feitas dentro
+    # do bloco (vários relatórios, por exemplo) veem o banco como estava no
+    # início, mesmo com escritas concorrentes. Exige journal_mode WAL.
+    conn = connect_db(somente_leitura=True)
+    try:
+        # ATTACH não pode ser feito dentro da transação.
+        _anexar_arquivo(conn)
+        conn.execute('BEGIN')
+        # O snapshot só começa na primeira leitura.
+        conn.execute('SELECT 1 FROM sqlite_master LIMIT 1').fetchall()
+        yield conn
+    finally:
+        conn.close()
+
+
+def fechar_conexoes():
+    global _geracao_conexoes
+    with _lock_conexoes:
+        _geracao_conexoes += 1
+        conexoes = list(_conexoes_abertas)
+        _conexoes_abertas.clear()
+    for conn in conexoes:
+        try:
+            conn.fechar()
+        except sqlite3.Error:
+            pass
+
+
+def fechar_conexoes_da_thread():
+    # Só as conexões da thread atual; as das outras threads continuam abertas.
+    for nome in ("conn", "leitura"):
+        conn = getattr(_conexoes_thread, nome, None)
+        if conn is None:
+            continue
+        setattr(_conexoes_thread, nome, None)
+        with _lock_conexoes:
+            _conexoes_abertas.discard(conn)
+        try:
+            conn.fechar()
+        except sqlite3.Error:
+            pass
+
+
+atexit.register(fechar_conexoes)
+
+# Quando o busy_timeout se esgota, a transação inteira é repetida algumas
+# vezes, com espera exponencial e aleatória para que os processos em disputa
+# não voltem todos ao mesmo tempo.
+TENTATIVAS_ESCRITA = 5
+ESPERA_BASE_SEGUNDOS = 0.01
+
+
+def _banco_ocupado(erro):
+    codigo = getattr(erro, 'sqlite_errorcode', None)
+    return codigo is not None and codigo & 0xff in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+
+def _com_retentativas(conn, transacao):
+    for tentativa in range(TENTATIVAS_ESCRITA):
+        try:
+            return transacao()
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            if not _banco_ocupado(e) or tentativa == TENTATIVAS_ESCRITA - 1:
+                raise
+            time.sleep(random.uniform(0, ESPERA_BASE_SEGUNDOS * 2 ** tentativa))
+
+class CacheDisponibilidade:
+    # Cache LRU de (status, exemplares disponíveis, total) por livro_id. As
+    # escritas deste processo atualizam o cache ao confirmar; escritas de
+    # outros processos são detectadas por PRAGMA data_version, que invalida o cache inteiro.
+    #
+    # data_version é lido numa conexão observadora só do cache, que nunca
+    # escreve, então muda a cada commit de qualquer conexão, inclusive as das
+    # outras threads deste processo. Por isso os commits locais passam por
+    # confirmar(), que registra a versão resultante: só uma mudança que
+    # nenhum commit local explica descarta o cache.
+
+    def __init__(self, tamanho_maximo):
+        self.tamanho_maximo = tamanho_maximo
+        self.acertos = 0
+        self.falhas = 0
+        self.despejos = 0
+        self.invalidacoes = 0
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self._geracao = 0
+        self._lock_versao = threading.Lock()
+        self._versao = None
+        self._observador = None
+        self._chave_observador = None
+
+    def _versao_atual(self):
+        # Chamado com _lock_versao; a conexão observadora é reaberta depois
+        # de fechar_conexoes() ou de um fork, como as conexões das threads.
+        chave = (os.getpid(), _geracao_conexoes)
+        if self._chave_observador != chave:
+            self._observador = _abrir_conexao(somente_leitura=True)
+            self._chave_observador = chave
+            with _lock_conexoes:
+                _conexoes_abertas.add(self._observador)
+        return self._observador.execute('PRAGMA data_version').fetchone()[0]
+
+    def sincronizar(self):
+        # Na primeira consulta não há referência, então o cache é
+        # descartado por segurança.
+        with self._lock_versao:
+            versao = self._versao_atual()
+            if versao != self._versao:
+                self._versao = versao
+                self.limpar()
+
+    def confirmar(self, conn, atualizacoes=()):
+        # Antes do commit a transação já detém a trava de escrita, então uma
+        # versão diferente da registrada só pode vir de escrita alheia. O
+        # data_version da própria conexão não muda com o seu commit: se mudou
+        # depois dele, outra conexão confirmou logo em seguida, e a versão
+        # lida pelo observador pode tê-la incluído.
+        #
+        # atualizacoes: (livro_id, status) lidos na transação. São gravados
+        # ainda com _lock_versao, então chegam ao cache na ordem dos commits.
+        with self._lock_versao:
+            if self._versao_atual() != self._versao:
+                self.limpar()
+            propria = conn.execute('PRAGMA data_version').fetchone()[0]
+            conn.commit()
+            self._versao = self._versao_atual()
+            for livro_id, status in atualizacoes:
+                self.atualizar(livro_id, tuple(status))
+            if conn.execute('PRAGMA data_version').fetchone()[0] != propria:
+                self.limpar()
+
+    def obter(self, livro_id):
+        with self._lock:
+            status = self._itens.get(livro_id)
+            if status is None:
+                self.falhas += 1
+                return None, self._geracao
+            self._itens.move_to_end(livro_id)
+            self.acertos += 1
+            return status, self._geracao
+
+    def guardar(self, livro_id, status, geracao):
+        # Uma leitura que começou antes de uma escrita não pode sobrescrevê-la.
+        with self._lock:
+            if geracao == self._geracao:
+                self._guardar(livro_id, status)
+
+    def atualizar(self, livro_id, status):
+        with self._lock:
+            self._geracao += 1
+            self._guardar(livro_id, status)
+
+    def invalidar(self, livro_id):
+        with self._lock:
+            self._geracao += 1
+            self._itens.pop(livro_id, None)
+
+    def limpar(self):
+        with self._lock:
+            self._geracao += 1
+            self._itens.clear()
+            self.invalidacoes += 1
+
+    def _guardar(self, livro_id, status):
+        self._itens[livro_id] = status
+        self._itens.move_to_end(livro_id)
+        while len(self._itens) > self.tamanho_maximo:
+            self._itens.popitem(last=False)
+            self.despejos += 1
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                "itens": len(self._itens),
+                "tamanho_maximo": self.tamanho_maximo,
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "despejos": self.despejos,
+                "invalidacoes": self.invalidacoes,
+            }
+
+
+_cache_disponibilidade = None
+
+
+def configurar_cache(tamanho_maximo=10000):
+    # tamanho_maximo 0 ou None desativa o cache.
+    global _cache_disponibilidade
+    _cache_disponibilidade = CacheDisponibilidade(tamanho_maximo) if tamanho_maximo else None
+    return _cache_disponibilidade
+
+
+def estatisticas_cache():
+    if _cache_disponibilidade is None:
+        return None
+    return _cache_disponibilidade.estatisticas()
+
+
+def _cache_invalidar(livro_id):
+    if _cache_disponibilidade is not None:
+        _cache_disponibilidade.invalidar(livro_id)
+
+
+def _confirmar(conn, atualizacoes=()):
+    # Todo commit de escrita deste processo passa por aqui, para que o cache
+    # não o confunda com uma escrita de outro processo. atualizacoes são os
+    # (livro_id, disponibilidade) que o commit deixa no cache.
+    if _cache_disponibilidade is None:
+        conn.commit()
+    else:
+        _cache_disponibilidade.confirmar(conn, atualizacoes)
+
+
+def _normalizar_texto(texto):
+    # Sem acentos, sem diferença entre maiúsculas e minúsculas e com espaços simples.
+    decomposto = unicodedata.normalize('NFKD', texto or '')
+    return ' '.join(''.join(c for c in decomposto if not unicodedata.combining(c)).casefold().split())
+
+
+class IndiceSugestoes:
+    # Títulos e autores distintos em ordem do texto normalizado, com a
+    # circulação (número de empréstimos) somada por texto. Só o texto original
+    # fica em memória; a forma normalizada é recalculada nas comparações da
+    # busca binária. Prefixos curtos, que cobrem faixas grandes, têm o
+    # resultado memorizado até a próxima alteração. O peso que cada livro
+    # somou na construção fica guardado para ser descontado na remoção.
+
+    LIMITE_FAIXA = 2000
+
+    def __init__(self, textos=(), circulacao=(), referencias=(), livros_com_peso=(), pesos=()):
+        self._textos = list(textos)
+        self._circulacao = array('q', circulacao)
+        self._referencias = array('l', referencias)
+        # Circulação somada na construção, em colunas paralelas ordenadas por
+        # livro_id; só os livros que têm alguma.
+        self._livros_com_peso = array('q', livros_com_peso)
+        self._pesos = array('q', pesos)
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def construir(cls, livros):
+        # livros: (livro_id, titulo, autor, circulacao) de cada livro, em
+        # ordem de livro_id.
+        entradas = {}
+        livros_com_peso = array('q')
+        pesos = array('q')
+        for livro_id, titulo, autor, circulacao in livros:
+            if circulacao:
+                livros_com_peso.append(livro_id)
+                pesos.append(circulacao)
+            for texto in (titulo, autor):
+                chave = _normalizar_texto(texto)
+                if not chave:
+                    continue
+                entrada = entradas.get(chave)
+                if entrada is None:
+                    entradas[chave] = [texto, circulacao, 1]
+                else:
+                    entrada[1] += circulacao
+                    entrada[2] += 1
+        ordenadas = [entradas.pop(chave) for chave in sorted(entradas)]
+        return cls(
+            (entrada[0] for entrada in ordenadas),
+            (entrada[1] for entrada in ordenadas),
+            (entrada[2] for entrada in ordenadas),
+            livros_com_peso,
+            pesos,
+        )
+
+    def _localizar(self, chave):
+        posicao = bisect.bisect_left(self._textos, chave, key=_normalizar_texto)
+        encontrado = posicao < len(self._textos) and _normalizar_texto(self._textos[posicao]) == chave
+        return posicao, encontrado
+
+    def adicionar(self, texto, circulacao=0):
+        chave = _normalizar_texto(texto)
+        if not chave:
+            return
+        with self._lock:
+            posicao, encontrado = self._localizar(chave)
+            if encontrado:
+                self._circulacao[posicao] += circulacao
+                self._referencias[posicao] += 1
+            else:
+                self._textos.insert(posicao, texto)
+                self._circulacao.insert(posicao, circulacao)
+                self._referencias.insert(posicao, 1)
+            self._memo.clear()
+
+    def remover(self, texto, circulacao=0):
+        chave = _normalizar_texto(texto)
+        with self._lock:
+            posicao, encontrado = self._localizar(chave)
+            if not encontrado:
+                return
+            self._referencias[posicao] -= 1
+            self._circulacao[posicao] -= circulacao
+            if self._referencias[posicao] <= 0:
+                del self._textos[posicao]
+                del self._circulacao[posicao]
+                del self._referencias[posicao]
+            self._memo.clear()
+
+    def remover_livro(self, livro_id, titulo, autor):
+        # Desconta o que o livro somou na construção; livros cadastrados
+        # depois dela entraram com circulação zero.
+        with self._lock:
+            posicao = bisect.bisect_left(self._livros_com_peso, livro_id)
+            circulacao = 0
+            if posicao < len(self._livros_com_peso) and self._livros_com_peso[posicao] == livro_id:
+                circulacao = self._pesos[posicao]
+                del self._livros_com_peso[posicao]
+                del self._pesos[posicao]
+        self.remover(titulo, circulacao)
+        self.remover(autor, circulacao)
+
+    def sugerir(self, prefixo, limite):
+        chave = _normalizar_texto(prefixo)
+        if not chave or limite <= 0:
+            return []
+        with self._lock:
+            memorizado = self._memo.get((chave, limite))
+            if memorizado is not None:
+                return memorizado
+            inicio = bisect.bisect_left(self._textos, chave, key=_normalizar_texto)
+            fim = bisect.bisect_left(self._textos, chave + '\U0010ffff', lo=inicio, key=_normalizar_texto)
+            # Empates na circulação ficam em ordem alfabética.
+            melhores = heapq.nlargest(limite, range(inicio, fim), key=self._circulacao.__getitem__)
+            sugestoes = [self._textos[posicao] for posicao in melhores]
+            if fim - inicio > self.LIMITE_FAIXA:
+                self._memo[(chave, limite)] = sugestoes
+            return sugestoes
+
+    def __len__(self):
+        return len(self._textos)
+
+
+# Construído na primeira consulta a autocompletar e mantido pelas escritas
+# deste processo; a circulação é a do momento da construção. Escritas de
+# outros processos só aparecem depois de descartar_sugestoes().
+_sugestoes = None
+_lock_sugestoes = threading.Lock()
+
+_CIRCULACAO_LIVROS = '''
+    SELECT livros.id, livros.titulo, livros.autor, COUNT(emprestimos.id)
+    FROM livros
+    LEFT JOIN emprestimos ON emprestimos.livro_id = livros.id
+    GROUP BY livros.id
+    ORDER BY livros.id
+'''
+
+
+def _indice_sugestoes():
+    global _sugestoes
+    with _lock_sugestoes:
+        if _sugestoes is None:
+            conn = connect_db(somente_leitura=True)
+            try:
+                _sugestoes = IndiceSugestoes.construir(conn.execute(_CIRCULACAO_LIVROS))
+            finally:
+                conn.close()
+        return _sugestoes
+
+
+def descartar_sugestoes():
+    global _sugestoes
+    with _lock_sugestoes:
+        _sugestoes = None
+
+
+def _sugestoes_adicionar(livros):
+    # livros: (titulo, autor) de cada livro cadastrado.
+    with _lock_sugestoes:
+        if _sugestoes is not None:
+            for titulo, autor in livros:
+                _sugestoes.adicionar(titulo)
+                _sugestoes.adicionar(autor)
+
+
+def _sugestoes_remover(livro_id, titulo, autor):
+    with _lock_sugestoes:
+        if _sugestoes is not None:
+            _sugestoes.remover_livro(livro_id, titulo, autor)
+
+
+# Em aberto: empréstimos ainda sem data_retorno.
+_PREENCHER_EMPRESTIMOS_ABERTOS = '''
+    INSERT INTO emprestimos_abertos (emprestimo_id, usuario_id, livro_id, data_devolucao)
+    SELECT id, usuario_id, livro_id, data_devolucao FROM emprestimos WHERE data_retorno IS NULL
+    '''
+
+# Antes de data_retorno (migração 7) não havia marcador: o empréstimo em
+# aberto era o mais recente de cada livro marcado como emprestado.
+_PREENCHER_EMPRESTIMOS_ABERTOS_V4 = '''
+    INSERT INTO emprestimos_abertos (emprestimo_id, usuario_id, livro_id, data_devolucao)
+    SELECT emprestimos.id, emprestimos.usuario_id, emprestimos.livro_id, emprestimos.data_devolucao
+    FROM livros
+    JOIN emprestimos ON emprestimos.id = (
+        SELECT MAX(id) FROM emprestimos WHERE emprestimos.livro_id = livros.id
+    )
+    WHERE livros.status = 'Emprestado'
+    '''
+
+# Valores reais dos contadores de resumo, calculados a partir das tabelas base.
+_CONTAGENS_RESUMO = '''
+    SELECT 'livros_total', COUNT(*) FROM livros
+    UNION ALL SELECT 'livros_disponiveis', COUNT(*) FROM livros WHERE status = 'Disponível'
+    UNION ALL SELECT 'livros_emprestados', COUNT(*) FROM livros WHERE status = 'Emprestado'
+    UNION ALL SELECT 'usuarios_total', COUNT(*) FROM usuarios
+    UNION ALL SELECT 'usuarios_ativos', COUNT(DISTINCT usuario_id) FROM emprestimos_abertos
+    UNION ALL SELECT 'emprestimos_abertos', COUNT(*) FROM emprestimos_abertos
+    '''
+
+_PREENCHER_RESUMO = 'INSERT OR REPLACE INTO resumo (chave, valor) ' + _CONTAGENS_RESUMO
+
+CHAVES_RESUMO = (
+    'livros_total', 'livros_disponiveis', 'livros_emprestados',
+    'usuarios_total', 'usuarios_ativos', 'emprestimos_abertos',
+)
+
+# Migrações do esquema, aplicadas em ordem. A versão aplicada fica registrada
+# em PRAGMA user_version; cada migração roda numa transação própria.
+MIGRACOES = [
+    (1, [
+        '''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            cpf TEXT UNIQUE NOT NULL,
+            email TEXT NOT NULL,
+            telefone TEXT NOT NULL
+        )''',
+        '''
+        CREATE TABLE IF NOT EXISTS livros (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            titulo TEXT NOT NULL,
+            autor TEXT NOT NULL,
+            isbn TEXT UNIQUE NOT NULL,
+            categoria TEXT NOT NULL,
+            status TEXT NOT NULL
+        )''',
+        '''
+        CREATE TABLE IF NOT EXISTS emprestimos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER,
+            livro_id INTEGER,
+            data_emprestimo DATE NOT NULL,
+            data_devolucao DATE,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
+            FOREIGN KEY (livro_id) REFERENCES livros(id)
+        )''',
+    ]),
+    (2, [
+        # devolver_livro / renovar_emprestimo / consultar_historico
+        'CREATE INDEX IF NOT EXISTS idx_emprestimos_usuario_livro ON emprestimos (usuario_id, livro_id)',
+        # relatório 'emprestados' (junção a partir de livros.status)
+        'CREATE INDEX IF NOT EXISTS idx_emprestimos_livro ON emprestimos (livro_id, data_devolucao)',
+        # relatório 'atraso'
+        'CREATE INDEX IF NOT EXISTS idx_emprestimos_devolucao ON emprestimos (data_devolucao, livro_id)',
+        # relatório 'disponiveis'
+        'CREATE INDEX IF NOT EXISTS idx_livros_status ON livros (status, titulo)',
+    ]),
+    (3, [
+        # paginação por chave do relatório 'disponiveis'
+        'CREATE INDEX IF NOT EXISTS idx_livros_status_id ON livros (status, id)',
+    ]),
+    (4, [
+        # Só os empréstimos em aberto, ordenados pela data de devolução prevista.
+        # Mantida por gatilhos nos caminhos de escrita de emprestar_livro,
+        # renovar_emprestimo e devolver_livro.
+        '''
+        CREATE TABLE IF NOT EXISTS emprestimos_abertos (
+            emprestimo_id INTEGER PRIMARY KEY,
+            usuario_id INTEGER,
+            livro_id INTEGER NOT NULL,
+            data_devolucao DATE
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_emprestimos_abertos_devolucao ON emprestimos_abertos (data_devolucao)',
+        'CREATE INDEX IF NOT EXISTS idx_emprestimos_abertos_livro ON emprestimos_abertos (livro_id)',
+        # O relatório 'atraso' passa a ler emprestimos_abertos.
+        'DROP INDEX IF EXISTS idx_emprestimos_devolucao',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_emprestimos_abertos_emprestimo
+        AFTER INSERT ON emprestimos
+        BEGIN
+            DELETE FROM emprestimos_abertos WHERE livro_id = NEW.livro_id;
+            INSERT INTO emprestimos_abertos (emprestimo_id, usuario_id, livro_id, data_devolucao)
+            VALUES (NEW.id, NEW.usuario_id, NEW.livro_id, NEW.data_devolucao);
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_emprestimos_abertos_renovacao
+        AFTER UPDATE OF data_devolucao ON emprestimos
+        BEGIN
+            UPDATE emprestimos_abertos SET data_devolucao = NEW.data_devolucao WHERE emprestimo_id = NEW.id;
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_emprestimos_abertos_devolucao
+        AFTER UPDATE OF status ON livros
+        WHEN NEW.status <> 'Emprestado'
+        BEGIN
+            DELETE FROM emprestimos_abertos WHERE livro_id = NEW.id;
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_emprestimos_abertos_remocao_livro
+        AFTER DELETE ON livros
+        BEGIN
+            DELETE FROM emprestimos_abertos WHERE livro_id = OLD.id;
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_emprestimos_abertos_remocao_emprestimo
+        AFTER DELETE ON emprestimos
+        BEGIN
+            DELETE FROM emprestimos_abertos WHERE emprestimo_id = OLD.id;
+        END''',
+        'DELETE FROM emprestimos_abertos',
+        _PREENCHER_EMPRESTIMOS_ABERTOS_V4,
+    ]),
+    (5, [
+        # Contadores do painel de circulação, mantidos por gatilhos.
+        '''
+        CREATE TABLE IF NOT EXISTS resumo (
+            chave TEXT PRIMARY KEY,
+            valor INTEGER NOT NULL
+        ) WITHOUT ROWID''',
+        'CREATE INDEX IF NOT EXISTS idx_emprestimos_abertos_usuario ON emprestimos_abertos (usuario_id)',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_livro_cadastrado
+        AFTER INSERT ON livros
+        BEGIN
+            UPDATE resumo SET valor = valor + 1 WHERE chave = 'livros_total';
+            UPDATE resumo SET valor = valor + 1 WHERE chave = CASE NEW.status
+                WHEN 'Disponível' THEN 'livros_disponiveis' WHEN 'Emprestado' THEN 'livros_emprestados' END;
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_livro_removido
+        AFTER DELETE ON livros
+        BEGIN
+            UPDATE resumo SET valor = valor - 1 WHERE chave = 'livros_total';
+            UPDATE resumo SET valor = valor - 1 WHERE chave = CASE OLD.status
+                WHEN 'Disponível' THEN 'livros_disponiveis' WHEN 'Emprestado' THEN 'livros_emprestados' END;
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_livro_status
+        AFTER UPDATE OF status ON livros
+        WHEN OLD.status IS NOT NEW.status
+        BEGIN
+            UPDATE resumo SET valor = valor - 1 WHERE chave = CASE OLD.status
+                WHEN 'Disponível' THEN 'livros_disponiveis' WHEN 'Emprestado' THEN 'livros_emprestados' END;
+            UPDATE resumo SET valor = valor + 1 WHERE chave = CASE NEW.status
+                WHEN 'Disponível' THEN 'livros_disponiveis' WHEN 'Emprestado' THEN 'livros_emprestados' END;
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_usuario_cadastrado
+        AFTER INSERT ON usuarios
+        BEGIN
+            UPDATE resumo SET valor = valor + 1 WHERE chave = 'usuarios_total';
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_usuario_removido
+        AFTER DELETE ON usuarios
+        BEGIN
+            UPDATE resumo SET valor = valor - 1 WHERE chave = 'usuarios_total';
+        END''',
+        # Usuários ativos: com pelo menos um empréstimo em aberto.
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_emprestimo_aberto
+        AFTER INSERT ON emprestimos_abertos
+        BEGIN
+            UPDATE resumo SET valor = valor + 1 WHERE chave = 'emprestimos_abertos';
+            UPDATE resumo SET valor = valor + 1 WHERE chave = 'usuarios_ativos' AND NOT EXISTS (
+                SELECT 1 FROM emprestimos_abertos
+                WHERE usuario_id = NEW.usuario_id AND emprestimo_id <> NEW.emprestimo_id
+            );
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_resumo_emprestimo_encerrado
+        AFTER DELETE ON emprestimos_abertos
+        BEGIN
+            UPDATE resumo SET valor = valor - 1 WHERE chave = 'emprestimos_abertos';
+            UPDATE resumo SET valor = valor - 1 WHERE chave = 'usuarios_ativos' AND NOT EXISTS (
+                SELECT 1 FROM emprestimos_abertos WHERE usuario_id = OLD.usuario_id
+            );
+        END''',
+        _PREENCHER_RESUMO,
+    ]),
+    # Índice de texto completo do catálogo. A tabela só guarda o índice; o
+    # conteúdo vem de livros e é mantido pelos triggers abaixo.
+    (6, [
+        '''
+        CREATE VIRTUAL TABLE IF NOT EXISTS livros_busca USING fts5(
+            titulo, autor, categoria,
+            content='livros', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_livros_busca_insercao
+        AFTER INSERT ON livros
+        BEGIN
+            INSERT INTO livros_busca (rowid, titulo, autor, categoria)
+            VALUES (NEW.id, NEW.titulo, NEW.autor, NEW.categoria);
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_livros_busca_remocao
+        AFTER DELETE ON livros
+        BEGIN
+            INSERT INTO livros_busca (livros_busca, rowid, titulo, autor, categoria)
+            VALUES ('delete', OLD.id, OLD.titulo, OLD.autor, OLD.categoria);
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_livros_busca_atualizacao
+        AFTER UPDATE OF titulo, autor, categoria ON livros
+        BEGIN
+            INSERT INTO livros_busca (livros_busca, rowid, titulo, autor, categoria)
+            VALUES ('delete', OLD.id, OLD.titulo, OLD.autor, OLD.categoria);
+            INSERT INTO livros_busca (rowid, titulo, autor, categoria)
+            VALUES (NEW.id, NEW.titulo, NEW.autor, NEW.categoria);
+        END''',
+        "INSERT INTO livros_busca (livros_busca) VALUES ('rebuild')",
+    ]),
+    # data_devolucao passa a ser só o prazo; a devolução efetiva fica em
+    # data_retorno, que é NULL enquanto o empréstimo está em aberto. O índice
+    # parcial único garante no máximo um empréstimo em aberto por livro e
+    # encontra esse empréstimo sem percorrer o histórico.
+    (7, [
+        'ALTER TABLE emprestimos ADD COLUMN data_retorno DATE',
+        # Nos empréstimos já encerrados o prazo foi sobrescrito pela data de
+        # devolução, que passa a ser também a data_retorno.
+        '''
+        UPDATE emprestimos SET data_retorno = data_devolucao
+        WHERE id NOT IN (SELECT emprestimo_id FROM emprestimos_abertos)
+        ''',
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_emprestimos_aberto_livro
+        ON emprestimos (livro_id) WHERE data_retorno IS NULL
+        ''',
+        'DROP TRIGGER IF EXISTS trg_emprestimos_abertos_emprestimo',
+        'DROP TRIGGER IF EXISTS trg_emprestimos_abertos_devolucao',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_emprestimos_abertos_emprestimo
+        AFTER INSERT ON emprestimos
+        WHEN NEW.data_retorno IS NULL
+        BEGIN
+            INSERT INTO emprestimos_abertos (emprestimo_id, usuario_id, livro_id, data_devolucao)
+            VALUES (NEW.id, NEW.usuario_id, NEW.livro_id, NEW.data_devolucao);
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_emprestimos_abertos_retorno
+        AFTER UPDATE OF data_retorno ON emprestimos
+        WHEN NEW.data_retorno IS NOT NULL
+        BEGIN
+            DELETE FROM emprestimos_abertos WHERE emprestimo_id = NEW.id;
+        END''',
+    ]),
+    # Exemplares: cada livro (título/ISBN) pode ter várias cópias, e o
+    # empréstimo passa a ser de um exemplar. livros guarda contadores de
+    # exemplares mantidos por gatilhos; livros.status passa a ser derivado
+    # deles ('Disponível' enquanto houver algum exemplar disponível).
+    (8, [
+        # AUTOINCREMENT: o id de um exemplar removido não é reaproveitado, e
+        # um empréstimo antigo nunca passa a apontar para outra cópia.
+        '''
+        CREATE TABLE IF NOT EXISTS exemplares (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            livro_id INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'Disponível',
+            FOREIGN KEY (livro_id) REFERENCES livros (id)
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_exemplares_livro_status ON exemplares (livro_id, status)',
+        'ALTER TABLE livros ADD COLUMN exemplares_total INTEGER NOT NULL DEFAULT 0',
+        'ALTER TABLE livros ADD COLUMN exemplares_disponiveis INTEGER NOT NULL DEFAULT 0',
+        'ALTER TABLE emprestimos ADD COLUMN exemplar_id INTEGER',
+        # Cada livro existente vira um único exemplar, com o mesmo id.
+        '''
+        INSERT INTO exemplares (id, livro_id, status)
+        SELECT id, id, CASE WHEN status = 'Emprestado' THEN 'Emprestado' ELSE 'Disponível' END FROM livros
+        ''',
+        "UPDATE livros SET exemplares_total = 1, exemplares_disponiveis = (status <> 'Emprestado')",
+        'UPDATE emprestimos SET exemplar_id = livro_id',
+        # Um empréstimo em aberto por exemplar; por livro podem ser vários.
+        'DROP INDEX IF EXISTS idx_emprestimos_aberto_livro',
+        '''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_emprestimos_aberto_exemplar
+        ON emprestimos (exemplar_id) WHERE data_retorno IS NULL
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_emprestimos_aberto_livro
+        ON emprestimos (livro_id, usuario_id) WHERE data_retorno IS NULL
+        ''',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_livros_com_emprestimos
+        ON livros (id) WHERE exemplares_disponiveis < exemplares_total
+        ''',
+        # Todo livro cadastrado nasce com um exemplar.
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_exemplares_livro_cadastrado
+        AFTER INSERT ON livros
+        BEGIN
+            INSERT INTO exemplares (livro_id, status)
+            VALUES (NEW.id, CASE WHEN NEW.status = 'Emprestado' THEN 'Emprestado' ELSE 'Disponível' END);
+        END''',
+        # Um livro com exemplares emprestados não pode ser removido: o
+        # empréstimo em aberto ficaria apontando para um exemplar que não existe.
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_livros_remocao_emprestado
+        BEFORE DELETE ON livros
+        WHEN OLD.exemplares_disponiveis < OLD.exemplares_total
+        BEGIN
+            SELECT RAISE(ABORT, 'Livro com exemplares emprestados');
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_exemplares_livro_removido
+        AFTER DELETE ON livros
+        BEGIN
+            DELETE FROM exemplares WHERE livro_id = OLD.id;
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_exemplares_insercao
+        AFTER INSERT ON exemplares
+        BEGIN
+            UPDATE livros SET
+                exemplares_total = exemplares_total + 1,
+                exemplares_disponiveis = exemplares_disponiveis + (NEW.status = 'Disponível')
+            WHERE id = NEW.livro_id;
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_exemplares_remocao
+        AFTER DELETE ON exemplares
+        BEGIN
+            UPDATE livros SET
+                exemplares_total = exemplares_total - 1,
+                exemplares_disponiveis = exemplares_disponiveis - (OLD.status = 'Disponível')
+            WHERE id = OLD.livro_id;
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_exemplares_status
+        AFTER UPDATE OF status ON exemplares
+        WHEN NEW.status <> OLD.status
+        BEGIN
+            UPDATE livros SET
+                exemplares_disponiveis = exemplares_disponiveis + (NEW.status = 'Disponível') - (OLD.status = 'Disponível')
+            WHERE id = NEW.livro_id;
+        END''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_livros_status_exemplares
+        AFTER UPDATE OF exemplares_disponiveis ON livros
+        WHEN (NEW.exemplares_disponiveis > 0) <> (NEW.status = 'Disponível')
+        BEGIN
+            UPDATE livros SET status = CASE WHEN NEW.exemplares_disponiveis > 0 THEN 'Disponível' ELSE 'Emprestado' END
+            WHERE id = NEW.id;
+        END''',
+    ]),
+    # Empréstimos encerrados por data de retorno, para o arquivamento.
+    (9, [
+        '''
+        CREATE INDEX IF NOT EXISTS idx_emprestimos_retorno
+        ON emprestimos (data_retorno) WHERE data_retorno IS NOT NULL
+        ''',
+    ]),
+    # consultar_historico paginado por (data_emprestimo, id) dentro do usuário;
+    # o índice parcial atende ao filtro de empréstimos em aberto.
+    (10, [
+        'CREATE INDEX IF NOT EXISTS idx_emprestimos_usuario_data ON emprestimos (usuario_id, data_emprestimo)',
+        '''
+        CREATE INDEX IF NOT EXISTS idx_emprestimos_aberto_usuario_data
+        ON emprestimos (usuario_id, data_emprestimo) WHERE data_retorno IS NULL
+        ''',
+        # Nenhum comando escolhe mais estes: o histórico usa os índices acima,
+        # devolução e renovação usam idx_emprestimos_aberto_livro e o
+        # relatório 'disponiveis' usa idx_livros_status_id.
+        'DROP INDEX IF EXISTS idx_emprestimos_usuario_livro',
+        'DROP INDEX IF EXISTS idx_livros_status',
+    ]),
+]
+
+
+def reconstruir_emprestimos_abertos():
+    # Refaz emprestimos_abertos a partir das tabelas base (após cargas feitas
+    # fora de app.py, por exemplo).
+    conn = connect_db()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute('DELETE FROM emprestimos_abertos')
+        conn.execute(_PREENCHER_EMPRESTIMOS_ABERTOS)
+        _confirmar(conn)
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def reparar_resumo(corrigir=True):
+    # Recalcula os contadores a partir das tabelas base e informa as divergências
+    # encontradas como {chave: (armazenado, real)}.
+    conn = connect_db()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        reais = dict(conn.execute(_CONTAGENS_RESUMO).fetchall())
+        armazenados = dict(conn.execute('SELECT chave, valor FROM resumo').fetchall())
+        divergencias = {
+            chave: (armazenados.get(chave), real)
+            for chave, real in reais.items() if armazenados.get(chave) != real
+        }
+        if corrigir and divergencias:
+            conn.executemany(
+                'INSERT OR REPLACE INTO resumo (chave, valor) VALUES (?, ?)', list(reais.items()),
+            )
+        _confirmar(conn)
+        return {"success": True, "divergencias": divergencias}
+    except sqlite3.Error as e:
+        conn.rollback()
+        return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
+    finally:
+        conn.close()
+
+
+def versao_esquema(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def aplicar_migracoes(conn):
+    aplicadas = []
+    for versao, comandos in MIGRACOES:
+        if versao <= versao_esquema(conn):
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            # Outro processo pode ter migrado enquanto esperávamos o lock.
+            if versao <= versao_esquema(conn):
+                conn.rollback()
+                continue
+            for comando in comandos:
+                conn.execute(comando)
+            conn.execute(f'PRAGMA user_version = {int(versao)}')
+            _confirmar(conn)
+        except BaseException:
+            conn.rollback()
+            raise
+        aplicadas.append(versao)
+    return aplicadas
+
+
 def create_tables():
     conn = connect_db()
-    cursor = conn.cursor()
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS usuarios (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        nome TEXT NOT NULL,
-        cpf TEXT UNIQUE NOT NULL,
-        email TEXT NOT NULL,
-        telefone TEXT NOT NULL
-    )''')
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS livros (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        titulo TEXT NOT NULL,
-        autor TEXT NOT NULL,
-        isbn TEXT UNIQUE NOT NULL,
-        categoria TEXT NOT NULL,
-        status TEXT NOT NULL
-    )''')
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS emprestimos (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
+    try:
+        aplicar_migracoes(conn)
+    finally:
+        conn.close()
+
+
+# Arquivo do histórico: empréstimos encerrados há mais de MESES_HISTORICO_QUENTE
+# saem de emprestimos para arquivo.emprestimos, num banco SQLite separado que
+# é anexado (ATTACH) às conexões que precisam dele.
+MESES_HISTORICO_QUENTE = 12
+TAMANHO_LOTE_ARQUIVO = 1000
+PAUSA_ARQUIVO_SEGUNDOS = 0.01
+
+_ESQUEMA_ARQUIVO = [
+    '''
+    CREATE TABLE IF NOT EXISTS arquivo.emprestimos (
+        id INTEGER PRIMARY KEY,
         usuario_id INTEGER,
         livro_id INTEGER,
+        exemplar_id INTEGER,
         data_emprestimo DATE NOT NULL,
         data_devolucao DATE,
-        FOREIGN KEY (usuario_id) REFERENCES usuarios(id),
-        FOREIGN KEY (livro_id) REFERENCES livros(id)
-    )''')
-    conn.commit()
-    conn.close()
+        data_retorno DATE NOT NULL
+    )''',
+    '''
+    CREATE INDEX IF NOT EXISTS arquivo.idx_arquivo_emprestimos_usuario_data
+    ON emprestimos (usuario_id, data_emprestimo)
+    ''',
+]
+
+
+def caminho_arquivo():
+    return _config_db["arquivo"] or os.path.splitext(_config_db["caminho"])[0] + '_arquivo.db'
+
+
+def _anexar_arquivo(conn):
+    # Anexa o arquivo uma vez por conexão, se ele já existir (só o
+    # arquivamento o cria). Conexões somente leitura o anexam também em mode=ro.
+    caminho = caminho_arquivo()
+    if getattr(conn, 'arquivo', None) == caminho:
+        return True
+    if not os.path.exists(caminho) or conn.in_transaction:
+        return False
+    if getattr(conn, 'somente_leitura', False):
+        conn.execute('ATTACH DATABASE ? AS arquivo', (Path(caminho).resolve().as_uri() + '?mode=ro',))
+    else:
+        conn.execute('ATTACH DATABASE ? AS arquivo', (caminho,))
+    conn.arquivo = caminho
+    return True
+
+
+def _copiar_para_arquivo(conn, ids):
+    # OR IGNORE: um lote copiado numa execução interrompida antes da remoção
+    # é simplesmente copiado de novo.
+    _por_ids(conn, '''
+        INSERT OR IGNORE INTO arquivo.emprestimos
+        SELECT id, usuario_id, livro_id, exemplar_id, data_emprestimo, data_devolucao, data_retorno
+        FROM main.emprestimos WHERE id IN ({})
+    ''', ids)
+    _confirmar(conn)
+
+
+def _remover_arquivados(conn, ids):
+    _por_ids(conn, 'DELETE FROM main.emprestimos WHERE id IN ({})', ids)
+    _confirmar(conn)
+
+
+def arquivar_emprestimos(meses=MESES_HISTORICO_QUENTE, tamanho_lote=TAMANHO_LOTE_ARQUIVO,
+                         pausa_segundos=PAUSA_ARQUIVO_SEGUNDOS, data=None):
+    # Move, em lotes, os empréstimos devolvidos antes de "data" - "meses".
+    # Cada lote é copiado e confirmado no arquivo antes de ser removido do
+    # banco principal (o COMMIT de bancos anexados em WAL não é atômico entre
+    # eles), e a remoção é uma transação curta: entre um lote e outro as
+    # escritas do balcão seguem normalmente.
+    if not isinstance(meses, int) or isinstance(meses, bool) or meses < 0:
+        return {"success": False, "message": "Número de meses inválido"}
+    if not isinstance(tamanho_lote, int) or isinstance(tamanho_lote, bool) or tamanho_lote < 1:
+        return {"success": False, "message": "Tamanho de lote inválido"}
+
+    data = data or datetime.now().date()
+    # Conexão própria: as conexões do pool não ficam com o arquivo anexado,
+    # e o BEGIN IMMEDIATE do balcão não trava também o arquivo.
+    conn = _abrir_conexao()
+    arquivados = 0
+    try:
+        conn.execute('ATTACH DATABASE ? AS arquivo', (caminho_arquivo(),))
+        conn.execute(f'PRAGMA arquivo.journal_mode = {_config_db["journal_mode"]}')
+        for comando in _ESQUEMA_ARQUIVO:
+            conn.execute(comando)
+        _confirmar(conn)
+        limite = conn.execute('SELECT date(?, ?)', (data, f'-{int(meses)} months')).fetchone()[0]
+        while True:
+            ids = [linha[0] for linha in conn.execute(
+                'SELECT id FROM main.emprestimos WHERE data_retorno < ? LIMIT ?', (limite, tamanho_lote),
+            )]
+            if not ids:
+                break
+            _com_retentativas(conn, lambda: _copiar_para_arquivo(conn, ids))
+            _com_retentativas(conn, lambda: _remover_arquivados(conn, ids))
+            arquivados += len(ids)
+            if pausa_segundos:
+                time.sleep(pausa_segundos)
+        return {"success": True, "arquivados": arquivados}
+    except sqlite3.Error as e:
+        conn.rollback()
+        return {"success": False, "message": f"Erro de banco de dados: {str(e)}", "arquivados": arquivados}
+    finally:
+        conn.fechar()
 
 
 def is_valid_cpf(cpf):
-    cpf = re.sub(r'\D', '', cpf)
-    return len(cpf) == 11 and cpf.isdigit()
+    return validacao.motivo_cpf(cpf) == validacao.VALIDO
 
 
 def is_valid_email(email):
-    return re.match(r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$', email) is not None
-
+    return validacao.motivo_email(email) == validacao.VALIDO
 
-def cadastrar_usuario(nome, cpf, email, telefone):
 
+def _validar_usuario(nome, cpf, email, telefone):
     if not nome or not cpf or not email or not telefone:
         return "Todos os campos são obrigatórios"
-    
     if not is_valid_cpf(cpf):
         return "CPF inválido"
-    
     if not is_valid_email(email):
         return "E-mail inválido"
-    
+    return None
+
+
+@instrumentado
+def cadastrar_usuario(nome, cpf, email, telefone):
+
+    motivo = _validar_usuario(nome, cpf, email, telefone)
+    if motivo:
+        return motivo
+
     conn = connect_db()
     cursor = conn.cursor()
     
@@ -67,13 +1124,14 @@ def cadastrar_usuario(nome, cpf, email, telefone):
         cursor.execute('''
         INSERT INTO usuarios (nome, cpf, email, telefone) VALUES (?, ?, ?, ?)
         ''', (nome, cpf, email, telefone))
-        conn.commit()
+        _confirmar(conn)
         return "Usuário cadastrado com sucesso"
     except sqlite3.IntegrityError:
         return "CPF ou e-mail já cadastrado"
     finally:
         conn.close()
 
+@instrumentado
 def atualizar_usuario(user_id, nome=None, email=None, telefone=None):
     if nome is None and email is None and telefone is None:
         return {"success": False, "message": "Nenhuma informação para atualizar"}
@@ -91,7 +1149,7 @@ def atualizar_usuario(user_id, nome=None, email=None, telefone=None):
             cursor.execute('UPDATE usuarios SET email = ? WHERE id = ?', (email, user_id))
         if telefone:
             cursor.execute('UPDATE usuarios SET telefone = ? WHERE id = ?', (telefone, user_id))
-        conn.commit()
+        _confirmar(conn)
         return {"success": True, "message": "Usuário atualizado com sucesso"}
     except sqlite3.Error as e:
         return {"success": False, "message": str(e)}
@@ -100,32 +1158,206 @@ def atualizar_usuario(user_id, nome=None, email=None, telefone=None):
 
 
 def is_valid_isbn(isbn):
-    isbn = re.sub(r'\D', '', isbn)
-    return len(isbn) in [10, 13] and isbn.isdigit()
+    return validacao.motivo_isbn(isbn) == validacao.VALIDO
 
 
-def cadastrar_livro(titulo, autor, isbn, categoria):
+def _validar_livro(titulo, autor, isbn, categoria):
     if not titulo or not autor or not isbn or not categoria:
-        return {"success": False, "message": "Todos os campos são obrigatórios"}
-    
-
+        return "Todos os campos são obrigatórios"
     if not is_valid_isbn(isbn):
-        return {"success": False, "message": "ISBN inválido"}
+        return "ISBN inválido"
+    return None
+
+
+# Validação de um lote inteiro de uma vez, coluna por coluna: um motivo de
+# rejeição (ou None) por linha, com as mesmas mensagens dos cadastros unitários.
+def _validar_usuarios_em_lote(linhas):
+    motivos = validacao.validar_colunas(
+        cpfs=[cpf for _, cpf, _, _ in linhas], emails=[email for _, _, email, _ in linhas],
+    )["motivos"]
+    return [
+        "CPF inválido" if cpf else "E-mail inválido" if email else None
+        for cpf, email in zip(motivos["cpf"], motivos["email"])
+    ]
+
+
+def _validar_livros_em_lote(linhas):
+    motivos = validacao.validar_colunas(isbns=[isbn for _, _, isbn, _ in linhas])["motivos"]
+    return ["ISBN inválido" if isbn else None for isbn in motivos["isbn"]]
+
+
+@instrumentado
+def cadastrar_livro(titulo, autor, isbn, categoria, exemplares=1):
+    motivo = _validar_livro(titulo, autor, isbn, categoria)
+    if motivo:
+        return {"success": False, "message": motivo}
+    if not _quantidade_exemplares_valida(exemplares):
+        return {"success": False, "message": "Número de exemplares inválido"}
 
     conn = connect_db()
     cursor = conn.cursor()
     
     try:
+        # O trigger trg_exemplares_livro_cadastrado cria o primeiro exemplar.
         cursor.execute('''
         INSERT INTO livros (titulo, autor, isbn, categoria, status) VALUES (?, ?, ?, ?, ?)
         ''', (titulo, autor, isbn, categoria, 'Disponível'))
-        conn.commit()
+        if exemplares > 1:
+            cursor.executemany(
+                'INSERT INTO exemplares (livro_id) VALUES (?)', [(cursor.lastrowid,)] * (exemplares - 1),
+            )
+        _confirmar(conn)
+        _sugestoes_adicionar([(titulo, autor)])
         return {"success": True, "message": "Livro cadastrado com sucesso"}
     except sqlite3.IntegrityError:
         return {"success": False, "message": "ISBN já cadastrado"}
     finally:
         conn.close()
 
+def _quantidade_exemplares_valida(quantidade):
+    return isinstance(quantidade, int) and not isinstance(quantidade, bool) and quantidade >= 1
+
+
+@instrumentado
+def adicionar_exemplares(livro_id, quantidade):
+    if not livro_id:
+        return {"success": False, "message": "ID do livro é obrigatório"}
+    if not _quantidade_exemplares_valida(quantidade):
+        return {"success": False, "message": "Número de exemplares inválido"}
+
+    conn = connect_db()
+    cursor = conn.cursor()
+
+    try:
+        # O INSERT ... SELECT não cria nada se o livro não existir (ou for
+        # removido por outra conexão no meio do caminho).
+        cursor.executemany(
+            'INSERT INTO exemplares (livro_id) SELECT id FROM livros WHERE id = ?', [(livro_id,)] * quantidade,
+        )
+        if cursor.rowcount == 0:
+            conn.rollback()
+            return {"success": False, "message": "Livro não encontrado"}
+        _confirmar(conn)
+        _cache_invalidar(livro_id)
+        return {"success": True, "message": "Exemplares adicionados com sucesso"}
+    except sqlite3.Error as e:
+        return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
+    finally:
+        conn.close()
+
+TAMANHO_LOTE_PADRAO = 1000
+
+
+def _valores_registro(registro, campos):
+    # Aceita dicionários (csv.DictReader, JSON) ou sequências na ordem dos campos.
+    if isinstance(registro, dict):
+        return tuple(registro.get(campo) for campo in campos)
+    valores = tuple(registro)[:len(campos)]
+    return valores + (None,) * (len(campos) - len(valores))
+
+
+def _inserir_lote(conn, lote, validar, sql, tabela, coluna_unica, posicao_unica, mensagem_duplicado, rejeitados,
+                  apos_confirmar):
+    validos = []
+    for (indice, valores), motivo in zip(lote, validar([valores for _, valores in lote])):
+        if motivo:
+            rejeitados.append({"linha": indice, "motivo": motivo})
+        else:
+            validos.append((indice, valores))
+    lote = validos
+    if not lote:
+        return 0
+
+    conn.execute('BEGIN IMMEDIATE')
+    # Se a transação falhar, só as linhas ainda pendentes são recusadas com
+    # o erro; as duplicadas já foram recusadas pelo motivo próprio.
+    pendentes = lote
+    try:
+        chaves = [valores[posicao_unica] for _, valores in lote]
+        marcadores = ', '.join('?' * len(chaves))
+        existentes = {
+            linha[0] for linha in
+            conn.execute(f'SELECT {coluna_unica} FROM {tabela} WHERE {coluna_unica} IN ({marcadores})', chaves)
+        }
+        pendentes = []
+        for indice, valores in lote:
+            chave = valores[posicao_unica]
+            if chave in existentes:
+                rejeitados.append({"linha": indice, "motivo": mensagem_duplicado})
+                continue
+            existentes.add(chave)
+            pendentes.append((indice, valores))
+        linhas = [valores for _, valores in pendentes]
+        conn.executemany(sql, linhas)
+        _confirmar(conn)
+    except sqlite3.Error as e:
+        conn.rollback()
+        for indice, _ in pendentes:
+            rejeitados.append({"linha": indice, "motivo": f"Erro de banco de dados: {str(e)}"})
+        return 0
+    if apos_confirmar is not None:
+        apos_confirmar(linhas)
+    return len(linhas)
+
+
+def _cadastrar_em_lote(registros, campos, validar, sql, tabela, coluna_unica, mensagem_duplicado, tamanho_lote,
+                      apos_confirmar=None):
+    # Só um lote fica em memória por vez; o relatório guarda apenas as linhas
+    # rejeitadas. Campos vazios são recusados linha a linha; CPF, ISBN e
+    # e-mail são validados por validar com o lote inteiro.
+    posicao_unica = campos.index(coluna_unica)
+    aceitos = 0
+    rejeitados = []
+    lote = []
+
+    conn = connect_db()
+    try:
+        for indice, registro in enumerate(registros):
+            valores = _valores_registro(registro, campos)
+            if not all(valores):
+                rejeitados.append({"linha": indice, "motivo": "Todos os campos são obrigatórios"})
+                continue
+            lote.append((indice, valores))
+            if len(lote) >= tamanho_lote:
+                aceitos += _inserir_lote(conn, lote, validar, sql, tabela, coluna_unica, posicao_unica,
+                                         mensagem_duplicado, rejeitados, apos_confirmar)
+                lote = []
+        if lote:
+            aceitos += _inserir_lote(conn, lote, validar, sql, tabela, coluna_unica, posicao_unica,
+                                     mensagem_duplicado, rejeitados, apos_confirmar)
+    finally:
+        conn.close()
+
+    rejeitados.sort(key=lambda rejeitado: rejeitado["linha"])
+    return {"success": True, "aceitos": aceitos, "rejeitados": rejeitados}
+
+
+@instrumentado
+def cadastrar_usuarios_em_lote(registros, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    return _cadastrar_em_lote(
+        registros,
+        ('nome', 'cpf', 'email', 'telefone'),
+        _validar_usuarios_em_lote,
+        'INSERT INTO usuarios (nome, cpf, email, telefone) VALUES (?, ?, ?, ?)',
+        'usuarios', 'cpf', "CPF ou e-mail já cadastrado",
+        tamanho_lote,
+    )
+
+
+@instrumentado
+def cadastrar_livros_em_lote(registros, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    return _cadastrar_em_lote(
+        registros,
+        ('titulo', 'autor', 'isbn', 'categoria'),
+        _validar_livros_em_lote,
+        "INSERT INTO livros (titulo, autor, isbn, categoria, status) VALUES (?, ?, ?, ?, 'Disponível')",
+        'livros', 'isbn', "ISBN já cadastrado",
+        tamanho_lote,
+        apos_confirmar=lambda linhas: _sugestoes_adicionar((titulo, autor) for titulo, autor, _, _ in linhas),
+    )
+
+
+@instrumentado
 def remover_livro(livro_id):
     if not livro_id:
         return {"success": False, "message": "ID do livro é obrigatório"}
@@ -134,17 +1366,36 @@ def remover_livro(livro_id):
     cursor = conn.cursor()
 
     try:
-        cursor.execute('DELETE FROM livros WHERE id = ?', (livro_id,))
+        cursor.execute('''
+        DELETE FROM livros WHERE id = ?
+        RETURNING id, titulo, autor
+        ''', (livro_id,))
+        removidos = cursor.fetchall()
         if cursor.rowcount == 0:
             return {"success": False, "message": "Livro não encontrado"}
-        conn.commit()
+        _confirmar(conn)
+        _cache_invalidar(livro_id)
+        for removido_id, titulo, autor in removidos:
+            _sugestoes_remover(removido_id, titulo, autor)
         return {"success": True, "message": "Livro removido com sucesso"}
+    except sqlite3.IntegrityError as e:
+        if 'exemplares emprestados' in str(e):
+            return {"success": False, "message": "Livro com exemplares emprestados"}
+        return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
     except sqlite3.Error as e:
         return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
     finally:
         conn.close()
 
 
+# 'Emprestado' quando algum exemplar do livro está emprestado; livros.status
+# só fica 'Emprestado' quando todos estão.
+_CIRCULACAO_LIVRO = "CASE WHEN exemplares_disponiveis < exemplares_total THEN 'Emprestado' ELSE 'Disponível' END"
+
+_DISPONIBILIDADE_LIVRO = 'SELECT status, exemplares_disponiveis, exemplares_total FROM livros WHERE id = ?'
+
+
+@instrumentado
 def emprestar_livro(usuario_id, livro_id):
     if not usuario_id or not livro_id:
         return {"success": False, "message": "ID do usuário e do livro são obrigatórios"}
@@ -153,69 +1404,281 @@ def emprestar_livro(usuario_id, livro_id):
     cursor = conn.cursor()
 
     try:
-        cursor.execute('SELECT status FROM livros WHERE id = ?', (livro_id,))
-        livro = cursor.fetchone()
-
-        if livro is None:
-            return {"success": False, "message": "Livro não encontrado"}
-
-        status = livro[0]
-        if status == 'Disponível':
-            data_emprestimo = datetime.now().date()
-            data_devolucao = data_emprestimo + timedelta(days=14)  # 2 semanas para devolução
-
-            cursor.execute('''
-            INSERT INTO emprestimos (usuario_id, livro_id, data_emprestimo, data_devolucao)
-            VALUES (?, ?, ?, ?)
-            ''', (usuario_id, livro_id, data_emprestimo, data_devolucao))
-
-            cursor.execute('UPDATE livros SET status = ? WHERE id = ?', ('Emprestado', livro_id))
-            conn.commit()
-            return {"success": True, "message": f"Empréstimo realizado com sucesso. Data de devolução: {data_devolucao}"}
-        else:
-            return {"success": False, "message": "O livro não está disponível"}
+        return _com_retentativas(conn, lambda: _emprestar(conn, cursor, usuario_id, livro_id))
     except sqlite3.Error as e:
         return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
     finally:
         conn.close()
 
 
+def _emprestar(conn, cursor, usuario_id, livro_id):
+    # A transação começa pela escrita condicional: o lock de escrita é obtido
+    # antes de qualquer leitura, então dois processos não emprestam o mesmo
+    # exemplar. Qualquer exemplar disponível do livro serve.
+    data_emprestimo = datetime.now().date()
+    data_devolucao = data_emprestimo + timedelta(days=14)  # 2 semanas para devolução
+
+    cursor.execute('''
+    UPDATE exemplares SET status = 'Emprestado'
+    WHERE id = (SELECT id FROM exemplares WHERE livro_id = ? AND status = 'Disponível' LIMIT 1)
+    RETURNING id
+    ''', (livro_id,))
+    exemplar = cursor.fetchone()
+    if exemplar is None:
+        conn.rollback()
+        cursor.execute('SELECT status FROM livros WHERE id = ?', (livro_id,))
+        if cursor.fetchone() is None:
+            return {"success": False, "message": "Livro não encontrado"}
+        return {"success": False, "message": "O livro não está disponível"}
+
+    cursor.execute('''
+    INSERT INTO emprestimos (usuario_id, livro_id, exemplar_id, data_emprestimo, data_devolucao)
+    VALUES (?, ?, ?, ?, ?)
+    ''', (usuario_id, livro_id, exemplar[0], data_emprestimo, data_devolucao))
+    cursor.execute(_DISPONIBILIDADE_LIVRO, (livro_id,))
+    disponibilidade = cursor.fetchone()
+    _confirmar(conn, [(livro_id, disponibilidade)])
+    return {"success": True, "message": f"Empréstimo realizado com sucesso. Data de devolução: {data_devolucao}"}
+
+
+@instrumentado
 def devolver_livro(usuario_id, livro_id):
     if not usuario_id or not livro_id:
         return {"success": False, "message": "ID do usuário e do livro são obrigatórios"}
-    
+
     conn = connect_db()
     cursor = conn.cursor()
 
     try:
-        cursor.execute('SELECT status FROM livros WHERE id = ?', (livro_id,))
-        livro = cursor.fetchone()
+        return _com_retentativas(conn, lambda: _devolver(conn, cursor, usuario_id, livro_id))
+    except sqlite3.Error as e:
+        return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
+    finally:
+        conn.close()
+
 
+def _devolver(conn, cursor, usuario_id, livro_id):
+    # Só o empréstimo em aberto deste usuário para este livro é encerrado. O
+    # índice parcial leva direto a ele, qualquer que seja o histórico do usuário.
+    cursor.execute('''
+    UPDATE emprestimos SET data_retorno = ?
+    WHERE id = (
+        SELECT id FROM emprestimos INDEXED BY idx_emprestimos_aberto_livro
+        WHERE livro_id = ? AND usuario_id = ? AND data_retorno IS NULL
+        LIMIT 1
+    )
+    RETURNING exemplar_id
+    ''', (datetime.now().date(), livro_id, usuario_id))
+    emprestimo = cursor.fetchone()
+    if emprestimo is None:
+        conn.rollback()
+        cursor.execute(f'SELECT {_CIRCULACAO_LIVRO} FROM livros WHERE id = ?', (livro_id,))
+        livro = cursor.fetchone()
         if livro is None:
             return {"success": False, "message": "Livro não encontrado"}
+        if livro[0] == 'Emprestado':
+            return {"success": False, "message": "O livro não está registrado como emprestado para este usuário"}
+        return {"success": False, "message": "O livro não está marcado como emprestado"}
 
-        status = livro[0]
-        if status == 'Emprestado':
-            cursor.execute('''
-            SELECT id FROM emprestimos WHERE usuario_id = ? AND livro_id = ?
-            ''', (usuario_id, livro_id))
-            emprestimo_id = cursor.fetchone()
-
-            if emprestimo_id:
-                cursor.execute('UPDATE emprestimos SET data_devolucao = ? WHERE id = ?', (datetime.now().date(), emprestimo_id[0]))
-                cursor.execute('UPDATE livros SET status = ? WHERE id = ?', ('Disponível', livro_id))
-                conn.commit()
-                return {"success": True, "message": "Devolução registrada com sucesso"}
-            else:
-                return {"success": False, "message": "O livro não está registrado como emprestado para este usuário"}
+    cursor.execute("UPDATE exemplares SET status = 'Disponível' WHERE id = ?", (emprestimo[0],))
+    cursor.execute(_DISPONIBILIDADE_LIVRO, (livro_id,))
+    disponibilidade = cursor.fetchone()
+    _confirmar(conn, [(livro_id, disponibilidade)])
+    return {"success": True, "message": "Devolução registrada com sucesso"}
+
+
+# Listas grandes de ids são enviadas ao SQLite em partes, abaixo do limite
+# de parâmetros por comando.
+TAMANHO_PARTE_IDS = 500
+
+
+def _por_ids(conn, sql, ids, *parametros):
+    # sql traz {} no lugar dos marcadores do IN; parametros vêm antes dos ids.
+    ids = list(ids)
+    linhas = []
+    for inicio in range(0, len(ids), TAMANHO_PARTE_IDS):
+        parte = ids[inicio:inicio + TAMANHO_PARTE_IDS]
+        linhas.extend(conn.execute(sql.format(', '.join('?' * len(parte))), (*parametros, *parte)))
+    return linhas
+
+
+def _id_do_lote(valor):
+    # Os lotes comparam ids em Python; "1" vale 1, como na comparação com a
+    # coluna INTEGER que o SQLite faz em emprestar_livro e devolver_livro.
+    if isinstance(valor, str):
+        try:
+            return int(valor)
+        except ValueError:
+            return valor
+    return valor
+
+
+def _concluir_lote(conn, itens, tudo_ou_nada, gravar):
+    # No modo tudo ou nada, qualquer item com erro desfaz o lote inteiro.
+    falhas = sum(1 for item in itens if not item["success"])
+    if tudo_ou_nada and falhas:
+        conn.rollback()
+        for item in itens:
+            if item["success"]:
+                item.update(success=False, message="Não processado: lote cancelado")
+        return {"success": False, "message": "Lote cancelado: nenhum item foi processado", "itens": itens}
+    gravar()
+    _confirmar(conn)
+    return {"success": True, "processados": len(itens) - falhas, "itens": itens}
+
+
+@instrumentado
+def emprestar_livros(usuario_id, livro_ids, tudo_ou_nada=False):
+    # Vários livros para o mesmo usuário numa única transação. O resultado
+    # traz, para cada livro, a mesma mensagem que emprestar_livro daria.
+    livro_ids = [_id_do_lote(livro_id) for livro_id in livro_ids or []]
+    if not usuario_id or not livro_ids:
+        return {"success": False, "message": "ID do usuário e do livro são obrigatórios"}
+
+    conn = connect_db()
+    try:
+        resultado = _com_retentativas(conn, lambda: _emprestar_lote(conn, usuario_id, livro_ids, tudo_ou_nada))
+    except sqlite3.Error as e:
+        return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
+    finally:
+        conn.close()
+
+    for item in resultado["itens"]:
+        if item["success"]:
+            _cache_invalidar(item["livro_id"])
+    return resultado
+
+
+def _emprestar_lote(conn, usuario_id, livro_ids, tudo_ou_nada):
+    data_emprestimo = datetime.now().date()
+    data_devolucao = data_emprestimo + timedelta(days=14)  # 2 semanas para devolução
+
+    conn.execute('BEGIN IMMEDIATE')
+    disponiveis = dict(_por_ids(conn, 'SELECT id, exemplares_disponiveis FROM livros WHERE id IN ({})', set(livro_ids)))
+    itens = []
+    emprestados = []
+    for livro_id in livro_ids:
+        if not livro_id:
+            mensagem = "ID do usuário e do livro são obrigatórios"
+        elif livro_id not in disponiveis:
+            mensagem = "Livro não encontrado"
+        elif disponiveis[livro_id] <= 0:
+            mensagem = "O livro não está disponível"
         else:
-            return {"success": False, "message": "O livro não está marcado como emprestado"}
+            disponiveis[livro_id] -= 1
+            emprestados.append(livro_id)
+            itens.append({
+                "livro_id": livro_id, "success": True,
+                "message": f"Empréstimo realizado com sucesso. Data de devolução: {data_devolucao}",
+            })
+            continue
+        itens.append({"livro_id": livro_id, "success": False, "message": mensagem})
+
+    def gravar():
+        conn.executemany('''
+        INSERT INTO emprestimos (usuario_id, livro_id, exemplar_id, data_emprestimo, data_devolucao)
+        VALUES (?, ?, ?, ?, ?)
+        ''', [
+            (usuario_id, livro_id, exemplar_id, data_emprestimo, data_devolucao)
+            for livro_id, exemplar_id in _reservar_exemplares(conn, emprestados)
+        ])
+
+    return _concluir_lote(conn, itens, tudo_ou_nada, gravar)
+
+
+def _reservar_exemplares(conn, livro_ids):
+    # Marca um exemplar disponível de cada livro por passada; um livro pedido
+    # k vezes no lote precisa de k passadas. Devolve pares (livro_id, exemplar_id).
+    pendentes = Counter(livro_ids)
+    reservados = []
+    while pendentes:
+        linhas = _por_ids(conn, '''
+            UPDATE exemplares SET status = 'Emprestado'
+            WHERE id IN (
+                SELECT MIN(id) FROM exemplares
+                WHERE livro_id IN ({}) AND status = 'Disponível'
+                GROUP BY livro_id
+            )
+            RETURNING livro_id, id
+        ''', pendentes)
+        if not linhas:
+            break
+        reservados.extend(linhas)
+        pendentes.subtract(livro_id for livro_id, _ in linhas)
+        pendentes = +pendentes
+    return reservados
+
+
+@instrumentado
+def devolver_livros(itens, tudo_ou_nada=False):
+    # itens: pares (usuario_id, livro_id) ou dicionários com essas chaves.
+    # usuario_id None devolve o livro de quem estiver com ele, como numa
+    # caixa de devolução em que o leitor não se identifica.
+    pares = [
+        tuple(_id_do_lote(valor) for valor in _valores_registro(item, ('usuario_id', 'livro_id')))
+        for item in itens or []
+    ]
+    if not pares:
+        return {"success": False, "message": "ID do usuário e do livro são obrigatórios"}
+
+    conn = connect_db()
+    try:
+        resultado = _com_retentativas(conn, lambda: _devolver_lote(conn, pares, tudo_ou_nada))
     except sqlite3.Error as e:
         return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
     finally:
         conn.close()
 
+    for item in resultado["itens"]:
+        if item["success"]:
+            _cache_invalidar(item["livro_id"])
+    return resultado
 
+
+def _devolver_lote(conn, pares, tudo_ou_nada):
+    livro_ids = {livro_id for _, livro_id in pares if livro_id}
+
+    conn.execute('BEGIN IMMEDIATE')
+    existentes = {linha[0] for linha in _por_ids(conn, 'SELECT id FROM livros WHERE id IN ({})', livro_ids)}
+    abertos = {}
+    for livro_id, emprestimo_id, usuario_id, exemplar_id in _por_ids(conn, '''
+        SELECT livro_id, id, usuario_id, exemplar_id FROM emprestimos INDEXED BY idx_emprestimos_aberto_livro
+        WHERE livro_id IN ({}) AND data_retorno IS NULL
+    ''', livro_ids):
+        abertos.setdefault(livro_id, []).append((emprestimo_id, usuario_id, exemplar_id))
+    itens = []
+    encerrados = []
+    exemplares = []
+    for usuario_id, livro_id in pares:
+        candidatos = abertos.get(livro_id, [])
+        aberto = next((c for c in candidatos if usuario_id is None or c[1] == usuario_id), None)
+        if not livro_id:
+            mensagem = "ID do usuário e do livro são obrigatórios"
+        elif livro_id not in existentes:
+            mensagem = "Livro não encontrado"
+        elif not candidatos:
+            mensagem = "O livro não está marcado como emprestado"
+        elif aberto is None:
+            mensagem = "O livro não está registrado como emprestado para este usuário"
+        else:
+            candidatos.remove(aberto)
+            encerrados.append(aberto[0])
+            exemplares.append(aberto[2])
+            itens.append({
+                "usuario_id": aberto[1], "livro_id": livro_id, "success": True,
+                "message": "Devolução registrada com sucesso",
+            })
+            continue
+        itens.append({"usuario_id": usuario_id, "livro_id": livro_id, "success": False, "message": mensagem})
+
+    def gravar():
+        _por_ids(conn, 'UPDATE emprestimos SET data_retorno = ? WHERE id IN ({})', encerrados, datetime.now().date())
+        _por_ids(conn, "UPDATE exemplares SET status = 'Disponível' WHERE id IN ({})", exemplares)
+
+    return _concluir_lote(conn, itens, tudo_ou_nada, gravar)
+
+
+@instrumentado
 def renovar_emprestimo(usuario_id, livro_id):
     if not usuario_id or not livro_id:
         return {"success": False, "message": "ID do usuário e do livro são obrigatórios"}
@@ -224,7 +1687,7 @@ def renovar_emprestimo(usuario_id, livro_id):
     cursor = conn.cursor()
 
     try:
-        cursor.execute('SELECT status FROM livros WHERE id = ?', (livro_id,))
+        cursor.execute(f'SELECT {_CIRCULACAO_LIVRO} FROM livros WHERE id = ?', (livro_id,))
         livro = cursor.fetchone()
 
         if livro is None:
@@ -233,8 +1696,9 @@ def renovar_emprestimo(usuario_id, livro_id):
         status = livro[0]
         if status == 'Emprestado':
             cursor.execute('''
-            SELECT id, data_devolucao FROM emprestimos WHERE usuario_id = ? AND livro_id = ? 
-            ''', (usuario_id, livro_id))
+            SELECT id, data_devolucao FROM emprestimos INDEXED BY idx_emprestimos_aberto_livro
+            WHERE livro_id = ? AND data_retorno IS NULL AND usuario_id = ?
+            ''', (livro_id, usuario_id))
             emprestimo = cursor.fetchone()
 
             if emprestimo:
@@ -242,7 +1706,7 @@ def renovar_emprestimo(usuario_id, livro_id):
                 nova_data_devolucao = datetime.strptime(emprestimo[1], '%Y-%m-%d') + timedelta(days=7)
 
                 cursor.execute('UPDATE emprestimos SET data_devolucao = ? WHERE id = ?', (nova_data_devolucao.date(), emprestimo_id))
-                conn.commit()
+                _confirmar(conn)
                 return {"success": True, "message": "Empréstimo renovado com sucesso"}
             else:
                 return {"success": False, "message": "O livro não está registrado como emprestado para este usuário"}
@@ -254,45 +1718,187 @@ def renovar_emprestimo(usuario_id, livro_id):
         conn.close()
 
 
-def consultar_historico(usuario_id):
+ORDENS_HISTORICO = ('desc', 'asc')
+
+
+def _data_filtro(valor):
+    # date, datetime ou texto ISO (AAAA-MM-DD); None se não for uma data.
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    if isinstance(valor, str):
+        try:
+            return date.fromisoformat(valor)
+        except ValueError:
+            return None
+    return None
+
+
+def _consulta_historico(com_arquivo, filtros, ordem, paginado):
+    # Cada ramo (banco principal e arquivo) percorre o índice
+    # (usuario_id, data_emprestimo) já na ordem pedida; com paginação, cada um
+    # para depois de :limite linhas e a união só intercala as duas listas.
+    direcao = 'DESC' if ordem == 'desc' else 'ASC'
+    condicoes = ['e.usuario_id = :usuario_id'] + filtros
+    if paginado:
+        condicoes.append(f"(e.data_emprestimo, e.id) {'<' if ordem == 'desc' else '>'} (:apos_data, :apos_id)")
+    limite = 'LIMIT :limite' if paginado else ''
+    # Em aberto: o índice parcial só tem os empréstimos sem data_retorno.
+    indice = 'idx_emprestimos_aberto_usuario_data' if 'e.data_retorno IS NULL' in filtros else 'idx_emprestimos_usuario_data'
+
+    def ramo(origem, extras):
+        return f'''
+            SELECT livros.titulo, e.data_emprestimo, e.data_devolucao, e.data_retorno, e.id
+            FROM {origem}
+            JOIN livros ON livros.id = e.livro_id
+            WHERE {' AND '.join(condicoes + extras)}
+            ORDER BY e.data_emprestimo {direcao}, e.id {direcao}
+            {limite}
+            '''
+
+    principal = ramo(f'main.emprestimos AS e INDEXED BY {indice}', [])
+    if not com_arquivo:
+        return principal
+    # Um lote já copiado para o arquivo e ainda não removido do banco
+    # principal aparece só uma vez.
+    arquivados = ramo('arquivo.emprestimos AS e', [
+        'NOT EXISTS (SELECT 1 FROM main.emprestimos WHERE main.emprestimos.id = e.id)',
+    ])
+    return f'''
+        SELECT * FROM ({principal}) UNION ALL SELECT * FROM ({arquivados})
+        ORDER BY data_emprestimo {direcao}, id {direcao} {limite}
+        '''
+
+
+def _contagem_historico(com_arquivo, filtros):
+    # Percorre o mesmo índice das páginas, com o mesmo JOIN em livros: um
+    # empréstimo de livro já removido do acervo não aparece nas páginas e
+    # também não entra no total.
+    indice = 'idx_emprestimos_aberto_usuario_data' if 'e.data_retorno IS NULL' in filtros else 'idx_emprestimos_usuario_data'
+    condicoes = ' AND '.join(['e.usuario_id = :usuario_id'] + filtros)
+    arquivados = ''
+    if com_arquivo:
+        arquivados = f''' + (
+            SELECT COUNT(*) FROM arquivo.emprestimos AS e JOIN livros ON livros.id = e.livro_id WHERE {condicoes}
+            AND NOT EXISTS (SELECT 1 FROM main.emprestimos WHERE main.emprestimos.id = e.id)
+        )'''
+    return (f'SELECT COUNT(*){arquivados} FROM main.emprestimos AS e INDEXED BY {indice} '
+            f'JOIN livros ON livros.id = e.livro_id WHERE {condicoes}')
+
+
+@instrumentado
+def consultar_historico(usuario_id, inicio=None, fim=None, apenas_abertos=False, ordem='desc',
+                        tamanho_pagina=None, cursor=None):
+    # Empréstimos do usuário (banco principal e arquivo) do mais recente ao
+    # mais antigo, ou o contrário com ordem='asc', como (titulo,
+    # data_emprestimo, data_devolucao, data_retorno); data_devolucao é o
+    # prazo e data_retorno fica None enquanto o livro não volta. Com tamanho_pagina, devolve
+    # uma página e o cursor da próxima; a primeira página traz também o total.
     if not usuario_id:
         return {"success": False, "message": "ID do usuário é obrigatório"}
+    if ordem not in ORDENS_HISTORICO:
+        return {"success": False, "message": "Ordem inválida"}
+    datas = {"inicio": inicio, "fim": fim}
+    for nome, valor in datas.items():
+        if valor is not None:
+            datas[nome] = _data_filtro(valor)
+            if datas[nome] is None:
+                return {"success": False, "message": "Intervalo de datas inválido"}
+    inicio, fim = datas["inicio"], datas["fim"]
+    if inicio is not None and fim is not None and inicio > fim:
+        return {"success": False, "message": "Intervalo de datas inválido"}
+    if tamanho_pagina is not None and (not isinstance(tamanho_pagina, int) or tamanho_pagina < 1):
+        return {"success": False, "message": "Tamanho de página inválido"}
 
-    conn = connect_db()
-    cursor = conn.cursor()
+    parametros = {"usuario_id": usuario_id}
+    filtros = []
+    if inicio is not None:
+        filtros.append('e.data_emprestimo >= :inicio')
+        parametros["inicio"] = inicio.isoformat()
+    if fim is not None:
+        filtros.append('e.data_emprestimo <= :fim')
+        parametros["fim"] = fim.isoformat()
+    if apenas_abertos:
+        filtros.append('e.data_retorno IS NULL')
 
-    try:
-        cursor.execute('''
-        SELECT livros.titulo, emprestimos.data_emprestimo, emprestimos.data_devolucao
-        FROM emprestimos
-        JOIN livros ON emprestimos.livro_id = livros.id
-        WHERE emprestimos.usuario_id = ?
-        ''', (usuario_id,))
-        historico = cursor.fetchall()
-
-        if historico:
-            return {"success": True, "historico": historico}
+    paginado = tamanho_pagina is not None
+    if paginado:
+        parametros["limite"] = tamanho_pagina + 1
+        if cursor is None:
+            # Antes (ou depois) de qualquer empréstimo real.
+            parametros["apos_data"], parametros["apos_id"] = ('9999-12-31', 0) if ordem == 'desc' else ('', 0)
         else:
+            apos = _decodificar_cursor(cursor, 'historico')
+            if not (isinstance(apos, list) and len(apos) == 2
+                    and isinstance(apos[0], str) and isinstance(apos[1], int)):
+                return {"success": False, "message": "Cursor inválido"}
+            parametros["apos_data"], parametros["apos_id"] = apos
+    elif cursor is not None:
+        return {"success": False, "message": "Cursor exige tamanho de página"}
+
+    conn = connect_db(somente_leitura=True)
+    cursor_db = conn.cursor()
+
+    try:
+        # Sem empréstimos em aberto no arquivo, ele não precisa ser lido.
+        com_arquivo = not apenas_abertos and _anexar_arquivo(conn)
+        cursor_db.execute(_consulta_historico(com_arquivo, filtros, ordem, paginado), parametros)
+        linhas = cursor_db.fetchall()
+
+        if not paginado:
+            if linhas:
+                return {"success": True, "historico": [linha[:4] for linha in linhas]}
             return {"success": False, "message": "Nenhum histórico encontrado"}
+
+        resultado = {"success": True}
+        if cursor is None:
+            if not linhas:
+                return {"success": False, "message": "Nenhum histórico encontrado"}
+            cursor_db.execute(_contagem_historico(com_arquivo, filtros), parametros)
+            resultado["total"] = cursor_db.fetchone()[0]
+        pagina = linhas[:tamanho_pagina]
+        proximo = None
+        if len(linhas) > tamanho_pagina:
+            proximo = _codificar_cursor('historico', [pagina[-1][1], pagina[-1][4]])
+        resultado["historico"] = [linha[:4] for linha in pagina]
+        resultado["proximo_cursor"] = proximo
+        return resultado
     except sqlite3.Error as e:
         return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
     finally:
         conn.close()
 
 
+def _resultado_disponibilidade(disponibilidade):
+    status, disponiveis, total = disponibilidade
+    return {"success": True, "status": status, "disponiveis": disponiveis, "total": total}
+
+
+@instrumentado
 def consultar_disponibilidade(livro_id):
     if not livro_id:
         return {"success": False, "message": "ID do livro é obrigatório"}
 
-    conn = connect_db()
+    conn = connect_db(somente_leitura=True)
     cursor = conn.cursor()
+    # Dentro de instantaneo() a resposta tem de vir do snapshot, não do cache.
+    cache = _cache_disponibilidade if not conn.in_transaction else None
 
     try:
-        cursor.execute('SELECT status FROM livros WHERE id = ?', (livro_id,))
-        status = cursor.fetchone()
-        
-        if status:
-            return {"success": True, "status": status[0]}
+        if cache is not None:
+            cache.sincronizar()
+            em_cache, geracao = cache.obter(livro_id)
+            if em_cache is not None:
+                return _resultado_disponibilidade(em_cache)
+
+        cursor.execute(_DISPONIBILIDADE_LIVRO, (livro_id,))
+        disponibilidade = cursor.fetchone()
+
+        if disponibilidade:
+            if cache is not None:
+                cache.guardar(livro_id, tuple(disponibilidade), geracao)
+            return _resultado_disponibilidade(disponibilidade)
         else:
             return {"success": False, "message": "Livro não encontrado"}
     except sqlite3.Error as e:
@@ -301,33 +1907,142 @@ def consultar_disponibilidade(livro_id):
         conn.close()
 
 
+def _consultar_abertos(filtro, parametros):
+    conn = connect_db(somente_leitura=True)
+    try:
+        linhas = conn.execute(f'''
+        SELECT emprestimos_abertos.livro_id, livros.titulo, emprestimos_abertos.usuario_id,
+               emprestimos_abertos.data_devolucao
+        FROM emprestimos_abertos
+        JOIN livros ON emprestimos_abertos.livro_id = livros.id
+        WHERE {filtro}
+        ORDER BY emprestimos_abertos.data_devolucao
+        ''', parametros).fetchall()
+        return {"success": True, "data": linhas}
+    except sqlite3.Error as e:
+        return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
+    finally:
+        conn.close()
+
+
+@instrumentado
+def consultar_atrasos(data=None):
+    # Empréstimos em aberto com devolução prevista antes de "data" (hoje, por padrão).
+    data = data or datetime.now().date()
+    return _consultar_abertos('emprestimos_abertos.data_devolucao < ?', (data,))
+
+
+@instrumentado
+def consultar_vencimentos(dias, data=None):
+    # Empréstimos em aberto que vencem entre "data" e "data + dias", inclusive.
+    if not isinstance(dias, int) or isinstance(dias, bool) or dias < 0:
+        return {"success": False, "message": "Número de dias inválido"}
+    data = data or datetime.now().date()
+    return _consultar_abertos(
+        'emprestimos_abertos.data_devolucao BETWEEN ? AND ?', (data, data + timedelta(days=dias)),
+    )
+
+
+@instrumentado
+def consultar_resumo():
+    marcadores = ', '.join('?' * len(CHAVES_RESUMO))
+    conn = connect_db(somente_leitura=True)
+    try:
+        linhas = conn.execute(f'''
+        SELECT chave, valor FROM resumo WHERE chave IN ({marcadores})
+        UNION ALL
+        SELECT 'atrasados', COUNT(*) FROM emprestimos_abertos WHERE data_devolucao < ?
+        ''', CHAVES_RESUMO + (datetime.now().date(),)).fetchall()
+        return {"success": True, "resumo": dict(linhas)}
+    except sqlite3.Error as e:
+        return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
+    finally:
+        conn.close()
+
+
+# Colunas, origem, filtro e chave de paginação de cada tipo de relatório.
+_RELATORIOS = {
+    # Por título: exemplares emprestados e a próxima data de devolução.
+    'emprestados': (
+        '''titulo, exemplares_total - exemplares_disponiveis AS exemplares_emprestados,
+        (SELECT MIN(data_devolucao) FROM emprestimos_abertos WHERE emprestimos_abertos.livro_id = livros.id)
+            AS proxima_devolucao''',
+        'livros',
+        'exemplares_disponiveis < exemplares_total',
+        'livros.id',
+    ),
+    # Por título: exemplares disponíveis e total.
+    'disponiveis': (
+        'titulo, exemplares_disponiveis, exemplares_total',
+        'livros',
+        "status = 'Disponível'",
+        'livros.id',
+    ),
+    'atraso': (
+        'livros.titulo, emprestimos_abertos.data_devolucao',
+        'emprestimos_abertos JOIN livros ON emprestimos_abertos.livro_id = livros.id',
+        'emprestimos_abertos.data_devolucao < :hoje',
+        'emprestimos_abertos.emprestimo_id',
+    ),
+}
+
+TAMANHO_PAGINA_PADRAO = 100
+
+
+def _consulta_relatorio(tipo, paginado=False):
+    colunas, origem, filtro, chave = _RELATORIOS[tipo]
+    if paginado:
+        # CROSS JOIN fixa a tabela da chave como laço externo, percorrendo-a
+        # pela chave primária a partir do cursor em vez de ordenar o resultado.
+        origem = origem.replace(' JOIN ', ' CROSS JOIN ')
+        return f'''
+            SELECT {chave}, {colunas}
+            FROM {origem}
+            WHERE {filtro} AND {chave} > :apos
+            ORDER BY {chave}
+            LIMIT :limite
+            '''
+    return f'''
+            SELECT {colunas}
+            FROM {origem}
+            WHERE {filtro}
+            '''
+
+
+def _parametros_relatorio(tipo, **extras):
+    parametros = dict(extras)
+    if tipo == 'atraso':
+        parametros['hoje'] = datetime.now().date()
+    return parametros
+
+
+def _codificar_cursor(tipo, apos):
+    return base64.urlsafe_b64encode(json.dumps({"tipo": tipo, "apos": apos}).encode()).decode()
+
+
+def _decodificar_cursor(token, tipo):
+    # O token pode vir de um corpo JSON com qualquer tipo.
+    if not isinstance(token, str):
+        return None
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(token.encode()))
+        if dados["tipo"] == tipo:
+            return dados["apos"]
+    except (ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+@instrumentado
 def gerar_relatorio(tipo):
-    if tipo not in ['emprestados', 'disponiveis', 'atraso']:
+    if tipo not in _RELATORIOS:
         return {"success": False, "message": "Tipo de relatório inválido"}
     
-    conn = connect_db()
+    conn = connect_db(somente_leitura=True)
     cursor = conn.cursor()
 
     try:
-        if tipo == 'emprestados':
-            cursor.execute('''
-            SELECT livros.titulo, emprestimos.data_devolucao
-            FROM emprestimos
-            JOIN livros ON emprestimos.livro_id = livros.id
-            WHERE livros.status = 'Emprestado'
-            ''')
-        elif tipo == 'disponiveis':
-            cursor.execute('''
-            SELECT titulo FROM livros WHERE status = 'Disponível'
-            ''')
-        elif tipo == 'atraso':
-            cursor.execute('''
-            SELECT livros.titulo, emprestimos.data_devolucao
-            FROM emprestimos
-            JOIN livros ON emprestimos.livro_id = livros.id
-            WHERE emprestimos.data_devolucao < ?
-            AND livros.status = 'Emprestado'
-            ''', (datetime.now().date(),))
+        cursor.execute(_consulta_relatorio(tipo), _parametros_relatorio(tipo))
 
         relatorio = cursor.fetchall()
         if relatorio:
@@ -337,4 +2052,140 @@ def gerar_relatorio(tipo):
     except sqlite3.Error as e:
         return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
     finally:
-        conn.close()
\ No newline at end of file
+        conn.close()
+
+
+def _linhas_relatorio(tipo, tamanho_lote):
+    conn = connect_db(somente_leitura=True)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(_consulta_relatorio(tipo), _parametros_relatorio(tipo))
+        while True:
+            lote = cursor.fetchmany(tamanho_lote)
+            if not lote:
+                break
+            yield from lote
+    finally:
+        cursor.close()
+        conn.close()
+
+
+@instrumentado
+def gerar_relatorio_stream(tipo, tamanho_lote=TAMANHO_LOTE_PADRAO):
+    # As linhas são lidas do cursor em lotes à medida que "data" é consumido.
+    if tipo not in _RELATORIOS:
+        return {"success": False, "message": "Tipo de relatório inválido"}
+    if not isinstance(tamanho_lote, int) or tamanho_lote < 1:
+        return {"success": False, "message": "Tamanho de lote inválido"}
+
+    return {"success": True, "data": _linhas_relatorio(tipo, tamanho_lote)}
+
+
+@instrumentado
+def gerar_relatorio_paginado(tipo, tamanho_pagina=TAMANHO_PAGINA_PADRAO, cursor=None):
+    if tipo not in _RELATORIOS:
+        return {"success": False, "message": "Tipo de relatório inválido"}
+    if not isinstance(tamanho_pagina, int) or tamanho_pagina < 1:
+        return {"success": False, "message": "Tamanho de página inválido"}
+
+    apos = 0
+    if cursor is not None:
+        apos = _decodificar_cursor(cursor, tipo)
+        if not isinstance(apos, int):
+            return {"success": False, "message": "Cursor inválido"}
+
+    conn = connect_db(somente_leitura=True)
+    try:
+        linhas = conn.execute(
+            _consulta_relatorio(tipo, paginado=True),
+            _parametros_relatorio(tipo, apos=apos, limite=tamanho_pagina + 1),
+        ).fetchall()
+    except sqlite3.Error as e:
+        return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
+    finally:
+        conn.close()
+
+    pagina = linhas[:tamanho_pagina]
+    proximo = None
+    if len(linhas) > tamanho_pagina:
+        proximo = _codificar_cursor(tipo, pagina[-1][0])
+    return {"success": True, "data": [linha[1:] for linha in pagina], "proximo_cursor": proximo}
+
+
+TAMANHO_BUSCA_PADRAO = 20
+
+# Pesos do bm25 por coluna de livros_busca: titulo, autor, categoria.
+_PESOS_BUSCA = (10.0, 5.0, 1.0)
+
+
+def _expressao_busca(termo):
+    # Cada palavra vira um termo entre aspas, então operadores e sintaxe do
+    # FTS5 digitados pelo usuário são tratados como texto comum.
+    palavras = re.findall(r'\w+', termo or '')
+    return ' '.join(f'"{palavra}"' for palavra in palavras)
+
+
+@instrumentado
+def buscar_livros(termo, categoria=None, apenas_disponiveis=False, limite=TAMANHO_BUSCA_PADRAO, cursor=None):
+    # Busca por titulo e autor (e categoria) sem diferenciar acentos, ordenada
+    # pela relevância do bm25. A paginação continua após o par (relevância, id)
+    # do último livro da página anterior.
+    expressao = _expressao_busca(termo)
+    if not expressao:
+        return {"success": False, "message": "Termo de busca inválido"}
+    if not isinstance(limite, int) or limite < 1:
+        return {"success": False, "message": "Limite inválido"}
+
+    apos = None
+    if cursor is not None:
+        apos = _decodificar_cursor(cursor, 'busca')
+        if not (isinstance(apos, list) and len(apos) == 2
+                and isinstance(apos[0], (int, float)) and isinstance(apos[1], int)):
+            return {"success": False, "message": "Cursor inválido"}
+
+    filtros = ['livros_busca MATCH :expressao']
+    parametros = {"expressao": expressao, "limite": limite + 1}
+    if categoria is not None:
+        filtros.append('livros.categoria = :categoria')
+        parametros["categoria"] = categoria
+    if apenas_disponiveis:
+        filtros.append("livros.status = 'Disponível'")
+    continuacao = ''
+    if apos is not None:
+        continuacao = 'WHERE relevancia > :relevancia OR (relevancia = :relevancia AND id > :id)'
+        parametros["relevancia"], parametros["id"] = apos
+
+    conn = connect_db(somente_leitura=True)
+    try:
+        linhas = conn.execute(f'''
+            SELECT * FROM (
+                SELECT livros.id, livros.titulo, livros.autor, livros.categoria, livros.status,
+                       bm25(livros_busca, {', '.join(map(str, _PESOS_BUSCA))}) AS relevancia
+                FROM livros_busca
+                JOIN livros ON livros.id = livros_busca.rowid
+                WHERE {' AND '.join(filtros)}
+            )
+            {continuacao}
+            ORDER BY relevancia, id
+            LIMIT :limite
+        ''', parametros).fetchall()
+    except sqlite3.Error as e:
+        return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
+    finally:
+        conn.close()
+
+    pagina = linhas[:limite]
+    proximo = None
+    if len(linhas) > limite:
+        proximo = _codificar_cursor('busca', [pagina[-1][5], pagina[-1][0]])
+    return {"success": True, "data": [linha[:5] for linha in pagina], "proximo_cursor": proximo}
+
+
+TAMANHO_SUGESTOES_PADRAO = 10
+
+
+@instrumentado
+def autocompletar(prefixo, limite=TAMANHO_SUGESTOES_PADRAO):
+    # Títulos e autores que começam com o prefixo, os mais emprestados
+    # primeiro. Depois da primeira chamada não há acesso ao banco.
+    return {"success": True, "sugestoes": _indice_sugestoes().sugerir(prefixo, limite)}
@@ -0,0 +1,148 @@
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import app
+
+
+# Versões awaitable das operações de app.py. Cada chamada roda num executor
+# dedicado, com conexões próprias (uma por thread do executor, via connect_db),
+# e devolve exatamente o mesmo dicionário/mensagem da versão síncrona.
+
+OPERACOES = (
+    'cadastrar_usuario',
+    'atualizar_usuario',
+    'cadastrar_usuarios_em_lote',
+    'cadastrar_livro',
+    'cadastrar_livros_em_lote',
+    'adicionar_exemplares',
+    'remover_livro',
+    'emprestar_livro',
+    'devolver_livro',
+    'emprestar_livros',
+    'devolver_livros',
+    'renovar_emprestimo',
+    'consultar_historico',
+    'consultar_disponibilidade',
+    'consultar_atrasos',
+    'consultar_vencimentos',
+    'consultar_resumo',
+    'buscar_livros',
+    'autocompletar',
+    'gerar_relatorio',
+    'gerar_relatorio_paginado',
+)
+
+MAX_WORKERS_PADRAO = 4
+MAX_PENDENTES_PADRAO = 64
+
+
+class BibliotecaAsync:
+
+    def __init__(self, max_workers=MAX_WORKERS_PADRAO, max_pendentes=MAX_PENDENTES_PADRAO):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='biblioteca')
+        self._max_workers = max_workers
+        self._max_pendentes = max_pendentes
+        self._limites = weakref.WeakKeyDictionary()
+
+    def _limite(self, loop):
+        # Um semáforo por event loop: asyncio.Semaphore fica preso ao loop em que é usado.
+        limite = self._limites.get(loop)
+        if limite is None:
+            limite = self._limites[loop] = asyncio.Semaphore(self._max_pendentes)
+        return limite
+
+    async def _executar(self, funcao, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        limite = self._limite(loop)
+        await limite.acquire()
+
+        futuro = self._executor.submit(functools.partial(funcao, *args, **kwargs))
+
+        def liberar(_):
+            # A vaga só é devolvida quando a operação termina de fato na thread,
+            # mesmo que quem a aguardava já tenha sido cancelado.
+            try:
+                loop.call_soon_threadsafe(limite.release)
+            except RuntimeError:
+                pass
+
+        futuro.add_done_callback(liberar)
+
+        # Se a tarefa for cancelada antes de a operação começar, ela é retirada
+        # da fila; se já estiver rodando, termina na thread e confirma ou desfaz
+        # sua transação inteira, nunca deixando um empréstimo pela metade.
+        return await asyncio.wrap_future(futuro)
+
+    async def gerar_relatorio_stream(self, tipo, tamanho_pagina=app.TAMANHO_PAGINA_PADRAO):
+        # Percorre o relatório por páginas, sem manter um cursor aberto entre threads.
+        cursor = None
+        while True:
+            pagina = await self.gerar_relatorio_paginado(tipo, tamanho_pagina=tamanho_pagina, cursor=cursor)
+            if not pagina["success"]:
+                raise ValueError(pagina["message"])
+            for linha in pagina["data"]:
+                yield linha
+            cursor = pagina["proximo_cursor"]
+            if cursor is None:
+                break
+
+    async def fechar(self):
+        # Fecha só as conexões das threads deste executor, não as do resto do
+        # processo: uma tarefa por thread, todas presas numa barreira até
+        # estarem rodando juntas, para que nenhuma thread pegue duas.
+        barreira = threading.Barrier(self._max_workers)
+
+        def fechar_conexoes_da_thread():
+            barreira.wait()
+            app.fechar_conexoes_da_thread()
+
+        for _ in range(self._max_workers):
+            self._executor.submit(fechar_conexoes_da_thread)
+        await asyncio.get_running_loop().run_in_executor(None, functools.partial(self._executor.shutdown, wait=True))
+
+
+def _operacao(nome):
+    async def operacao(self, *args, **kwargs):
+        # getattr na chamada, para respeitar substituições feitas em app.
+        return await self._executar(getattr(app, nome), *args, **kwargs)
+
+    operacao.__name__ = operacao.__qualname__ = nome
+    return operacao
+
+
+for _nome in OPERACOES:
+    setattr(BibliotecaAsync, _nome, _operacao(_nome))
+
+
+_padrao = None
+
+
+def configurar(max_workers=MAX_WORKERS_PADRAO, max_pendentes=MAX_PENDENTES_PADRAO):
+    global _padrao
+    _padrao = BibliotecaAsync(max_workers=max_workers, max_pendentes=max_pendentes)
+    return _padrao
+
+
+def biblioteca():
+    if _padrao is None:
+        configurar()
+    return _padrao
+
+
+def _operacao_padrao(nome):
+    async def operacao(*args, **kwargs):
+        return await getattr(biblioteca(), nome)(*args, **kwargs)
+
+    operacao.__name__ = operacao.__qualname__ = nome
+    return operacao
+
+
+for _nome in OPERACOES:
+    globals()[_nome] = _operacao_padrao(_nome)
+
+
+def gerar_relatorio_stream(tipo, tamanho_pagina=app.TAMANHO_PAGINA_PADRAO):
+    return biblioteca().gerar_relatorio_stream(tipo, tamanho_pagina=tamanho_pagina)
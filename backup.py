@@ -0,0 +1,206 @@
+import argparse
+import glob
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import app
+
+
+# Backup com o serviço no ar, pela API de backup do SQLite: as páginas são
+# copiadas em passos de PAGINAS_POR_PASSO, com uma pausa entre eles para que
+# empréstimos e devoluções continuem. A cópia é verificada com
+# PRAGMA integrity_check antes de ganhar o nome definitivo, e só os últimos
+# "reter" backups são mantidos.
+#
+# O arquivo de empréstimos antigos (app.caminho_arquivo()), quando existe, é
+# copiado junto, no mesmo snapshot, para <backup>-arquivo.db; para restaurar,
+# os dois arquivos voltam juntos.
+#
+#   backup.fazer_backup(reter=7)
+#   python backup.py --diretorio /var/backups/biblioteca --intervalo 86400
+
+PAGINAS_POR_PASSO = 1024
+PAUSA_PASSO_SEGUNDOS = 0.005
+RETER_PADRAO = 7
+SUFIXO_ARQUIVO = '-arquivo.db'
+
+
+def diretorio_padrao():
+    return os.path.join(os.path.dirname(os.path.abspath(app._config_db["caminho"])), 'backups')
+
+
+def _prefixo():
+    return os.path.splitext(os.path.basename(app._config_db["caminho"]))[0] + '-'
+
+
+def _backups(diretorio):
+    # O carimbo de data no nome deixa a ordem alfabética igual à cronológica.
+    return sorted(
+        caminho
+        for caminho in glob.glob(os.path.join(glob.escape(diretorio), glob.escape(_prefixo()) + '*.db'))
+        if not caminho.endswith(SUFIXO_ARQUIVO)
+    )
+
+
+def _copia_do_arquivo(caminho):
+    return caminho[:-len('.db')] + SUFIXO_ARQUIVO
+
+
+def _aplicar_retencao(diretorio, reter):
+    removidos = []
+    for caminho in _backups(diretorio)[:-reter]:
+        os.remove(caminho)
+        removidos.append(caminho)
+        if os.path.exists(_copia_do_arquivo(caminho)):
+            os.remove(_copia_do_arquivo(caminho))
+            removidos.append(_copia_do_arquivo(caminho))
+    return removidos
+
+
+def _verificar(destino):
+    problemas = [linha[0] for linha in destino.execute('PRAGMA integrity_check')]
+    return None if problemas == ['ok'] else '; '.join(problemas)
+
+
+def _copiar(destino, destino_arquivo, paginas, pausa_segundos, progresso):
+    origem = app._abrir_conexao(somente_leitura=True)
+    try:
+        com_arquivo = destino_arquivo is not None and app._anexar_arquivo(origem)
+        # Se outra conexão escreve no banco durante a cópia, o passo seguinte
+        # recomeça do zero, e com o balcão ativo um banco grande nunca
+        # terminaria. Em WAL, uma transação de leitura aberta fixa o snapshot
+        # e a cópia segue sem bloquear as escritas (o checkpoint fica
+        # parado até o fim e o WAL cresce nesse meio tempo). O principal é
+        # lido antes do arquivo: um lote arquivado entre as duas leituras
+        # fica nos dois, como entre as etapas do próprio arquivamento, e
+        # nunca em nenhum.
+        if origem.execute('PRAGMA journal_mode').fetchone()[0] == 'wal':
+            origem.execute('BEGIN')
+            origem.execute('SELECT 1 FROM main.sqlite_master LIMIT 1').fetchall()
+            if com_arquivo:
+                origem.execute('SELECT 1 FROM arquivo.sqlite_master LIMIT 1').fetchall()
+
+        def passo(status, restantes, total):
+            if progresso is not None:
+                progresso(total - restantes, total)
+            if pausa_segundos:
+                time.sleep(pausa_segundos)
+
+        origem.backup(destino, pages=paginas, progress=passo)
+        if com_arquivo:
+            origem.backup(destino_arquivo, pages=paginas, progress=passo, name='arquivo')
+        return destino.execute('PRAGMA page_count').fetchone()[0], com_arquivo
+    finally:
+        origem.fechar()
+
+
+def fazer_backup(diretorio=None, reter=RETER_PADRAO, paginas=PAGINAS_POR_PASSO,
+                 pausa_segundos=PAUSA_PASSO_SEGUNDOS, verificar=True, progresso=None):
+    # progresso(paginas_copiadas, total_paginas) é chamado a cada passo, do
+    # banco principal e depois do arquivo.
+    if reter is None or reter < 1:
+        return {"success": False, "message": "Número de backups a reter inválido"}
+    if paginas is None or paginas < 1:
+        return {"success": False, "message": "Número de páginas por passo inválido"}
+
+    diretorio = diretorio or diretorio_padrao()
+    temporarios = []
+    try:
+        os.makedirs(diretorio, exist_ok=True)
+        for _ in range(2 if os.path.exists(app.caminho_arquivo()) else 1):
+            descritor, temporario = tempfile.mkstemp(prefix='.backup-', suffix='.tmp', dir=diretorio)
+            os.close(descritor)
+            temporarios.append(temporario)
+    except OSError as e:
+        for temporario in temporarios:
+            os.remove(temporario)
+        return {"success": False, "message": f"Erro ao gravar arquivo: {str(e)}"}
+
+    destinos = [sqlite3.connect(temporario) for temporario in temporarios]
+    try:
+        destino_arquivo = destinos[1] if len(destinos) > 1 else None
+        total_paginas, com_arquivo = _copiar(destinos[0], destino_arquivo, paginas, pausa_segundos, progresso)
+        if destino_arquivo is not None and not com_arquivo:
+            destinos.pop().close()
+        if verificar:
+            for destino in destinos:
+                problemas = _verificar(destino)
+                if problemas:
+                    return {"success": False, "message": f"Backup corrompido: {problemas}"}
+        for destino in destinos:
+            destino.close()
+        arquivo = os.path.join(diretorio, f"{_prefixo()}{datetime.now():%Y%m%d-%H%M%S-%f}.db")
+        if com_arquivo:
+            os.replace(temporarios[1], _copia_do_arquivo(arquivo))
+        os.replace(temporarios[0], arquivo)
+        removidos = _aplicar_retencao(diretorio, reter)
+        return {
+            "success": True, "arquivo": arquivo, "paginas": total_paginas,
+            "historico_arquivado": _copia_do_arquivo(arquivo) if com_arquivo else None,
+            "removidos": removidos,
+        }
+    except sqlite3.Error as e:
+        return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
+    except OSError as e:
+        return {"success": False, "message": f"Erro ao gravar arquivo: {str(e)}"}
+    finally:
+        for destino in destinos:
+            destino.close()
+        for temporario in temporarios:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+
+def agendar_backups(intervalo_segundos, parar=None, ao_concluir=None, **opcoes):
+    # Faz um backup agora e depois a cada intervalo_segundos, até parar ser
+    # sinalizado. ao_concluir recebe o resultado de cada execução.
+    parar = parar or threading.Event()
+    while True:
+        resultado = fazer_backup(**opcoes)
+        if ao_concluir is not None:
+            ao_concluir(resultado)
+        if parar.wait(intervalo_segundos):
+            return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Backup do banco da biblioteca; o arquivo de empréstimos antigos, se existir, '
+                    'é copiado junto para <backup>' + SUFIXO_ARQUIVO + '.')
+    parser.add_argument('--diretorio')
+    parser.add_argument('--reter', type=int, default=RETER_PADRAO)
+    parser.add_argument('--paginas', type=int, default=PAGINAS_POR_PASSO)
+    parser.add_argument('--pausa', type=float, default=PAUSA_PASSO_SEGUNDOS)
+    parser.add_argument('--sem-verificacao', action='store_true')
+    parser.add_argument('--intervalo', type=float, help='repete a cada INTERVALO segundos')
+    parser.add_argument('--banco')
+    args = parser.parse_args(argv)
+
+    if args.banco:
+        app.configurar_db(caminho=args.banco)
+    opcoes = {
+        "diretorio": args.diretorio, "reter": args.reter, "paginas": args.paginas,
+        "pausa_segundos": args.pausa, "verificar": not args.sem_verificacao,
+    }
+
+    def relatar(resultado):
+        if resultado["success"]:
+            print(f"{resultado['arquivo']}: {resultado['paginas']} páginas", flush=True)
+        else:
+            print(resultado["message"], flush=True)
+
+    if args.intervalo:
+        agendar_backups(args.intervalo, ao_concluir=relatar, **opcoes)
+    else:
+        resultado = fazer_backup(**opcoes)
+        if not resultado["success"]:
+            raise SystemExit(resultado["message"])
+        relatar(resultado)
+
+
+if __name__ == '__main__':
+    main()
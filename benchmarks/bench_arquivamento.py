@@ -0,0 +1,107 @@
+# Operações do balcão e consultas antes e depois de arquivar o histórico
+# antigo, e latência das escritas enquanto o arquivamento roda em lotes.
+#
+#   python -m benchmarks.bench_arquivamento --emprestimos 10000000 --meses 6
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+import app
+from benchmarks.bench_operacoes import percentil
+from benchmarks.gerar_dados import gerar_base
+
+
+def _medir(funcao, argumentos):
+    inicio = time.perf_counter()
+    for args in argumentos:
+        funcao(*args)
+    return (time.perf_counter() - inicio) / len(argumentos) * 1000
+
+
+def _ciclo(livro_id):
+    # Usuário 1 empresta e devolve um livro disponível.
+    app.emprestar_livro(1, livro_id)
+    app.devolver_livro(1, livro_id)
+
+
+def _medicoes(rng, usuarios, livros, abertos, repeticoes):
+    disponiveis = [(rng.randint(abertos + 1, livros),) for _ in range(repeticoes)]
+    historicos = [(rng.randint(1, usuarios),) for _ in range(repeticoes)]
+    return {
+        "emprestar+devolver": _medir(_ciclo, disponiveis),
+        "historico": _medir(app.consultar_historico, historicos),
+        "relatorio atraso": _medir(app.gerar_relatorio, [('atraso',)] * 5),
+    }
+
+
+def _tamanhos(caminho):
+    conn = app.connect_db(somente_leitura=True)
+    try:
+        linhas = conn.execute('SELECT COUNT(*) FROM emprestimos').fetchone()[0]
+    finally:
+        conn.close()
+    arquivo = app.caminho_arquivo()
+    return linhas, os.path.getsize(caminho), os.path.getsize(arquivo) if os.path.exists(arquivo) else 0
+
+
+def _escritor(livros, abertos, parar, latencias):
+    rng = random.Random(7)
+    while not parar.is_set():
+        livro_id = rng.randint(abertos + 1, livros)
+        inicio = time.perf_counter()
+        _ciclo(livro_id)
+        latencias.append(time.perf_counter() - inicio)
+    app.fechar_conexoes()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--usuarios', type=int, default=100000)
+    parser.add_argument('--livros', type=int, default=500000)
+    parser.add_argument('--emprestimos', type=int, default=10000000)
+    parser.add_argument('--meses', type=int, default=6)
+    parser.add_argument('--repeticoes', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'arquivamento.db')
+        inicio = time.perf_counter()
+        gerar_base(caminho, usuarios=args.usuarios, livros=args.livros, emprestimos=args.emprestimos)
+        abertos = int(args.livros * 0.2)
+        print(f"base com {args.emprestimos} empréstimos gerada em {time.perf_counter() - inicio:.1f}s\n")
+
+        antes = _medicoes(random.Random(1), args.usuarios, args.livros, abertos, args.repeticoes)
+        linhas_antes, tamanho_antes, _ = _tamanhos(caminho)
+
+        parar = threading.Event()
+        latencias = []
+        escritor = threading.Thread(target=_escritor, args=(args.livros, abertos, parar, latencias))
+        escritor.start()
+        inicio = time.perf_counter()
+        resultado = app.arquivar_emprestimos(meses=args.meses)
+        duracao = time.perf_counter() - inicio
+        parar.set()
+        escritor.join()
+        latencias.sort()
+
+        depois = _medicoes(random.Random(1), args.usuarios, args.livros, abertos, args.repeticoes)
+        linhas_depois, tamanho_depois, tamanho_arquivo = _tamanhos(caminho)
+        app.fechar_conexoes()
+
+        print(f"arquivados {resultado['arquivados']} em {duracao:.1f}s; durante o arquivamento, "
+              f"emprestar+devolver p50 {percentil(latencias, 0.5) * 1000:.2f} ms, "
+              f"p99 {percentil(latencias, 0.99) * 1000:.2f} ms, máx {latencias[-1] * 1000:.1f} ms "
+              f"({len(latencias)} ciclos)")
+        print(f"emprestimos: {linhas_antes} -> {linhas_depois} linhas; banco principal "
+              f"{tamanho_antes / 2**20:.0f} MB, arquivo {tamanho_arquivo / 2**20:.0f} MB "
+              f"(o principal só encolhe com VACUUM)\n")
+        print(f"{'operação':>20s} {'antes (ms)':>11s} {'depois (ms)':>12s}")
+        for operacao in antes:
+            print(f"{operacao:>20s} {antes[operacao]:11.3f} {depois[operacao]:12.3f}")
+
+
+if __name__ == '__main__':
+    main()
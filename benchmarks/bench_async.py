@@ -0,0 +1,85 @@
+# Mede o atraso do event loop enquanto 1000 consultar_disponibilidade rodam
+# concorrentemente: chamando app.py direto no loop e via app_async.
+#
+#   python -m benchmarks.bench_async --concorrencia 1000
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import app
+from app_async import BibliotecaAsync
+
+INTERVALO = 0.001
+
+
+async def _monitorar_loop(atrasos, parar):
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(INTERVALO)
+        atrasos.append(time.perf_counter() - inicio - INTERVALO)
+
+
+async def _bloqueante(livro_id):
+    return app.consultar_disponibilidade(livro_id)
+
+
+async def _medir(operacao, concorrencia, livros):
+    atrasos = []
+    parar = asyncio.Event()
+    monitor = asyncio.create_task(_monitorar_loop(atrasos, parar))
+    await asyncio.sleep(INTERVALO * 5)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(operacao(i % livros + 1) for i in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+
+    parar.set()
+    await monitor
+    atrasos.sort()
+    return {
+        "ops_s": concorrencia / duracao,
+        "atraso_p50_ms": statistics.median(atrasos) * 1000,
+        "atraso_max_ms": atrasos[-1] * 1000,
+    }
+
+
+async def _executar(args):
+    biblioteca = BibliotecaAsync(max_workers=args.workers, max_pendentes=args.pendentes)
+    try:
+        bloqueante = await _medir(_bloqueante, args.concorrencia, args.livros)
+        assincrono = await _medir(biblioteca.consultar_disponibilidade, args.concorrencia, args.livros)
+    finally:
+        await biblioteca.fechar()
+    return bloqueante, assincrono
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concorrencia", type=int, default=1000)
+    parser.add_argument("--livros", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--pendentes", type=int, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        app.configurar_db(caminho=os.path.join(diretorio, "bench.db"))
+        app.create_tables()
+        app.cadastrar_livros_em_lote(
+            (f"Livro {i}", "Autor", f"978{i:010d}", "Geral") for i in range(args.livros)
+        )
+        bloqueante, assincrono = asyncio.run(_executar(args))
+        app.fechar_conexoes()
+
+    for nome, resultado in (("bloqueante", bloqueante), ("app_async", assincrono)):
+        print(
+            f"{nome:11s} {resultado['ops_s']:10.0f} ops/s  "
+            f"atraso do loop p50 {resultado['atraso_p50_ms']:7.2f} ms  "
+            f"máx {resultado['atraso_max_ms']:7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
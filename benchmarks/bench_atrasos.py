@@ -0,0 +1,60 @@
+# Latência do relatório 'atraso' conforme o histórico de empréstimos encerrados
+# cresce, com o mesmo número de empréstimos em aberto. Compara a consulta antiga
+# (junção de todo o histórico) com emprestimos_abertos.
+#
+#   python -m benchmarks.bench_atrasos --historicos 10000 100000 1000000 3000000
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import date
+
+import app
+from benchmarks.gerar_dados import gerar_base
+
+CONSULTA_ANTIGA = '''
+    SELECT livros.titulo, emprestimos.data_devolucao
+    FROM emprestimos
+    JOIN livros ON emprestimos.livro_id = livros.id
+    WHERE emprestimos.data_devolucao < ?
+    AND livros.status = 'Emprestado'
+'''
+
+
+def _medir(funcao, repeticoes):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--historicos', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--livros', type=int, default=20000)
+    parser.add_argument('--usuarios', type=int, default=5000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'histórico':>12s} {'antiga (ms)':>12s} {'atual (ms)':>12s} {'atrasados':>10s}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for historico in args.historicos:
+            caminho = os.path.join(diretorio, f'atrasos-{historico}.db')
+            gerar_base(caminho, usuarios=args.usuarios, livros=args.livros, emprestimos=historico)
+            hoje = date.today()
+
+            conn = sqlite3.connect(caminho)
+            antiga = _medir(lambda: conn.execute(CONSULTA_ANTIGA, (hoje,)).fetchall(), args.repeticoes)
+            conn.close()
+            atual = _medir(lambda: app.gerar_relatorio('atraso'), args.repeticoes)
+            atrasados = len(app.consultar_atrasos()["data"])
+            app.fechar_conexoes()
+
+            print(f"{historico:12d} {antiga:12.2f} {atual:12.2f} {atrasados:10d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+# Latência por tecla de autocompletar e memória do índice de sugestões.
+# Cada título sorteado é "digitado" letra a letra; a primeira tecla de cada
+# prefixo curto paga o cálculo que depois fica memorizado.
+#
+#   python -m benchmarks.bench_autocompletar --livros 1000000
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+import app
+from benchmarks.bench_operacoes import percentil
+from benchmarks.gerar_dados import gerar_base
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--livros', type=int, default=1000000)
+    parser.add_argument('--emprestimos', type=int, default=2000000)
+    parser.add_argument('--digitacoes', type=int, default=2000)
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'autocompletar.db')
+        gerar_base(caminho, usuarios=10000, livros=args.livros, emprestimos=args.emprestimos)
+
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        app.autocompletar('a')
+        construcao = time.perf_counter() - inicio
+        memoria, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        indice = app._indice_sugestoes()
+        print(f"índice: {len(indice)} textos, construído em {construcao:.1f}s, "
+              f"{memoria / 2**20:.1f} MB (pico na construção {pico / 2**20:.1f} MB)")
+
+        conn = app.connect_db()
+        textos = [linha[0] for linha in conn.execute('SELECT titulo FROM livros LIMIT 50000')]
+        conn.close()
+        rng = random.Random(args.semente)
+        latencias = []
+        for _ in range(args.digitacoes):
+            texto = rng.choice(textos)
+            for tamanho in range(1, min(len(texto), 12) + 1):
+                inicio = time.perf_counter()
+                app.autocompletar(texto[:tamanho])
+                latencias.append(time.perf_counter() - inicio)
+
+        latencias.sort()
+        print(f"{len(latencias)} teclas: p50 {percentil(latencias, 0.5) * 1000:.3f} ms, "
+              f"p99 {percentil(latencias, 0.99) * 1000:.3f} ms, máx {latencias[-1] * 1000:.3f} ms")
+        app.fechar_conexoes()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# Latência de emprestar+devolver sem backup e durante um backup online, em
+# passos de N páginas com pausa e de uma vez só (pages=-1).
+#
+#   python -m benchmarks.bench_backup --emprestimos 30000000 --paginas 256 1024 -1
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+import app
+import backup
+from benchmarks.bench_operacoes import percentil
+from benchmarks.gerar_dados import gerar_base
+
+
+def _ciclo(livro_id):
+    app.emprestar_livro(1, livro_id)
+    app.devolver_livro(1, livro_id)
+
+
+def _escritor(livros, abertos, parar, latencias):
+    rng = random.Random(7)
+    while not parar.is_set():
+        livro_id = rng.randint(abertos + 1, livros)
+        inicio = time.perf_counter()
+        _ciclo(livro_id)
+        latencias.append(time.perf_counter() - inicio)
+    app.fechar_conexoes()
+
+
+def _durante(livros, abertos, tarefa):
+    parar = threading.Event()
+    latencias = []
+    escritor = threading.Thread(target=_escritor, args=(livros, abertos, parar, latencias))
+    escritor.start()
+    inicio = time.perf_counter()
+    tarefa()
+    duracao = time.perf_counter() - inicio
+    parar.set()
+    escritor.join()
+    latencias.sort()
+    return duracao, latencias
+
+
+def _linha(nome, duracao, latencias):
+    print(f"{nome:>22s} {duracao:9.1f} {len(latencias):8d} {percentil(latencias, 0.5) * 1000:9.2f} "
+          f"{percentil(latencias, 0.99) * 1000:9.2f} {latencias[-1] * 1000:9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--usuarios', type=int, default=100000)
+    parser.add_argument('--livros', type=int, default=500000)
+    parser.add_argument('--emprestimos', type=int, default=30000000)
+    parser.add_argument('--paginas', type=int, nargs='+', default=[256, 1024, -1])
+    parser.add_argument('--pausa', type=float, default=backup.PAUSA_PASSO_SEGUNDOS)
+    parser.add_argument('--referencia-segundos', type=float, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'backup.db')
+        inicio = time.perf_counter()
+        gerar_base(caminho, usuarios=args.usuarios, livros=args.livros, emprestimos=args.emprestimos)
+        abertos = int(args.livros * 0.2)
+        print(f"base com {args.emprestimos} empréstimos ({os.path.getsize(caminho) / 2**30:.2f} GB) "
+              f"gerada em {time.perf_counter() - inicio:.1f}s\n")
+
+        print(f"{'execução':>22s} {'tempo (s)':>9s} {'ciclos':>8s} {'p50 (ms)':>9s} {'p99 (ms)':>9s} {'máx (ms)':>9s}")
+        _linha("sem backup", *_durante(args.livros, abertos, lambda: time.sleep(args.referencia_segundos)))
+        destino = os.path.join(diretorio, 'backups')
+        for paginas in args.paginas:
+            pausa = args.pausa if paginas > 0 else 0
+            resultados = []
+            duracao, latencias = _durante(args.livros, abertos, lambda: resultados.append(
+                backup.fazer_backup(destino, reter=1, paginas=paginas if paginas > 0 else 2**31 - 1,
+                                    pausa_segundos=pausa, verificar=False),
+            ))
+            if not resultados[0]["success"]:
+                raise SystemExit(resultados[0]["message"])
+            nome = f"{paginas} págs/passo" if paginas > 0 else "de uma vez"
+            _linha(nome, duracao, latencias)
+        app.fechar_conexoes()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+# Latência de buscar_livros num catálogo grande, comparada com a busca por
+# LIKE em titulo/autor. Para ordenar por relevância é preciso ver todos os
+# resultados, então o LIKE também lê todos (e percorre a tabela inteira).
+#
+#   python -m benchmarks.bench_busca --livros 1000000
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import app
+from benchmarks.gerar_dados import gerar_base
+
+TERMOS = ('memórias', 'sertao noite', 'estrela rio jardim', 'gabriela ribeiro', 'jardim sombra luz tempo')
+
+CONSULTA_LIKE = '''
+    SELECT id, titulo, autor, categoria, status FROM livros
+    WHERE titulo LIKE :padrao OR autor LIKE :padrao
+'''
+
+
+def _medir(funcao, repeticoes):
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor * 1000
+
+
+def _segunda_pagina(termo, limite):
+    cursor = app.buscar_livros(termo, limite=limite)["proximo_cursor"]
+    return lambda: app.buscar_livros(termo, limite=limite, cursor=cursor)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--livros', type=int, default=1000000)
+    parser.add_argument('--limite', type=int, default=20)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'busca.db')
+        inicio = time.perf_counter()
+        gerar_base(caminho, usuarios=1000, livros=args.livros, emprestimos=0, fracao_emprestados=0)
+        print(f"base com {args.livros} livros gerada em {time.perf_counter() - inicio:.1f}s\n")
+
+        conn = sqlite3.connect(caminho)
+        print(f"{'termo':>26s} {'like (ms)':>10s} {'fts (ms)':>10s} {'pág. 2 (ms)':>12s} {'resultados':>11s}")
+        for termo in TERMOS:
+            # LIKE só consegue procurar a primeira palavra, e com acentos exatos.
+            padrao = f"%{termo.split()[0]}%"
+            like = _medir(lambda: conn.execute(
+                CONSULTA_LIKE, {"padrao": padrao}).fetchall(), args.repeticoes)
+            fts = _medir(lambda: app.buscar_livros(termo, limite=args.limite), args.repeticoes)
+            pagina2 = _medir(_segunda_pagina(termo, args.limite), args.repeticoes)
+            total = conn.execute(
+                'SELECT COUNT(*) FROM livros_busca WHERE livros_busca MATCH ?', (app._expressao_busca(termo),),
+            ).fetchone()[0]
+            print(f"{termo:>26s} {like:10.2f} {fts:10.2f} {pagina2:12.2f} {total:11d}")
+        conn.close()
+        app.fechar_conexoes()
+
+
+if __name__ == '__main__':
+    main()
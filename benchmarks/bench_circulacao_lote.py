@@ -0,0 +1,51 @@
+# Tempo para registrar uma leva de empréstimos e a devolução da caixa de
+# devolução: uma chamada por livro contra emprestar_livros/devolver_livros.
+#
+#   python -m benchmarks.bench_circulacao_lote --livros 5000
+import argparse
+import os
+import tempfile
+import time
+
+import app
+from benchmarks.gerar_dados import gerar_base
+
+
+def _cronometrar(funcao):
+    inicio = time.perf_counter()
+    funcao()
+    return time.perf_counter() - inicio
+
+
+def _um_por_vez(livros):
+    for livro_id in livros:
+        app.emprestar_livro(1, livro_id)
+    for livro_id in livros:
+        app.devolver_livro(1, livro_id)
+
+
+def _em_lote(livros):
+    app.emprestar_livros(1, livros)
+    app.devolver_livros((None, livro_id) for livro_id in livros)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--livros', type=int, default=5000)
+    parser.add_argument('--synchronous', default='FULL')
+    args = parser.parse_args()
+
+    livros = list(range(1, args.livros + 1))
+    print(f"{'modo':>12s} {'tempo (s)':>10s} {'livros/s':>10s}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for nome, funcao in (('um por vez', _um_por_vez), ('em lote', _em_lote)):
+            caminho = os.path.join(diretorio, f'{nome.replace(" ", "_")}.db')
+            gerar_base(caminho, usuarios=10, livros=args.livros, emprestimos=0, fracao_emprestados=0)
+            app.configurar_db(synchronous=args.synchronous)
+            segundos = _cronometrar(lambda: funcao(livros))
+            app.fechar_conexoes()
+            print(f"{nome:>12s} {segundos:10.2f} {2 * args.livros / segundos:10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# Vazão de empréstimos e devoluções com vários processos escritores
+# disputando o mesmo acervo, e verificação de que nenhum livro foi emprestado
+# duas vezes: empréstimos confirmados menos devoluções confirmadas tem de ser
+# igual ao número de livros marcados como emprestados.
+#
+#   python -m benchmarks.bench_concorrencia --escritores 1 2 4 8 --segundos 5
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+
+import app
+from benchmarks.gerar_dados import gerar_base
+
+
+def _escritor(caminho, usuario_id, segundos, livros, semente):
+    app.configurar_db(caminho=caminho)
+    rng = random.Random(semente)
+    contagem = Counter()
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        livro_id = rng.randint(1, livros)
+        resultado = app.emprestar_livro(usuario_id, livro_id)
+        if resultado["success"]:
+            contagem["emprestimos"] += 1
+            if app.devolver_livro(usuario_id, livro_id)["success"]:
+                contagem["devolucoes"] += 1
+        elif resultado["message"].startswith("Erro de banco de dados"):
+            contagem["erros"] += 1
+        else:
+            contagem["indisponivel"] += 1
+    app.fechar_conexoes()
+    return contagem
+
+
+def _emprestados(caminho):
+    app.configurar_db(caminho=caminho)
+    conn = app.connect_db()
+    try:
+        return conn.execute("SELECT COUNT(*) FROM livros WHERE status = 'Emprestado'").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--escritores', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--livros', type=int, default=200)
+    parser.add_argument('--segundos', type=float, default=5)
+    args = parser.parse_args()
+
+    contexto = multiprocessing.get_context('spawn')
+    print(f"{'escritores':>10s} {'ops/s':>10s} {'empréstimos':>12s} {'indisponível':>13s} {'erros':>6s} {'consistente':>12s}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for escritores in args.escritores:
+            caminho = os.path.join(diretorio, f'concorrencia-{escritores}.db')
+            gerar_base(caminho, usuarios=escritores, livros=args.livros, emprestimos=0, fracao_emprestados=0)
+            antes = _emprestados(caminho)
+            app.fechar_conexoes()
+
+            with contexto.Pool(escritores) as pool:
+                resultados = pool.starmap(_escritor, [
+                    (caminho, i, args.segundos, args.livros, i) for i in range(1, escritores + 1)
+                ])
+            total = sum(resultados, Counter())
+            operacoes = total["emprestimos"] + total["devolucoes"] + total["indisponivel"] + total["erros"]
+            consistente = antes + total["emprestimos"] - total["devolucoes"] == _emprestados(caminho)
+            app.fechar_conexoes()
+
+            print(f"{escritores:10d} {operacoes / args.segundos:10.0f} {total['emprestimos']:12d} "
+                  f"{total['indisponivel']:13d} {total['erros']:6d} {'sim' if consistente else 'NÃO':>12s}")
+
+
+if __name__ == '__main__':
+    main()
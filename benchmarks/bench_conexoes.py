@@ -0,0 +1,53 @@
+# Compara operações por segundo com uma conexão nova por chamada (comportamento
+# antigo de connect_db) e com as conexões reutilizadas por thread.
+#
+#   python -m benchmarks.bench_conexoes --operacoes 20000
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from unittest.mock import patch
+
+import app
+
+
+def _conexao_por_chamada(somente_leitura=False):
+    # A conexão antiga era sempre de leitura e escrita.
+    return sqlite3.connect(app._config_db["caminho"])
+
+
+def _preparar(caminho):
+    app.configurar_db(caminho=caminho)
+    app.create_tables()
+    app.cadastrar_usuario("Leitor Benchmark", "12345678909", "leitor@example.com", "11900000000")
+    app.cadastrar_livro("Livro Benchmark", "Autor", "9780306406157", "Testes")
+
+
+def _medir(operacoes):
+    inicio = time.perf_counter()
+    for _ in range(operacoes):
+        app.consultar_disponibilidade(1)
+    return operacoes / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--operacoes", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        _preparar(os.path.join(diretorio, "bench.db"))
+
+        with patch("app.connect_db", _conexao_por_chamada):
+            antes = _medir(args.operacoes)
+        depois = _medir(args.operacoes)
+        app.fechar_conexoes()
+
+    print(f"conexão por chamada: {antes:10.0f} ops/s")
+    print(f"conexão reutilizada: {depois:10.0f} ops/s")
+    print(f"ganho:               {depois / antes:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
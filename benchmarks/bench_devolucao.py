@@ -0,0 +1,61 @@
+# Latência de renovar_emprestimo e de um ciclo devolver/emprestar conforme
+# cresce o histórico do mesmo usuário com o mesmo livro, o pior caso para a
+# busca antiga por (usuario_id, livro_id).
+#
+#   python -m benchmarks.bench_devolucao --historicos 10 1000 100000
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import app
+from benchmarks.gerar_dados import cpf_valido, isbn13_valido
+
+
+def _preparar(caminho, historico):
+    app.configurar_db(caminho=caminho)
+    app.create_tables()
+    app.cadastrar_usuario("Leitor Benchmark", cpf_valido(1), "leitor@example.com", "11900000000")
+    app.cadastrar_livro("Livro Benchmark", "Autor", isbn13_valido(1), "Testes")
+    conn = sqlite3.connect(caminho)
+    conn.executemany('''
+        INSERT INTO emprestimos (usuario_id, livro_id, data_emprestimo, data_devolucao, data_retorno)
+        VALUES (1, 1, '2020-01-01', '2020-01-15', '2020-01-10')
+    ''', ([] for _ in range(historico)))
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+    app.emprestar_livro(1, 1)
+
+
+def _medir(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def _ciclo():
+    app.devolver_livro(1, 1)
+    app.emprestar_livro(1, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--historicos', type=int, nargs='+', default=[10, 1000, 100000])
+    parser.add_argument('--repeticoes', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'histórico':>10s} {'renovar (ms)':>13s} {'devolver+emprestar (ms)':>24s}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for historico in args.historicos:
+            _preparar(os.path.join(diretorio, f'devolucao-{historico}.db'), historico)
+            renovar = _medir(lambda: app.renovar_emprestimo(1, 1), args.repeticoes)
+            ciclo = _medir(_ciclo, args.repeticoes)
+            app.fechar_conexoes()
+            print(f"{historico:10d} {renovar:13.3f} {ciclo:24.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# Títulos com milhares de exemplares: latência de consultar_disponibilidade
+# (contadores mantidos em livros) comparada com contar os exemplares a cada
+# consulta, e de emprestar/devolver quando quase todos já estão emprestados.
+#
+#   python -m benchmarks.bench_exemplares --exemplares 10 1000 10000
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import app
+from benchmarks.gerar_dados import cpf_valido, isbn13_valido
+
+CONTAGEM = '''
+    SELECT COUNT(*), SUM(status = 'Disponível') FROM exemplares WHERE livro_id = ?
+'''
+
+
+def _preparar(caminho, exemplares):
+    app.configurar_db(caminho=caminho)
+    app.create_tables()
+    app.cadastrar_usuario("Leitor Benchmark", cpf_valido(1), "leitor@example.com", "11900000000")
+    app.cadastrar_livro("Livro Benchmark", "Autor", isbn13_valido(1), "Testes", exemplares=exemplares)
+    # Deixa um único exemplar disponível: o pior caso para encontrar um livre.
+    app.emprestar_livros(1, [1] * (exemplares - 1))
+    conn = sqlite3.connect(caminho)
+    conn.execute('ANALYZE')
+    conn.commit()
+    conn.close()
+
+
+def _medir(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def _ciclo():
+    app.emprestar_livro(1, 1)
+    app.devolver_livro(1, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--exemplares', type=int, nargs='+', default=[10, 1000, 10000])
+    parser.add_argument('--repeticoes', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'exemplares':>10s} {'contadores (ms)':>16s} {'COUNT(*) (ms)':>14s} {'emprestar+devolver (ms)':>24s}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for exemplares in args.exemplares:
+            caminho = os.path.join(diretorio, f'exemplares-{exemplares}.db')
+            _preparar(caminho, exemplares)
+            # Sem cache, para medir a leitura no banco.
+            contadores = _medir(lambda: app.consultar_disponibilidade(1), args.repeticoes)
+            conn = sqlite3.connect(caminho)
+            contagem = _medir(lambda: conn.execute(CONTAGEM, (1,)).fetchone(), args.repeticoes)
+            conn.close()
+            ciclo = _medir(_ciclo, args.repeticoes)
+            app.fechar_conexoes()
+            print(f"{exemplares:10d} {contadores:16.3f} {contagem:14.3f} {ciclo:24.3f}")
+
+
+if __name__ == '__main__':
+    main()
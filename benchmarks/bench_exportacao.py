@@ -0,0 +1,74 @@
+# Exportação do histórico, catálogo e relatórios de uma base grande: linhas
+# por segundo e pico de memória (RSS) de cada exportação. A base é gerada e
+# cada exportação roda num processo próprio: no Linux o ru_maxrss do filho
+# herda o pico do processo que o criou, então este processo fica pequeno. Sai
+# com erro se alguma exportação passar do orçamento de memória.
+#
+#   python -m benchmarks.bench_exportacao --emprestimos 10000000 --rss-max-mb 64
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXPORTACOES = (
+    ('historico', 'historico.csv'),
+    ('historico', 'historico.jsonl.gz'),
+    ('catalogo', 'catalogo.csv.gz'),
+    ('emprestimos_abertos', 'abertos.jsonl'),
+    ('atraso', 'atraso.csv'),
+)
+
+
+def _exportar(caminho, fonte, destino):
+    # wait4 devolve o uso de recursos só deste filho (ru_maxrss em KB no Linux).
+    inicio = time.perf_counter()
+    processo = subprocess.Popen(
+        [sys.executable, os.path.join(RAIZ, 'exportar.py'), fonte, destino, '--banco', caminho],
+        stdout=subprocess.PIPE, text=True,
+    )
+    saida = processo.stdout.read()
+    _, status, uso = os.wait4(processo.pid, 0)
+    processo.returncode = os.waitstatus_to_exitcode(status)
+    if processo.returncode != 0:
+        raise SystemExit(f"exportação de {fonte} falhou")
+    linhas = int(saida.split()[-2]) if saida else 0
+    return linhas, time.perf_counter() - inicio, uso.ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--usuarios', type=int, default=100000)
+    parser.add_argument('--livros', type=int, default=500000)
+    parser.add_argument('--emprestimos', type=int, default=10000000)
+    parser.add_argument('--rss-max-mb', type=float, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'exportacao.db')
+        inicio = time.perf_counter()
+        subprocess.run([
+            sys.executable, '-m', 'benchmarks.gerar_dados', caminho, '--usuarios', str(args.usuarios),
+            '--livros', str(args.livros), '--emprestimos', str(args.emprestimos),
+        ], cwd=RAIZ, check=True, stdout=subprocess.DEVNULL)
+        print(f"base com {args.emprestimos} empréstimos gerada em {time.perf_counter() - inicio:.1f}s\n")
+
+        print(f"{'destino':>20s} {'linhas':>10s} {'tempo (s)':>10s} {'linhas/s':>10s} "
+              f"{'tamanho (MB)':>13s} {'pico RSS (MB)':>14s}")
+        estourou = False
+        for fonte, nome in EXPORTACOES:
+            destino = os.path.join(diretorio, nome)
+            linhas, duracao, rss = _exportar(caminho, fonte, destino)
+            estourou = estourou or rss > args.rss_max_mb
+            print(f"{nome:>20s} {linhas:10d} {duracao:10.1f} {linhas / duracao:10.0f} "
+                  f"{os.path.getsize(destino) / 2**20:13.1f} {rss:14.1f}")
+            os.remove(destino)
+
+    if estourou:
+        raise SystemExit(f"pico de RSS acima do orçamento de {args.rss_max_mb:.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# Latência de consultar_historico para um usuário com histórico cada vez
+# maior: histórico inteiro (fetchall), primeira página (com o total) e uma
+# página do meio, continuada por cursor.
+#
+#   python -m benchmarks.bench_historico --historicos 100 10000 100000
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+import app
+from benchmarks.gerar_dados import cpf_valido, isbn13_valido
+
+LIVROS = 1000
+
+
+def _preparar(caminho, historico):
+    app.configurar_db(caminho=caminho)
+    app.create_tables()
+    app.cadastrar_usuario("Escola Benchmark", cpf_valido(1), "escola@example.com", "11900000000")
+    app.cadastrar_livros_em_lote(
+        (f"Livro {i}", "Autor", isbn13_valido(i), "Testes") for i in range(1, LIVROS + 1)
+    )
+    inicio = date(2000, 1, 1)
+    conn = sqlite3.connect(caminho)
+    conn.executemany('''
+        INSERT INTO emprestimos (usuario_id, livro_id, exemplar_id, data_emprestimo, data_devolucao, data_retorno)
+        VALUES (1, ?1, ?1, ?2, ?3, ?3)
+    ''', (
+        (i % LIVROS + 1, (inicio + timedelta(days=i // 20)).isoformat(),
+         (inicio + timedelta(days=i // 20 + 14)).isoformat())
+        for i in range(historico)
+    ))
+    conn.execute('ANALYZE')
+    conn.commit()
+    # Cursor para o meio do histórico.
+    meio = conn.execute('''
+        SELECT data_emprestimo, id FROM emprestimos WHERE usuario_id = 1
+        ORDER BY data_emprestimo DESC, id DESC LIMIT 1 OFFSET ?
+    ''', (historico // 2,)).fetchone()
+    conn.close()
+    return app._codificar_cursor('historico', list(meio))
+
+
+def _medir(funcao, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--historicos', type=int, nargs='+', default=[100, 10000, 100000])
+    parser.add_argument('--tamanho-pagina', type=int, default=50)
+    parser.add_argument('--repeticoes', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'histórico':>10s} {'completo (ms)':>14s} {'1ª página (ms)':>15s} {'página do meio (ms)':>20s}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        for historico in args.historicos:
+            cursor = _preparar(os.path.join(diretorio, f'historico-{historico}.db'), historico)
+            completo = _medir(lambda: app.consultar_historico(1), args.repeticoes)
+            primeira = _medir(lambda: app.consultar_historico(1, tamanho_pagina=args.tamanho_pagina), args.repeticoes)
+            meio = _medir(
+                lambda: app.consultar_historico(1, tamanho_pagina=args.tamanho_pagina, cursor=cursor), args.repeticoes,
+            )
+            app.fechar_conexoes()
+            print(f"{historico:10d} {completo:14.3f} {primeira:15.3f} {meio:20.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# Latência de emprestar/devolver no balcão enquanto outros processos geram
+# relatórios pesados sem parar, em WAL (leitores em conexões somente leitura
+# sobre snapshots) e em journal de rollback (DELETE), onde cada leitura
+# segura um lock compartilhado que faz a escrita esperar.
+#
+#   python -m benchmarks.bench_leitura_escrita --livros 100000 --leitores 0 2 4
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+import app
+from benchmarks.bench_operacoes import percentil
+from benchmarks.gerar_dados import gerar_base
+
+
+def _leitor(caminho, journal_mode, parar):
+    app.configurar_db(caminho=caminho, journal_mode=journal_mode)
+    relatorios = 0
+    while not parar.is_set():
+        for tipo in ('disponiveis', 'emprestados', 'atraso'):
+            for _ in app.gerar_relatorio_stream(tipo)["data"]:
+                pass
+        relatorios += 1
+    app.fechar_conexoes()
+    return relatorios
+
+
+def _medir_escritas(segundos, livros, rng):
+    latencias = []
+    falhas = 0
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        livro_id = rng.randint(1, livros)
+        for operacao in (app.emprestar_livro, app.devolver_livro):
+            inicio = time.perf_counter()
+            resultado = operacao(1, livro_id)
+            latencias.append(time.perf_counter() - inicio)
+            if resultado["message"].startswith("Erro de banco de dados"):
+                falhas += 1
+    return sorted(latencias), falhas
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--livros', type=int, default=100000)
+    parser.add_argument('--emprestimos', type=int, default=500000)
+    parser.add_argument('--leitores', type=int, nargs='+', default=[0, 2, 4])
+    parser.add_argument('--journal', nargs='+', default=['WAL', 'DELETE'])
+    parser.add_argument('--segundos', type=float, default=5)
+    args = parser.parse_args()
+
+    contexto = multiprocessing.get_context('spawn')
+    print(f"{'journal':>8s} {'leitores':>9s} {'escritas':>9s} {'p50 (ms)':>9s} {'p99 (ms)':>9s} "
+          f"{'máx (ms)':>9s} {'erros':>6s} {'relatórios':>11s}")
+    with tempfile.TemporaryDirectory() as diretorio:
+        caminho = os.path.join(diretorio, 'leitura_escrita.db')
+        # Só livros disponíveis: o ciclo emprestar/devolver sempre tem o que fazer.
+        gerar_base(caminho, usuarios=100, livros=args.livros, emprestimos=args.emprestimos, fracao_emprestados=0)
+        app.fechar_conexoes()
+        for journal_mode in args.journal:
+            for leitores in args.leitores:
+                app.configurar_db(caminho=caminho, journal_mode=journal_mode)
+                parar = contexto.Manager().Event()
+                with contexto.Pool(leitores or 1) as pool:
+                    pendentes = [
+                        pool.apply_async(_leitor, (caminho, journal_mode, parar)) for _ in range(leitores)
+                    ]
+                    # Dá tempo para os leitores abrirem as conexões e começarem.
+                    time.sleep(1 if leitores else 0)
+                    latencias, falhas = _medir_escritas(args.segundos, args.livros, random.Random(leitores))
+                    parar.set()
+                    relatorios = sum(p.get() for p in pendentes)
+                app.fechar_conexoes()
+                print(f"{journal_mode:>8s} {leitores:9d} {len(latencias):9d} "
+                      f"{percentil(latencias, 0.5) * 1000:9.3f} {percentil(latencias, 0.99) * 1000:9.3f} "
+                      f"{latencias[-1] * 1000:9.3f} {falhas:6d} {relatorios:11d}")
+
+
+if __name__ == '__main__':
+    main()
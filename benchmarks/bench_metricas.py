@@ -0,0 +1,59 @@
+# Custo da instrumentação em consultar_disponibilidade: função original (sem
+# decorador), instrumentada com métricas desativadas e com métricas ativas.
+#
+#   python -m benchmarks.bench_metricas --operacoes 50000
+import argparse
+import os
+import tempfile
+import time
+
+import app
+import metricas
+
+
+def _tempo(funcao, operacoes):
+    inicio = time.perf_counter()
+    for _ in range(operacoes):
+        funcao(1)
+    return (time.perf_counter() - inicio) / operacoes * 1e6
+
+
+def _medir(variantes, operacoes, repeticoes):
+    # Rodadas intercaladas e o melhor tempo de cada variante, para reduzir ruído.
+    melhores = {nome: float('inf') for nome, _ in variantes}
+    for _ in range(repeticoes):
+        for nome, (funcao, ligar) in variantes:
+            if ligar:
+                metricas.ativar()
+            melhores[nome] = min(melhores[nome], _tempo(funcao, operacoes))
+            metricas.desativar()
+    return melhores
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--operacoes', type=int, default=50000)
+    parser.add_argument('--repeticoes', type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        app.configurar_db(caminho=os.path.join(diretorio, 'bench.db'))
+        app.create_tables()
+        app.cadastrar_livro("Livro Benchmark", "Autor", "9780306406157", "Testes")
+
+        _tempo(app.consultar_disponibilidade, args.operacoes)  # aquecimento
+        tempos = _medir([
+            ('original', (app.consultar_disponibilidade.__wrapped__, False)),
+            ('desativado', (app.consultar_disponibilidade, False)),
+            ('ativo', (app.consultar_disponibilidade, True)),
+        ], args.operacoes, args.repeticoes)
+        app.fechar_conexoes()
+
+    original, desativado, ativo = tempos['original'], tempos['desativado'], tempos['ativo']
+    print(f"sem decorador:        {original:8.2f} µs/op")
+    print(f"métricas desativadas: {desativado:8.2f} µs/op ({(desativado / original - 1) * 100:+.1f}%)")
+    print(f"métricas ativas:      {ativo:8.2f} µs/op ({(ativo / original - 1) * 100:+.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
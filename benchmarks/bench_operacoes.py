@@ -0,0 +1,195 @@
+# Mede vazão e latência (p50/p95/p99) de cada operação pública de app.py
+# contra um arquivo de banco real e grava o resultado em JSON.
+#
+#   python -m benchmarks.gerar_dados bench.db
+#   python -m benchmarks.bench_operacoes bench.db --saida resultado.json
+#   python -m benchmarks.bench_operacoes bench.db --comparar anterior.json
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import time
+from datetime import datetime
+
+import app
+from benchmarks.gerar_dados import PALAVRAS, cpf_valido, isbn13_valido
+
+# Margem acima do p50 anterior a partir da qual --comparar acusa regressão.
+LIMITE_REGRESSAO = 1.2
+# Livros por chamada de emprestar_livros / devolver_livros.
+LIVROS_POR_LOTE = 5
+
+
+def percentil(ordenados, fracao):
+    if not ordenados:
+        return 0.0
+    posicao = min(int(round(fracao * (len(ordenados) - 1))), len(ordenados) - 1)
+    return ordenados[posicao]
+
+
+def medir(funcao, argumentos):
+    latencias = []
+    falhas = 0
+    inicio_total = time.perf_counter()
+    for args in argumentos:
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        latencias.append(time.perf_counter() - inicio)
+        if isinstance(resultado, dict) and not resultado.get("success"):
+            falhas += 1
+    duracao = time.perf_counter() - inicio_total
+    latencias.sort()
+    return {
+        "chamadas": len(latencias),
+        "falhas": falhas,
+        "ops_s": len(latencias) / duracao if duracao else 0.0,
+        "p50_ms": percentil(latencias, 0.50) * 1000,
+        "p95_ms": percentil(latencias, 0.95) * 1000,
+        "p99_ms": percentil(latencias, 0.99) * 1000,
+    }
+
+
+def _contagens(caminho):
+    conn = sqlite3.connect(caminho)
+    try:
+        return {
+            tabela: conn.execute(f'SELECT MAX(id) FROM {tabela}').fetchone()[0] or 0
+            for tabela in ('usuarios', 'livros', 'emprestimos')
+        }
+    finally:
+        conn.close()
+
+
+def _ids_disponiveis(caminho, quantidade, rng):
+    conn = sqlite3.connect(caminho)
+    try:
+        ids = [linha[0] for linha in conn.execute(
+            "SELECT id FROM livros WHERE status = 'Disponível' LIMIT ?", (quantidade * 10,))]
+    finally:
+        conn.close()
+    rng.shuffle(ids)
+    return ids[:quantidade]
+
+
+def executar(caminho, iteracoes=2000, iteracoes_relatorio=5, semente=7):
+    rng = random.Random(semente)
+    app.configurar_db(caminho=caminho)
+    app.create_tables()
+    contagens = _contagens(caminho)
+    usuarios, livros = contagens['usuarios'], contagens['livros']
+
+    def aleatorios(maximo, n=iteracoes):
+        return [(rng.randint(1, maximo),) for _ in range(n)]
+
+    novos_livros = [
+        (f"Livro novo {i}", "Autor", isbn13_valido(10**8 + livros + i), "Geral") for i in range(iteracoes)
+    ]
+    circulacao = [(rng.randint(1, usuarios), livro_id) for livro_id in _ids_disponiveis(caminho, iteracoes, rng)]
+
+    resultados = {}
+    resultados['consultar_disponibilidade'] = medir(app.consultar_disponibilidade, aleatorios(livros))
+    resultados['consultar_historico'] = medir(app.consultar_historico, aleatorios(usuarios))
+    resultados['buscar_livros'] = medir(app.buscar_livros, [(rng.choice(PALAVRAS),) for _ in range(iteracoes)])
+    resultados['autocompletar'] = medir(app.autocompletar, [(rng.choice(PALAVRAS)[:3],) for _ in range(iteracoes)])
+    resultados['consultar_atrasos'] = medir(app.consultar_atrasos, [()] * iteracoes_relatorio)
+    resultados['consultar_vencimentos'] = medir(app.consultar_vencimentos, [(7,)] * iteracoes_relatorio)
+    resultados['consultar_resumo'] = medir(app.consultar_resumo, [()] * iteracoes)
+    resultados['atualizar_usuario'] = medir(
+        app.atualizar_usuario, [(i, None, None, f"119{i:08d}") for (i,) in aleatorios(usuarios)])
+    resultados['cadastrar_usuario'] = medir(app.cadastrar_usuario, [
+        (f"Usuário novo {i}", cpf_valido(10**8 + usuarios + i), f"novo{i}@example.com", "11900000000")
+        for i in range(iteracoes)
+    ])
+    resultados['cadastrar_livro'] = medir(app.cadastrar_livro, novos_livros)
+    resultados['emprestar_livro'] = medir(app.emprestar_livro, circulacao)
+    resultados['renovar_emprestimo'] = medir(app.renovar_emprestimo, circulacao)
+    resultados['devolver_livro'] = medir(app.devolver_livro, circulacao)
+    # Os mesmos livros, agora em lotes por leitor.
+    lotes = [
+        (rng.randint(1, usuarios), [livro_id for _, livro_id in circulacao[i:i + LIVROS_POR_LOTE]])
+        for i in range(0, len(circulacao), LIVROS_POR_LOTE)
+    ]
+    resultados['emprestar_livros'] = medir(app.emprestar_livros, lotes)
+    resultados['devolver_livros'] = medir(
+        app.devolver_livros, [([(usuario_id, livro_id) for livro_id in ids],) for usuario_id, ids in lotes])
+    resultados['adicionar_exemplares'] = medir(
+        app.adicionar_exemplares, [(livro_id, 1) for (livro_id,) in aleatorios(livros)])
+    resultados['remover_livro'] = medir(app.remover_livro, [(livros + i + 1,) for i in range(iteracoes)])
+    lote = [(titulo, autor, isbn13_valido(10**8 + livros + iteracoes + i), categoria)
+            for i, (titulo, autor, _, categoria) in enumerate(novos_livros)]
+    resultados['cadastrar_livros_em_lote'] = medir(app.cadastrar_livros_em_lote, [(lote,)])
+    usuarios_lote = [
+        (f"Usuário lote {i}", cpf_valido(10**8 + usuarios + iteracoes + i), f"lote{i}@example.com", "11900000000")
+        for i in range(iteracoes)
+    ]
+    resultados['cadastrar_usuarios_em_lote'] = medir(app.cadastrar_usuarios_em_lote, [(usuarios_lote,)])
+    for tipo in app._RELATORIOS:
+        resultados[f'gerar_relatorio[{tipo}]'] = medir(app.gerar_relatorio, [(tipo,)] * iteracoes_relatorio)
+        resultados[f'gerar_relatorio_paginado[{tipo}]'] = medir(
+            app.gerar_relatorio_paginado, [(tipo,)] * iteracoes)
+
+    app.fechar_conexoes()
+    return {
+        "data": datetime.now().isoformat(timespec='seconds'),
+        "ambiente": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+        },
+        "base": contagens,
+        "iteracoes": iteracoes,
+        "semente": semente,
+        "operacoes": resultados,
+    }
+
+
+def comparar(atual, anterior):
+    regressoes = []
+    for nome, medida in atual["operacoes"].items():
+        base = anterior["operacoes"].get(nome)
+        if not base or not base["p50_ms"]:
+            continue
+        razao = medida["p50_ms"] / base["p50_ms"]
+        marca = '  REGRESSÃO' if razao > LIMITE_REGRESSAO else ''
+        print(f"{nome:40s} p50 {base['p50_ms']:9.3f} -> {medida['p50_ms']:9.3f} ms ({razao:5.2f}x){marca}")
+        if marca:
+            regressoes.append(nome)
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('caminho')
+    parser.add_argument('--iteracoes', type=int, default=2000)
+    parser.add_argument('--iteracoes-relatorio', type=int, default=5)
+    parser.add_argument('--semente', type=int, default=7)
+    parser.add_argument('--saida')
+    parser.add_argument('--comparar')
+    args = parser.parse_args()
+
+    resultado = executar(args.caminho, args.iteracoes, args.iteracoes_relatorio, args.semente)
+
+    saida = args.saida or os.path.join(
+        'benchmarks', 'resultados', f"operacoes-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+
+    for nome, medida in resultado["operacoes"].items():
+        print(
+            f"{nome:40s} {medida['ops_s']:10.0f} ops/s  p50 {medida['p50_ms']:8.3f}  "
+            f"p95 {medida['p95_ms']:8.3f}  p99 {medida['p99_ms']:8.3f} ms  falhas {medida['falhas']}"
+        )
+    print(f"resultado gravado em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as arquivo:
+            regressoes = comparar(resultado, json.load(arquivo))
+        if regressoes:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
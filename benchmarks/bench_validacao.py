@@ -0,0 +1,80 @@
+# Validação de colunas de CPF, ISBN e e-mail: checagem antiga (re.sub e
+# tamanho, registro a registro), motivo_* registro a registro e
+# validar_colunas sem e com NumPy.
+#
+#   python -m benchmarks.bench_validacao --linhas 1000000
+import argparse
+import random
+import re
+import time
+
+import validacao
+from benchmarks.gerar_dados import cpf_valido, isbn13_valido
+
+
+def _antigo(cpfs, isbns, emails):
+    # is_valid_cpf / is_valid_isbn / is_valid_email antes das verificações de dígito.
+    return [
+        len(re.sub(r'\D', '', cpf)) == 11
+        and len(re.sub(r'\D', '', isbn)) in [10, 13]
+        and re.match(r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$', email) is not None
+        for cpf, isbn, email in zip(cpfs, isbns, emails)
+    ]
+
+
+def _por_registro(cpfs, isbns, emails):
+    return [
+        not (validacao.motivo_cpf(cpf) or validacao.motivo_isbn(isbn) or validacao.motivo_email(email))
+        for cpf, isbn, email in zip(cpfs, isbns, emails)
+    ]
+
+
+def _colunas(cpfs, isbns, emails, usar_numpy):
+    return validacao.validar_colunas(cpfs=cpfs, isbns=isbns, emails=emails, usar_numpy=usar_numpy)["validos"]
+
+
+def _dados(linhas):
+    # Um terço com pontuação e ~5% com um dígito trocado.
+    rng = random.Random(42)
+    cpfs, isbns = [], []
+    for i in range(linhas):
+        cpf, isbn = cpf_valido(i + 1), isbn13_valido(i)
+        if rng.random() < 0.05:
+            cpf = cpf[:10] + str((int(cpf[10]) + 1) % 10)
+        if rng.random() < 0.05:
+            isbn = isbn[:12] + str((int(isbn[12]) + 1) % 10)
+        if i % 3 == 0:
+            cpf = f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}"
+            isbn = f"{isbn[:3]}-{isbn[3:12]}-{isbn[12]}"
+        cpfs.append(cpf)
+        isbns.append(isbn)
+    emails = [f"leitor{i}@example.com" for i in range(linhas)]
+    return cpfs, isbns, emails
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--linhas', type=int, default=1000000)
+    args = parser.parse_args()
+
+    colunas = _dados(args.linhas)
+    variantes = [
+        ("antigo (sem dígitos)", lambda: _antigo(*colunas)),
+        ("motivo_* por registro", lambda: _por_registro(*colunas)),
+        ("validar_colunas", lambda: _colunas(*colunas, usar_numpy=False)),
+    ]
+    if validacao.np is not None:
+        variantes.append(("validar_colunas numpy", lambda: _colunas(*colunas, usar_numpy=True)))
+    else:
+        print("NumPy não instalado: variante vetorizada omitida\n")
+
+    print(f"{'variante':>24s} {'tempo (s)':>10s} {'linhas/s':>12s} {'válidas':>9s}")
+    for nome, funcao in variantes:
+        inicio = time.perf_counter()
+        validos = funcao()
+        duracao = time.perf_counter() - inicio
+        print(f"{nome:>24s} {duracao:10.2f} {args.linhas / duracao:12.0f} {sum(map(bool, validos)):9d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+# Gera uma base sintética reprodutível (mesma semente, mesma base) com
+# usuários, livros e um histórico de empréstimos com taxa de atraso realista.
+#
+#   python -m benchmarks.gerar_dados bench.db --usuarios 100000 --livros 500000 --emprestimos 5000000
+import argparse
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+from itertools import islice
+
+import app
+
+CATEGORIAS = (
+    'Romance', 'Fantasia', 'Tecnologia', 'História', 'Infantil', 'Poesia',
+    'Biografia', 'Ciências', 'Didático', 'Policial', 'Autoajuda', 'Artes',
+)
+NOMES = ('Ana', 'Bruno', 'Carla', 'Diego', 'Elisa', 'Felipe', 'Gabriela', 'Heitor', 'Isabela', 'João', 'Larissa', 'Marcos')
+SOBRENOMES = ('Silva', 'Souza', 'Oliveira', 'Santos', 'Pereira', 'Lima', 'Costa', 'Ribeiro', 'Almeida', 'Carvalho')
+PALAVRAS = (
+    'sertão', 'mar', 'memórias', 'cidade', 'noite', 'caminho', 'coração', 'tempo', 'vida', 'guerra',
+    'amor', 'segredo', 'ilha', 'jardim', 'sombra', 'luz', 'história', 'viagem', 'rio', 'estrela',
+)
+
+TAMANHO_LOTE = 50000
+DIAS_HISTORICO = 730
+PRAZO_DIAS = 14
+
+
+def cpf_valido(numero):
+    digitos = [int(d) for d in f"{numero % 10**9:09d}"]
+    for peso_inicial in (10, 11):
+        soma = sum(d * p for d, p in zip(digitos, range(peso_inicial, 1, -1)))
+        resto = soma * 10 % 11
+        digitos.append(0 if resto == 10 else resto)
+    return ''.join(map(str, digitos))
+
+
+def isbn13_valido(numero):
+    corpo = f"978{numero % 10**9:09d}"
+    soma = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(corpo))
+    return corpo + str((10 - soma % 10) % 10)
+
+
+def _usuarios(rng, total):
+    for i in range(1, total + 1):
+        nome = f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}"
+        yield (nome, cpf_valido(i), f"usuario{i}@example.com", f"119{rng.randrange(10**8):08d}")
+
+
+def _livros(rng, total, emprestados):
+    for i in range(1, total + 1):
+        titulo = ' '.join(rng.choice(PALAVRAS) for _ in range(rng.randint(2, 5))).capitalize()
+        autor = f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}"
+        status = 'Emprestado' if i <= emprestados else 'Disponível'
+        yield (titulo, autor, isbn13_valido(i), rng.choice(CATEGORIAS), status)
+
+
+def _emprestimos_encerrados(rng, total, usuarios, livros, hoje):
+    for _ in range(total):
+        inicio = hoje - timedelta(days=rng.randint(PRAZO_DIAS + 1, DIAS_HISTORICO))
+        prazo = inicio + timedelta(days=PRAZO_DIAS)
+        retorno = inicio + timedelta(days=rng.randint(1, PRAZO_DIAS + 7))
+        yield (rng.randint(1, usuarios), rng.randint(1, livros), inicio.isoformat(), prazo.isoformat(), retorno.isoformat())
+
+
+def _emprestimos_abertos(rng, total, usuarios, taxa_atraso, hoje):
+    # Os livros 1..total estão emprestados; uma fração deles já venceu.
+    for livro_id in range(1, total + 1):
+        if rng.random() < taxa_atraso:
+            inicio = hoje - timedelta(days=rng.randint(PRAZO_DIAS + 1, PRAZO_DIAS + 60))
+        else:
+            inicio = hoje - timedelta(days=rng.randint(0, PRAZO_DIAS))
+        yield (rng.randint(1, usuarios), livro_id, inicio.isoformat(), (inicio + timedelta(days=PRAZO_DIAS)).isoformat())
+
+
+def _inserir(conn, sql, linhas):
+    linhas = iter(linhas)
+    while True:
+        lote = list(islice(linhas, TAMANHO_LOTE))
+        if not lote:
+            break
+        conn.executemany(sql, lote)
+        conn.commit()
+
+
+def gerar_base(caminho, usuarios=1000, livros=5000, emprestimos=50000,
+               fracao_emprestados=0.2, taxa_atraso=0.15, semente=42):
+    rng = random.Random(semente)
+    hoje = date.today()
+    abertos = int(livros * fracao_emprestados)
+    encerrados = max(emprestimos - abertos, 0)
+
+    if os.path.exists(caminho):
+        os.remove(caminho)
+    app.configurar_db(caminho=caminho)
+    app.create_tables()
+
+    conn = sqlite3.connect(caminho)
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = OFF')
+    try:
+        _inserir(conn, 'INSERT INTO usuarios (nome, cpf, email, telefone) VALUES (?, ?, ?, ?)',
+                 _usuarios(rng, usuarios))
+        _inserir(conn, 'INSERT INTO livros (titulo, autor, isbn, categoria, status) VALUES (?, ?, ?, ?, ?)',
+                 _livros(rng, livros, abertos))
+        # Cada livro gerado tem um único exemplar, criado pelo trigger com o mesmo id.
+        _inserir(conn, '''
+            INSERT INTO emprestimos (usuario_id, livro_id, exemplar_id, data_emprestimo, data_devolucao, data_retorno)
+            VALUES (?1, ?2, ?2, ?3, ?4, ?5)
+        ''', _emprestimos_encerrados(rng, encerrados, usuarios, livros, hoje))
+        _inserir(conn, '''
+            INSERT INTO emprestimos (usuario_id, livro_id, exemplar_id, data_emprestimo, data_devolucao)
+            VALUES (?1, ?2, ?2, ?3, ?4)
+        ''', _emprestimos_abertos(rng, abertos, usuarios, taxa_atraso, hoje))
+        conn.execute('ANALYZE')
+        conn.commit()
+    finally:
+        conn.close()
+    # A carga direta não passa por app.py; refaz as estruturas derivadas.
+    app.reconstruir_emprestimos_abertos()
+
+    return {
+        "usuarios": usuarios,
+        "livros": livros,
+        "emprestimos": encerrados + abertos,
+        "emprestimos_abertos": abertos,
+        "taxa_atraso": taxa_atraso,
+        "semente": semente,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('caminho')
+    parser.add_argument('--usuarios', type=int, default=100000)
+    parser.add_argument('--livros', type=int, default=500000)
+    parser.add_argument('--emprestimos', type=int, default=5000000)
+    parser.add_argument('--fracao-emprestados', type=float, default=0.2)
+    parser.add_argument('--taxa-atraso', type=float, default=0.15)
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resumo = gerar_base(
+        args.caminho, args.usuarios, args.livros, args.emprestimos,
+        args.fracao_emprestados, args.taxa_atraso, args.semente,
+    )
+    app.fechar_conexoes()
+    print(f"{resumo} em {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+# Reproduz um log JSON-lines de operações contra app.py. Cada linha tem o nome
+# da função e os argumentos, e opcionalmente o instante original em segundos:
+#
+#   {"ts": 1718000000.25, "funcao": "emprestar_livro", "args": [12, 345]}
+#   {"ts": 1718000000.31, "funcao": "atualizar_usuario", "args": [7], "kwargs": {"telefone": "11900000000"}}
+#
+#   python -m benchmarks.replay trafego.jsonl --db candidato.db --threads 8 --compressao 60
+#   python -m benchmarks.replay trafego.jsonl --db candidato.db --processos 4 --taxa 500
+#
+# Com "ts" (ou --taxa) a carga é de laço aberto: cada operação é disparada no
+# seu horário, independentemente de as anteriores terem terminado, e a latência
+# é contada a partir do horário agendado.
+import argparse
+import json
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import app
+
+MAX_PENDENTES_PADRAO = 10000
+MENSAGENS_BUSY = ('database is locked', 'database is busy')
+
+
+def ler_log(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        for numero, linha in enumerate(arquivo, 1):
+            linha = linha.strip()
+            if not linha:
+                continue
+            registro = json.loads(linha)
+            funcao = registro.get('funcao')
+            if not isinstance(funcao, str) or funcao.startswith('_') or not callable(getattr(app, funcao, None)):
+                raise ValueError(f"linha {numero}: função desconhecida {funcao!r}")
+            yield registro.get('ts'), funcao, registro.get('args', []), registro.get('kwargs', {})
+
+
+def _inicializar_processo(caminho_db):
+    if caminho_db:
+        app.configurar_db(caminho=caminho_db)
+
+
+def executar_operacao(funcao, args, kwargs):
+    # Roda numa thread ou num processo do pool; devolve só dados serializáveis.
+    inicio = time.perf_counter()
+    try:
+        resultado = getattr(app, funcao)(*args, **kwargs)
+    except sqlite3.Error as e:
+        return False, f"Exceção: {e}", time.perf_counter() - inicio
+    duracao = time.perf_counter() - inicio
+    if isinstance(resultado, dict):
+        return bool(resultado.get("success")), resultado.get("message"), duracao
+    return True, resultado, duracao
+
+
+# Latências em faixas fixas: cada potência de 2 de milissegundos é dividida
+# em SUBDIVISOES faixas iguais, fechadas no limite superior, então a memória
+# não cresce com o log e um percentil sai com erro relativo de no máximo
+# 1/SUBDIVISOES. Até 2**EXPOENTE_MINIMO ms tudo cai na primeira faixa; acima
+# de 2**EXPOENTE_MAXIMO ms (~17 min), na última.
+SUBDIVISOES = 16
+EXPOENTE_MINIMO = -10
+EXPOENTE_MAXIMO = 20
+_FAIXAS = (EXPOENTE_MAXIMO - EXPOENTE_MINIMO) * SUBDIVISOES + 1
+
+
+def _faixa(ms):
+    if ms <= 2 ** EXPOENTE_MINIMO:
+        return 0
+    if ms >= 2 ** EXPOENTE_MAXIMO:
+        return _FAIXAS - 1
+    mantissa, expoente = math.frexp(ms)
+    # ms está em [2**(expoente - 1), 2**expoente); uma potência de 2 exata
+    # fecha a última faixa da potência anterior.
+    parte = math.ceil((mantissa * 2 - 1) * SUBDIVISOES) - 1
+    return (expoente - 1 - EXPOENTE_MINIMO) * SUBDIVISOES + parte + 1
+
+
+def _limite_ms(faixa):
+    if faixa == 0:
+        return 2 ** EXPOENTE_MINIMO
+    potencia, parte = divmod(faixa - 1, SUBDIVISOES)
+    return 2 ** (potencia + EXPOENTE_MINIMO) * (1 + (parte + 1) / SUBDIVISOES)
+
+
+class HistogramaLatencia:
+
+    def __init__(self):
+        self.contagens = [0] * _FAIXAS
+        self.total = 0
+
+    def observar(self, segundos):
+        self.contagens[_faixa(segundos * 1000)] += 1
+        self.total += 1
+
+    def percentil(self, fracao):
+        # Limite superior da faixa em que cai a observação de posição
+        # round(fracao * (total - 1)), como benchmarks.bench_operacoes.percentil.
+        if not self.total:
+            return 0.0
+        posicao = min(int(round(fracao * (self.total - 1))), self.total - 1)
+        acumulado = 0
+        for faixa, quantidade in enumerate(self.contagens):
+            acumulado += quantidade
+            if acumulado > posicao:
+                return _limite_ms(faixa) / 1000
+        return _limite_ms(_FAIXAS - 1) / 1000
+
+    def potencias_de_2(self):
+        # Agrupa as faixas em potências de 2 de milissegundos: "<=1", "<=2", "<=4", ...
+        buckets = Counter()
+        for faixa, quantidade in enumerate(self.contagens):
+            if quantidade:
+                limite = 1 if faixa == 0 else 2 ** ((faixa - 1) // SUBDIVISOES + EXPOENTE_MINIMO + 1)
+                buckets[max(limite, 1)] += quantidade
+        return {f"<={limite}": buckets[limite] for limite in sorted(buckets)}
+
+
+class Estatisticas:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = defaultdict(HistogramaLatencia)
+        self.servico = defaultdict(HistogramaLatencia)
+        self.falhas = defaultdict(Counter)
+        self.busy = 0
+
+    def registrar(self, funcao, sucesso, mensagem, latencia, servico):
+        with self._lock:
+            self.latencias[funcao].observar(latencia)
+            self.servico[funcao].observar(servico)
+            if not sucesso:
+                self.falhas[funcao][mensagem] += 1
+                if any(trecho in str(mensagem) for trecho in MENSAGENS_BUSY):
+                    self.busy += 1
+
+    def relatorio(self, duracao):
+        operacoes = {}
+        total = 0
+        for funcao, latencias in sorted(self.latencias.items()):
+            total += latencias.total
+            operacoes[funcao] = {
+                "chamadas": latencias.total,
+                "p50_ms": latencias.percentil(0.50) * 1000,
+                "p95_ms": latencias.percentil(0.95) * 1000,
+                "p99_ms": latencias.percentil(0.99) * 1000,
+                "servico_p50_ms": self.servico[funcao].percentil(0.50) * 1000,
+                "histograma_ms": latencias.potencias_de_2(),
+                "falhas": dict(self.falhas[funcao]),
+            }
+        return {
+            "duracao_s": duracao,
+            "operacoes_total": total,
+            "ops_s": total / duracao if duracao else 0.0,
+            "sqlite_busy": self.busy,
+            "operacoes": operacoes,
+        }
+
+
+def reproduzir(registros, threads=4, processos=0, taxa=None, compressao=1.0,
+               caminho_db=None, max_pendentes=MAX_PENDENTES_PADRAO):
+    if processos:
+        pool = ProcessPoolExecutor(max_workers=processos, initializer=_inicializar_processo, initargs=(caminho_db,))
+    else:
+        _inicializar_processo(caminho_db)
+        pool = ThreadPoolExecutor(max_workers=threads)
+
+    estatisticas = Estatisticas()
+    vagas = threading.BoundedSemaphore(max_pendentes)
+    inicio = time.perf_counter()
+    primeiro_ts = None
+
+    try:
+        for indice, (ts, funcao, args, kwargs) in enumerate(registros):
+            # Horário agendado: taxa fixa, tempo original comprimido ou "agora".
+            if taxa:
+                agendado = inicio + indice / taxa
+            elif ts is not None:
+                primeiro_ts = ts if primeiro_ts is None else primeiro_ts
+                agendado = inicio + (ts - primeiro_ts) / compressao
+            else:
+                agendado = time.perf_counter()
+            espera = agendado - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+
+            vagas.acquire()
+            futuro = pool.submit(executar_operacao, funcao, args, kwargs)
+
+            def concluir(futuro, funcao=funcao, agendado=agendado):
+                vagas.release()
+                try:
+                    sucesso, mensagem, servico = futuro.result()
+                except Exception as e:
+                    sucesso, mensagem, servico = False, f"Exceção: {e}", 0.0
+                estatisticas.registrar(funcao, sucesso, mensagem, time.perf_counter() - agendado, servico)
+
+            futuro.add_done_callback(concluir)
+    finally:
+        pool.shutdown(wait=True)
+        if not processos:
+            app.fechar_conexoes()
+
+    return estatisticas.relatorio(time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('log')
+    parser.add_argument('--db')
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument('--threads', type=int, default=4)
+    modo.add_argument('--processos', type=int, default=0)
+    parser.add_argument('--taxa', type=float, help='operações por segundo (ignora "ts")')
+    parser.add_argument('--compressao', type=float, default=1.0, help='fator de aceleração do tempo original')
+    parser.add_argument('--max-pendentes', type=int, default=MAX_PENDENTES_PADRAO)
+    parser.add_argument('--saida')
+    args = parser.parse_args()
+
+    relatorio = reproduzir(
+        ler_log(args.log), threads=args.threads, processos=args.processos, taxa=args.taxa,
+        compressao=args.compressao, caminho_db=args.db, max_pendentes=args.max_pendentes,
+    )
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as arquivo:
+            json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+
+    print(f"{relatorio['operacoes_total']} operações em {relatorio['duracao_s']:.1f}s "
+          f"({relatorio['ops_s']:.0f} ops/s), SQLITE_BUSY: {relatorio['sqlite_busy']}")
+    for funcao, dados in relatorio["operacoes"].items():
+        print(f"  {funcao:30s} {dados['chamadas']:8d}  p50 {dados['p50_ms']:8.2f}  "
+              f"p95 {dados['p95_ms']:8.2f}  p99 {dados['p99_ms']:8.2f} ms")
+        for mensagem, total in Counter(dados["falhas"]).most_common():
+            print(f"      {total:8d}  {mensagem}")
+
+
+if __name__ == '__main__':
+    main()
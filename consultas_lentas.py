@@ -0,0 +1,170 @@
+import argparse
+import json
+import logging
+import re
+import sqlite3
+import threading
+from collections import defaultdict
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+import metricas
+import validacao
+
+
+# Log opcional de comandos lentos. Cada comando acima do limite vira uma linha
+# JSON com SQL, parâmetros (CPF e e-mail mascarados), tempo, função de app.py
+# que o executou e o EXPLAIN QUERY PLAN, num arquivo com rotação.
+#
+#   consultas_lentas.ativar('consultas_lentas.jsonl', limite_ms=50)
+#   python consultas_lentas.py resumir consultas_lentas.jsonl
+
+LIMITE_MS_PADRAO = 100
+MAX_BYTES_PADRAO = 10 * 1024 * 1024
+BACKUPS_PADRAO = 5
+MASCARA = '***'
+
+# Qualquer texto que vire 11 dígitos sem os separadores aceitos por validacao.
+_CPF = re.compile(r'[0-9]{11}')
+_EMAIL = re.compile(r'[^@\s]+@[^@\s]+')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_ESPACOS = re.compile(r'\s+')
+_LISTA_MARCADORES = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+
+_logger = logging.getLogger('biblioteca.consultas_lentas')
+_logger.propagate = False
+_lock = threading.Lock()
+_observador = None
+
+
+def mascarar(valor):
+    if isinstance(valor, str) and (_CPF.fullmatch(validacao.sem_separadores(valor.strip())) or _EMAIL.search(valor)):
+        return MASCARA
+    return valor
+
+
+def mascarar_parametros(parametros):
+    if parametros is None:
+        return None
+    if isinstance(parametros, dict):
+        return {chave: _serializavel(mascarar(valor)) for chave, valor in parametros.items()}
+    return [_serializavel(mascarar(valor)) for valor in parametros]
+
+
+def _serializavel(valor):
+    if valor is None or isinstance(valor, (str, int, float, bool)):
+        return valor
+    return str(valor)
+
+
+def _plano(conn, sql, parametros):
+    if parametros is None:
+        return None
+    try:
+        # Cursor comum, para a própria consulta do plano não ser instrumentada.
+        cursor = conn.cursor(sqlite3.Cursor)
+        return [linha[3] for linha in cursor.execute('EXPLAIN QUERY PLAN ' + sql, parametros)]
+    except sqlite3.Error:
+        return None
+
+
+class ObservadorConsultasLentas:
+
+    def __init__(self, limite_ms):
+        self.limite_segundos = limite_ms / 1000
+
+    def __call__(self, conn, sql, parametros, segundos, operacao):
+        if segundos < self.limite_segundos:
+            return
+        entrada = {
+            "data": datetime.now().isoformat(timespec='milliseconds'),
+            "operacao": operacao,
+            "duracao_ms": round(segundos * 1000, 3),
+            "sql": _ESPACOS.sub(' ', sql).strip(),
+            "parametros": mascarar_parametros(parametros),
+            "plano": _plano(conn, sql, parametros),
+        }
+        _logger.info(json.dumps(entrada, ensure_ascii=False))
+
+
+def ativar(caminho='consultas_lentas.jsonl', limite_ms=LIMITE_MS_PADRAO,
+           max_bytes=MAX_BYTES_PADRAO, backups=BACKUPS_PADRAO):
+    global _observador
+    with _lock:
+        _desativar()
+        manipulador = RotatingFileHandler(caminho, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        manipulador.setFormatter(logging.Formatter('%(message)s'))
+        _logger.addHandler(manipulador)
+        _logger.setLevel(logging.INFO)
+        _observador = ObservadorConsultasLentas(limite_ms)
+        metricas.registrar_observador(_observador)
+
+
+def desativar():
+    with _lock:
+        _desativar()
+
+
+def _desativar():
+    global _observador
+    if _observador is not None:
+        metricas.remover_observador(_observador)
+        _observador = None
+    for manipulador in list(_logger.handlers):
+        _logger.removeHandler(manipulador)
+        manipulador.close()
+
+
+def normalizar(sql):
+    # Agrupa comandos iguais a menos de literais e do tamanho de listas IN (...).
+    sql = _LITERAL.sub('?', sql)
+    sql = _LISTA_MARCADORES.sub('(?, ...)', sql)
+    return _ESPACOS.sub(' ', sql).strip()
+
+
+def resumir(caminhos):
+    grupos = defaultdict(lambda: {"ocorrencias": 0, "total_ms": 0.0, "max_ms": 0.0, "operacoes": set()})
+    for caminho in caminhos:
+        with open(caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                if not linha.strip():
+                    continue
+                entrada = json.loads(linha)
+                grupo = grupos[normalizar(entrada["sql"])]
+                grupo["ocorrencias"] += 1
+                grupo["total_ms"] += entrada["duracao_ms"]
+                grupo["max_ms"] = max(grupo["max_ms"], entrada["duracao_ms"])
+                if entrada.get("operacao"):
+                    grupo["operacoes"].add(entrada["operacao"])
+
+    resumo = [
+        {
+            "sql": sql,
+            "ocorrencias": grupo["ocorrencias"],
+            "total_ms": grupo["total_ms"],
+            "media_ms": grupo["total_ms"] / grupo["ocorrencias"],
+            "max_ms": grupo["max_ms"],
+            "operacoes": sorted(grupo["operacoes"]),
+        }
+        for sql, grupo in grupos.items()
+    ]
+    resumo.sort(key=lambda item: item["total_ms"], reverse=True)
+    return resumo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    comandos = parser.add_subparsers(dest='comando', required=True)
+    resumo = comandos.add_parser('resumir')
+    resumo.add_argument('arquivos', nargs='+')
+    resumo.add_argument('--top', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    for item in resumir(args.arquivos)[:args.top]:
+        print(f"{item['total_ms']:10.1f} ms  {item['ocorrencias']:6d}x  média {item['media_ms']:8.2f}  "
+              f"máx {item['max_ms']:8.2f}  {', '.join(item['operacoes'])}")
+        print(f"    {item['sql']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import tempfile
+
+import app
+
+
+# Exportação de relatórios, catálogo e histórico de empréstimos para CSV ou
+# JSONL, com ou sem gzip. As linhas vão do cursor para o arquivo em lotes, sem
+# montar a lista em memória, num arquivo temporário no mesmo diretório que só
+# é renomeado para o destino quando a exportação termina.
+#
+#   exportar.exportar('catalogo', 'catalogo.csv.gz', progresso=print)
+#   python exportar.py historico historico.jsonl.gz
+
+FORMATOS = ('csv', 'jsonl')
+INTERVALO_PROGRESSO_PADRAO = 100000
+# O nível 9 (padrão do gzip) custa bem mais CPU para um arquivo quase igual.
+NIVEL_GZIP = 6
+
+_CONSULTAS = {
+    'catalogo': '''
+        SELECT id, titulo, autor, isbn, categoria, status, exemplares_disponiveis, exemplares_total
+        FROM livros ORDER BY id
+    ''',
+    'emprestimos_abertos': '''
+        SELECT emprestimos_abertos.emprestimo_id AS id, emprestimos_abertos.usuario_id,
+               emprestimos_abertos.livro_id, livros.titulo, emprestimos_abertos.data_devolucao
+        FROM emprestimos_abertos
+        JOIN livros ON livros.id = emprestimos_abertos.livro_id
+        ORDER BY emprestimos_abertos.emprestimo_id
+    ''',
+    'historico': '''
+        SELECT id, usuario_id, livro_id, exemplar_id, data_emprestimo, data_devolucao, data_retorno
+        FROM main.emprestimos
+    ''',
+}
+
+# O histórico arquivado (arquivo.emprestimos) entra quando o arquivo existe.
+_HISTORICO_ARQUIVADO = '''
+    UNION ALL
+    SELECT id, usuario_id, livro_id, exemplar_id, data_emprestimo, data_devolucao, data_retorno
+    FROM arquivo.emprestimos AS arquivados
+    WHERE NOT EXISTS (SELECT 1 FROM main.emprestimos WHERE main.emprestimos.id = arquivados.id)
+'''
+
+FONTES = tuple(_CONSULTAS) + tuple(app._RELATORIOS)
+
+
+def _formato(destino, formato, comprimir):
+    nome = destino[:-3] if destino.endswith('.gz') else destino
+    if comprimir is None:
+        comprimir = destino.endswith('.gz')
+    if formato is None:
+        formato = os.path.splitext(nome)[1].lstrip('.').lower()
+    return formato, comprimir
+
+
+def _executar(conn, fonte):
+    if fonte in app._RELATORIOS:
+        return conn.execute(app._consulta_relatorio(fonte), app._parametros_relatorio(fonte))
+    consulta = _CONSULTAS[fonte]
+    if fonte == 'historico' and app._anexar_arquivo(conn):
+        consulta += _HISTORICO_ARQUIVADO
+    return conn.execute(consulta)
+
+
+def _escrever(saida, cursor, formato, tamanho_lote, progresso, intervalo_progresso):
+    colunas = [descricao[0] for descricao in cursor.description]
+    if formato == 'csv':
+        escritor = csv.writer(saida)
+        escritor.writerow(colunas)
+        gravar = escritor.writerows
+    else:
+        def gravar(lote):
+            saida.writelines(
+                json.dumps(dict(zip(colunas, linha)), ensure_ascii=False) + '\n' for linha in lote
+            )
+
+    linhas = 0
+    proximo_aviso = intervalo_progresso
+    while True:
+        lote = cursor.fetchmany(tamanho_lote)
+        if not lote:
+            break
+        gravar(lote)
+        linhas += len(lote)
+        if progresso is not None and linhas >= proximo_aviso:
+            progresso(linhas)
+            proximo_aviso = linhas + intervalo_progresso
+    return linhas
+
+
+def exportar(fonte, destino, formato=None, comprimir=None, progresso=None,
+             intervalo_progresso=INTERVALO_PROGRESSO_PADRAO, tamanho_lote=app.TAMANHO_LOTE_PADRAO):
+    # formato e compressão saem da extensão do destino (.csv, .jsonl, .gz)
+    # quando não são informados. progresso(linhas) é chamado a cada
+    # intervalo_progresso linhas e ao final.
+    if fonte not in FONTES:
+        return {"success": False, "message": "Fonte de exportação inválida"}
+    formato, comprimir = _formato(destino, formato, comprimir)
+    if formato not in FORMATOS:
+        return {"success": False, "message": "Formato inválido"}
+
+    diretorio = os.path.dirname(os.path.abspath(destino))
+    temporario = None
+    conn = app.connect_db(somente_leitura=True)
+    try:
+        descritor, temporario = tempfile.mkstemp(prefix='.exportacao-', dir=diretorio)
+        os.close(descritor)
+        cursor = _executar(conn, fonte)
+        if comprimir:
+            saida = gzip.open(temporario, 'wt', compresslevel=NIVEL_GZIP, encoding='utf-8', newline='')
+        else:
+            saida = open(temporario, 'w', encoding='utf-8', newline='')
+        with saida:
+            linhas = _escrever(saida, cursor, formato, tamanho_lote, progresso, intervalo_progresso)
+        cursor.close()
+        with open(temporario, 'rb') as arquivo:
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, destino)
+        if progresso is not None:
+            progresso(linhas)
+        return {"success": True, "linhas": linhas, "arquivo": destino}
+    except sqlite3.Error as e:
+        return {"success": False, "message": f"Erro de banco de dados: {str(e)}"}
+    except OSError as e:
+        return {"success": False, "message": f"Erro ao gravar arquivo: {str(e)}"}
+    finally:
+        conn.close()
+        if temporario is not None and os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('fonte', choices=FONTES)
+    parser.add_argument('destino')
+    parser.add_argument('--formato', choices=FORMATOS)
+    parser.add_argument('--banco')
+    args = parser.parse_args(argv)
+
+    if args.banco:
+        app.configurar_db(caminho=args.banco)
+    resultado = exportar(
+        args.fonte, args.destino, formato=args.formato,
+        progresso=lambda linhas: print(f"{linhas} linhas", flush=True),
+    )
+    if not resultado["success"]:
+        raise SystemExit(resultado["message"])
+
+
+if __name__ == '__main__':
+    main()
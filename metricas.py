@@ -0,0 +1,354 @@
+import functools
+import sqlite3
+import threading
+import time
+
+
+# Métricas por operação pública de app.py: chamadas, histograma de latência,
+# comandos SQL executados, linhas lidas e resultado por mensagem. Desativadas,
+# custam uma leitura de variável global por chamada.
+
+LIMITES_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_ativo = False
+_observadores = []
+_instrumentar = False
+_contexto = threading.local()
+
+
+def ativo():
+    return _ativo
+
+
+def instrumentacao_ativa():
+    # Cursores instrumentados são usados se as métricas estiverem ativas ou se
+    # houver algum observador de comandos (ex.: consultas_lentas).
+    return _instrumentar
+
+
+def _atualizar_instrumentacao():
+    global _instrumentar
+    _instrumentar = _ativo or bool(_observadores)
+
+
+def ativar():
+    global _ativo
+    _ativo = True
+    _atualizar_instrumentacao()
+
+
+def desativar():
+    global _ativo
+    _ativo = False
+    _atualizar_instrumentacao()
+
+
+def registrar_observador(observador):
+    # observador(conn, sql, parametros, segundos, operacao) é chamado ao fim de
+    # cada comando executado por um cursor instrumentado.
+    if observador not in _observadores:
+        _observadores.append(observador)
+    _atualizar_instrumentacao()
+
+
+def remover_observador(observador):
+    if observador in _observadores:
+        _observadores.remove(observador)
+    _atualizar_instrumentacao()
+
+
+class Histograma:
+
+    def __init__(self):
+        self.buckets = [0] * (len(LIMITES_SEGUNDOS) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, segundos):
+        self.soma += segundos
+        self.total += 1
+        for posicao, limite in enumerate(LIMITES_SEGUNDOS):
+            if segundos <= limite:
+                self.buckets[posicao] += 1
+                return
+        self.buckets[-1] += 1
+
+    def acumulado(self):
+        # Contagens cumulativas por limite superior, como no formato Prometheus.
+        total = 0
+        for limite, quantidade in zip(LIMITES_SEGUNDOS + (float('inf'),), self.buckets):
+            total += quantidade
+            yield limite, total
+
+    def como_dict(self):
+        return {
+            "total": self.total,
+            "soma_segundos": self.soma,
+            "buckets": {('+Inf' if limite == float('inf') else str(limite)): total for limite, total in self.acumulado()},
+        }
+
+
+class MetricasOperacao:
+
+    def __init__(self):
+        self.latencia = Histograma()
+        self.comandos = 0
+        self.linhas = 0
+        self.sucessos = 0
+        self.falhas = {}
+
+    def como_dict(self):
+        return {
+            "chamadas": self.latencia.total,
+            "latencia": self.latencia.como_dict(),
+            "comandos": self.comandos,
+            "linhas": self.linhas,
+            "sucessos": self.sucessos,
+            "falhas": dict(self.falhas),
+        }
+
+
+class RegistroMetricas:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.limpar()
+
+    def limpar(self):
+        with self._lock:
+            self.operacoes = {}
+            self.aquisicao_conexao = Histograma()
+
+    def registrar_operacao(self, nome, segundos, comandos, linhas, resultado):
+        sucesso, mensagem = _classificar(resultado)
+        with self._lock:
+            metricas = self.operacoes.get(nome)
+            if metricas is None:
+                metricas = self.operacoes[nome] = MetricasOperacao()
+            metricas.latencia.observar(segundos)
+            metricas.comandos += comandos
+            metricas.linhas += linhas
+            if sucesso:
+                metricas.sucessos += 1
+            else:
+                metricas.falhas[mensagem] = metricas.falhas.get(mensagem, 0) + 1
+
+    def registrar_conexao(self, segundos):
+        with self._lock:
+            self.aquisicao_conexao.observar(segundos)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "operacoes": {nome: metricas.como_dict() for nome, metricas in self.operacoes.items()},
+                "aquisicao_conexao": self.aquisicao_conexao.como_dict(),
+            }
+
+    def prometheus(self):
+        with self._lock:
+            linhas = []
+            linhas.append('# HELP biblioteca_operacao_duracao_segundos Latência das operações de app.py.')
+            linhas.append('# TYPE biblioteca_operacao_duracao_segundos histogram')
+            for nome, metricas in sorted(self.operacoes.items()):
+                linhas.extend(_linhas_histograma('biblioteca_operacao_duracao_segundos', metricas.latencia, operacao=nome))
+            for metrica, ajuda, atributo in (
+                ('biblioteca_operacao_comandos_total', 'Comandos SQL executados.', 'comandos'),
+                ('biblioteca_operacao_linhas_total', 'Linhas lidas do banco.', 'linhas'),
+            ):
+                linhas.append(f'# HELP {metrica} {ajuda}')
+                linhas.append(f'# TYPE {metrica} counter')
+                for nome, metricas in sorted(self.operacoes.items()):
+                    linhas.append(f'{metrica}{_rotulos(operacao=nome)} {getattr(metricas, atributo)}')
+            linhas.append('# HELP biblioteca_operacao_resultados_total Resultados por operação e mensagem de falha.')
+            linhas.append('# TYPE biblioteca_operacao_resultados_total counter')
+            for nome, metricas in sorted(self.operacoes.items()):
+                linhas.append(f'biblioteca_operacao_resultados_total{_rotulos(operacao=nome, resultado="sucesso")} {metricas.sucessos}')
+                for mensagem, total in sorted(metricas.falhas.items()):
+                    rotulos = _rotulos(operacao=nome, resultado="falha", mensagem=mensagem)
+                    linhas.append(f'biblioteca_operacao_resultados_total{rotulos} {total}')
+            linhas.append('# HELP biblioteca_conexao_aquisicao_segundos Tempo para obter uma conexão em connect_db.')
+            linhas.append('# TYPE biblioteca_conexao_aquisicao_segundos histogram')
+            linhas.extend(_linhas_histograma('biblioteca_conexao_aquisicao_segundos', self.aquisicao_conexao))
+            return '\n'.join(linhas) + '\n'
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _rotulos(**rotulos):
+    if not rotulos:
+        return ''
+    return '{' + ','.join(f'{chave}="{_escapar(valor)}"' for chave, valor in rotulos.items()) + '}'
+
+
+def _linhas_histograma(metrica, histograma, **rotulos):
+    for limite, total in histograma.acumulado():
+        le = '+Inf' if limite == float('inf') else repr(limite)
+        yield f'{metrica}_bucket{_rotulos(**rotulos, le=le)} {total}'
+    yield f'{metrica}_sum{_rotulos(**rotulos)} {histograma.soma}'
+    yield f'{metrica}_count{_rotulos(**rotulos)} {histograma.total}'
+
+
+def _classificar(resultado):
+    # Mensagens de sucesso podem conter dados (datas de devolução), então só as
+    # falhas são agrupadas por mensagem.
+    if isinstance(resultado, dict):
+        return bool(resultado.get("success")), resultado.get("message", "")
+    if isinstance(resultado, str):
+        return "sucesso" in resultado, resultado
+    return True, None
+
+
+registro = RegistroMetricas()
+
+
+def snapshot():
+    return registro.snapshot()
+
+
+def prometheus():
+    return registro.prometheus()
+
+
+def limpar():
+    registro.limpar()
+
+
+def instrumentado(funcao):
+    nome = funcao.__name__
+
+    @functools.wraps(funcao)
+    def envolvida(*args, **kwargs):
+        if not _instrumentar:
+            return funcao(*args, **kwargs)
+
+        pilha = getattr(_contexto, 'pilha', None)
+        if pilha is None:
+            pilha = _contexto.pilha = []
+        # nome, comandos, linhas, cursores com comando ainda não finalizado
+        contexto = [nome, 0, 0, []]
+        pilha.append(contexto)
+        inicio = time.perf_counter()
+        resultado = None
+        try:
+            resultado = funcao(*args, **kwargs)
+            return resultado
+        finally:
+            duracao = time.perf_counter() - inicio
+            for cursor in contexto[3]:
+                cursor._finalizar()
+            pilha.pop()
+            if _ativo:
+                registro.registrar_operacao(nome, duracao, contexto[1], contexto[2], resultado)
+
+    return envolvida
+
+
+def operacao_atual():
+    pilha = getattr(_contexto, 'pilha', None)
+    return pilha[-1][0] if pilha else None
+
+
+def _contexto_atual():
+    pilha = getattr(_contexto, 'pilha', None)
+    return pilha[-1] if pilha else None
+
+
+def _contar(comandos=0, linhas=0):
+    contexto = _contexto_atual()
+    if contexto is not None:
+        contexto[1] += comandos
+        contexto[2] += linhas
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    # Usado pelas conexões de connect_db enquanto a instrumentação está ativa.
+    # O tempo de um comando soma o execute() e as leituras seguintes, até o
+    # cursor se esgotar, executar outro comando ou a operação terminar.
+
+    _comando = None
+
+    def _iniciar(self, sql, parametros, segundos):
+        if not _observadores:
+            return
+        self._comando = [sql, parametros, segundos]
+        contexto = _contexto_atual()
+        if contexto is not None:
+            contexto[3].append(self)
+
+    def _acumular(self, inicio):
+        if self._comando is not None:
+            self._comando[2] += time.perf_counter() - inicio
+
+    def _finalizar(self):
+        comando = self._comando
+        if comando is None:
+            return
+        self._comando = None
+        operacao = operacao_atual()
+        for observador in list(_observadores):
+            try:
+                observador(self.connection, comando[0], comando[1], comando[2], operacao)
+            except Exception:
+                # Um observador com defeito nunca derruba a operação.
+                pass
+
+    def execute(self, sql, parametros=()):
+        self._finalizar()
+        _contar(comandos=1)
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, parametros)
+        finally:
+            self._iniciar(sql, parametros, time.perf_counter() - inicio)
+
+    def executemany(self, sql, parametros):
+        self._finalizar()
+        _contar(comandos=1)
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, parametros)
+        finally:
+            self._iniciar(sql, None, time.perf_counter() - inicio)
+            self._finalizar()
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        linha = super().fetchone()
+        self._acumular(inicio)
+        if linha is None:
+            self._finalizar()
+        else:
+            _contar(linhas=1)
+        return linha
+
+    def fetchmany(self, size=None):
+        tamanho = self.arraysize if size is None else size
+        inicio = time.perf_counter()
+        linhas = super().fetchmany(tamanho)
+        self._acumular(inicio)
+        _contar(linhas=len(linhas))
+        if len(linhas) < tamanho:
+            self._finalizar()
+        return linhas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        linhas = super().fetchall()
+        self._acumular(inicio)
+        _contar(linhas=len(linhas))
+        self._finalizar()
+        return linhas
+
+    def __next__(self):
+        inicio = time.perf_counter()
+        try:
+            linha = super().__next__()
+        except StopIteration:
+            self._acumular(inicio)
+            self._finalizar()
+            raise
+        self._acumular(inicio)
+        _contar(linhas=1)
+        return linha
@@ -0,0 +1,430 @@
+import argparse
+import collections
+import json
+import math
+import re
+import selectors
+import socket
+import threading
+import time
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import app
+import metricas
+
+
+# Servidor HTTP/JSON sobre as operações de app.py, só com a biblioteca padrão.
+#
+#   python servidor.py --porta 8000 --workers 8 --db biblioteca.db
+
+WORKERS_PADRAO = 8
+KEEP_ALIVE_PADRAO = 15
+LIMITES_LATENCIA_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class LatenciaRotas:
+    # Contagem, soma, máximo e histograma cumulativo de latência por rota.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rotas = {}
+
+    def registrar(self, rota, segundos):
+        ms = segundos * 1000
+        with self._lock:
+            dados = self._rotas.get(rota)
+            if dados is None:
+                dados = self._rotas[rota] = {
+                    "requisicoes": 0, "total_ms": 0.0, "max_ms": 0.0, "buckets": [0] * (len(LIMITES_LATENCIA_MS) + 1),
+                }
+            dados["requisicoes"] += 1
+            dados["total_ms"] += ms
+            dados["max_ms"] = max(dados["max_ms"], ms)
+            for posicao, limite in enumerate(LIMITES_LATENCIA_MS):
+                if ms <= limite:
+                    break
+            else:
+                posicao = len(LIMITES_LATENCIA_MS)
+            dados["buckets"][posicao] += 1
+
+    def resumo(self):
+        with self._lock:
+            resumo = {}
+            for rota, dados in self._rotas.items():
+                buckets = {f"<={limite}ms": total for limite, total in zip(LIMITES_LATENCIA_MS, dados["buckets"])}
+                buckets[f">{LIMITES_LATENCIA_MS[-1]}ms"] = dados["buckets"][-1]
+                resumo[rota] = {
+                    "requisicoes": dados["requisicoes"],
+                    "media_ms": dados["total_ms"] / dados["requisicoes"],
+                    "max_ms": dados["max_ms"],
+                    "buckets": buckets,
+                }
+            return resumo
+
+
+def _resultado_usuario(mensagem):
+    # cadastrar_usuario devolve só a mensagem; a API sempre responde com o dicionário.
+    return {"success": mensagem == "Usuário cadastrado com sucesso", "message": mensagem}
+
+
+def _inteiro(valor):
+    return int(valor) if valor is not None else None
+
+
+def _data(valor):
+    return date.fromisoformat(valor) if valor is not None else None
+
+
+ROTAS = [
+    ('POST', r'/usuarios', 'cadastrar_usuario',
+     lambda m, corpo, q: _resultado_usuario(app.cadastrar_usuario(
+         corpo.get('nome'), corpo.get('cpf'), corpo.get('email'), corpo.get('telefone')))),
+    ('POST', r'/usuarios/lote', 'cadastrar_usuarios_em_lote',
+     lambda m, corpo, q: app.cadastrar_usuarios_em_lote(corpo)),
+    ('PATCH', r'/usuarios/(\d+)', 'atualizar_usuario',
+     lambda m, corpo, q: app.atualizar_usuario(
+         int(m[1]), nome=corpo.get('nome'), email=corpo.get('email'), telefone=corpo.get('telefone'))),
+    ('GET', r'/usuarios/(\d+)/historico', 'consultar_historico',
+     lambda m, corpo, q: app.consultar_historico(
+         int(m[1]), inicio=_data(q.get('inicio', [None])[0]), fim=_data(q.get('fim', [None])[0]),
+         apenas_abertos=q.get('abertos', ['0'])[0] in ('1', 'true'), ordem=q.get('ordem', ['desc'])[0],
+         tamanho_pagina=_inteiro(q.get('tamanho_pagina', [None])[0]), cursor=q.get('cursor', [None])[0])),
+    ('POST', r'/livros', 'cadastrar_livro',
+     lambda m, corpo, q: app.cadastrar_livro(
+         corpo.get('titulo'), corpo.get('autor'), corpo.get('isbn'), corpo.get('categoria'),
+         exemplares=corpo.get('exemplares', 1))),
+    ('POST', r'/livros/lote', 'cadastrar_livros_em_lote',
+     lambda m, corpo, q: app.cadastrar_livros_em_lote(corpo)),
+    ('POST', r'/livros/(\d+)/exemplares', 'adicionar_exemplares',
+     lambda m, corpo, q: app.adicionar_exemplares(int(m[1]), corpo.get('quantidade'))),
+    ('DELETE', r'/livros/(\d+)', 'remover_livro',
+     lambda m, corpo, q: app.remover_livro(int(m[1]))),
+    ('GET', r'/livros/(\d+)/disponibilidade', 'consultar_disponibilidade',
+     lambda m, corpo, q: app.consultar_disponibilidade(int(m[1]))),
+    ('GET', r'/livros/busca', 'buscar_livros',
+     lambda m, corpo, q: app.buscar_livros(
+         q.get('q', [''])[0], categoria=q.get('categoria', [None])[0],
+         apenas_disponiveis=q.get('disponiveis', ['0'])[0] in ('1', 'true'),
+         limite=int(q.get('limite', [app.TAMANHO_BUSCA_PADRAO])[0]), cursor=q.get('cursor', [None])[0])),
+    ('GET', r'/livros/sugestoes', 'autocompletar',
+     lambda m, corpo, q: app.autocompletar(
+         q.get('q', [''])[0], limite=int(q.get('limite', [app.TAMANHO_SUGESTOES_PADRAO])[0]))),
+    ('POST', r'/emprestimos', 'emprestar_livro',
+     lambda m, corpo, q: app.emprestar_livro(_inteiro(corpo.get('usuario_id')), _inteiro(corpo.get('livro_id')))),
+    ('POST', r'/devolucoes', 'devolver_livro',
+     lambda m, corpo, q: app.devolver_livro(_inteiro(corpo.get('usuario_id')), _inteiro(corpo.get('livro_id')))),
+    ('POST', r'/emprestimos/lote', 'emprestar_livros',
+     lambda m, corpo, q: app.emprestar_livros(
+         _inteiro(corpo.get('usuario_id')), [_inteiro(i) for i in corpo.get('livro_ids') or []],
+         tudo_ou_nada=bool(corpo.get('tudo_ou_nada')))),
+    ('POST', r'/devolucoes/lote', 'devolver_livros',
+     lambda m, corpo, q: app.devolver_livros(
+         [(_inteiro(i.get('usuario_id')), _inteiro(i.get('livro_id'))) for i in corpo.get('itens') or []],
+         tudo_ou_nada=bool(corpo.get('tudo_ou_nada')))),
+    ('POST', r'/renovacoes', 'renovar_emprestimo',
+     lambda m, corpo, q: app.renovar_emprestimo(_inteiro(corpo.get('usuario_id')), _inteiro(corpo.get('livro_id')))),
+    ('GET', r'/atrasos', 'consultar_atrasos',
+     lambda m, corpo, q: app.consultar_atrasos(_data(q.get('data', [None])[0]))),
+    ('GET', r'/vencimentos', 'consultar_vencimentos',
+     lambda m, corpo, q: app.consultar_vencimentos(
+         int(q.get('dias', [7])[0]), _data(q.get('data', [None])[0]))),
+    ('GET', r'/resumo', 'consultar_resumo',
+     lambda m, corpo, q: app.consultar_resumo()),
+    ('GET', r'/relatorios/(\w+)', 'gerar_relatorio', None),
+    ('GET', r'/metricas', 'metricas', None),
+]
+
+_ROTAS_COMPILADAS = [(metodo, re.compile(padrao + r'/?'), nome, acao) for metodo, padrao, nome, acao in ROTAS]
+
+
+def _status(resultado):
+    if resultado.get("success"):
+        return 200
+    if "não encontrado" in resultado.get("message", ""):
+        return 404
+    return 400
+
+
+class ManipuladorBiblioteca(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'Biblioteca/1.0'
+    # Tempo máximo de espera por uma nova requisição numa conexão keep-alive.
+    timeout = KEEP_ALIVE_PADRAO
+
+    def log_message(self, formato, *args):
+        if self.server.registrar_acessos:
+            super().log_message(formato, *args)
+
+    def do_GET(self):
+        self._despachar('GET')
+
+    def do_POST(self):
+        self._despachar('POST')
+
+    def do_PATCH(self):
+        self._despachar('PATCH')
+
+    def do_DELETE(self):
+        self._despachar('DELETE')
+
+    def _despachar(self, metodo):
+        inicio = time.perf_counter()
+        url = urlsplit(self.path)
+        nome = 'nao_encontrado'
+        try:
+            # O corpo é sempre consumido, para não corromper a próxima
+            # requisição da mesma conexão keep-alive.
+            try:
+                corpo = self._ler_corpo()
+            except ValueError:
+                self._responder(400, {"success": False, "message": "JSON inválido"})
+                return
+            for metodo_rota, padrao, nome_rota, acao in _ROTAS_COMPILADAS:
+                encontrado = padrao.fullmatch(url.path)
+                if encontrado and metodo_rota == metodo:
+                    nome = nome_rota
+                    self._executar(nome, encontrado, acao, corpo, parse_qs(url.query))
+                    break
+            else:
+                self._responder(404, {"success": False, "message": "Rota não encontrada"})
+        finally:
+            self.server.latencias.registrar(nome, time.perf_counter() - inicio)
+
+    def _ler_corpo(self):
+        tamanho = int(self.headers.get('Content-Length') or 0)
+        if not tamanho:
+            return {}
+        return json.loads(self.rfile.read(tamanho))
+
+    def _executar(self, nome, encontrado, acao, corpo, query):
+        try:
+            if nome == 'metricas':
+                self._metricas(query)
+                return
+            if nome == 'gerar_relatorio':
+                self._relatorio(encontrado[1], query)
+                return
+            resultado = acao(encontrado, corpo, query)
+        except (ValueError, TypeError, AttributeError):
+            self._responder(400, {"success": False, "message": "Requisição inválida"})
+            return
+        except Exception:
+            # Qualquer outra falha vira 500 (com o traceback no stderr, como
+            # faria o socketserver) em vez de fechar a conexão sem resposta.
+            self.server.handle_error(self.request, self.client_address)
+            self._responder(500, {"success": False, "message": "Erro interno do servidor"})
+            return
+        self._responder(_status(resultado), resultado)
+
+    def _metricas(self, query):
+        if query.get('formato', [''])[0] == 'prometheus':
+            dados = metricas.prometheus().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+            return
+        self._responder(200, {
+            "success": True,
+            "latencia": self.server.latencias.resumo(),
+            "operacoes": metricas.snapshot() if metricas.ativo() else None,
+        })
+
+    def _relatorio(self, tipo, query):
+        if 'tamanho_pagina' in query or 'cursor' in query:
+            resultado = app.gerar_relatorio_paginado(
+                tipo,
+                tamanho_pagina=int(query.get('tamanho_pagina', [app.TAMANHO_PAGINA_PADRAO])[0]),
+                cursor=query.get('cursor', [None])[0],
+            )
+            self._responder(_status(resultado), resultado)
+            return
+
+        resultado = app.gerar_relatorio_stream(tipo)
+        if not resultado["success"]:
+            self._responder(400, resultado)
+            return
+
+        # Relatório completo: cada lote de linhas vai num chunk assim que é lido.
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        self._enviar_chunk(b'{"success": true, "data": [')
+        separador = b''
+        lote = []
+        for linha in resultado["data"]:
+            lote.append(separador + json.dumps(linha, ensure_ascii=False).encode())
+            separador = b','
+            if len(lote) >= app.TAMANHO_LOTE_PADRAO:
+                self._enviar_chunk(b''.join(lote))
+                lote = []
+        lote.append(b']}')
+        self._enviar_chunk(b''.join(lote))
+        self._enviar_chunk(b'')
+
+    def _enviar_chunk(self, dados):
+        self.wfile.write(f'{len(dados):X}\r\n'.encode() + dados + b'\r\n')
+
+    def _responder(self, status, corpo):
+        dados = json.dumps(corpo, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+
+class ServidorBiblioteca(HTTPServer):
+    # Atende cada requisição num pool fixo de workers; cada worker reutiliza a
+    # conexão SQLite da sua thread. Entre uma requisição e outra a conexão
+    # keep-alive não ocupa worker: fica num selector vigiado por uma thread
+    # própria, que a devolve ao pool quando chega a próxima requisição ou a
+    # fecha quando o keep-alive expira.
+
+    def __init__(self, endereco, workers=WORKERS_PADRAO, keep_alive=KEEP_ALIVE_PADRAO, registrar_acessos=False):
+        manipulador = type('Manipulador', (ManipuladorBiblioteca,), {'timeout': keep_alive})
+        super().__init__(endereco, manipulador)
+        self.workers = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http')
+        self.latencias = LatenciaRotas()
+        self.registrar_acessos = registrar_acessos
+        self._ociosas = selectors.DefaultSelector()
+        self._devolvidas = collections.deque()
+        self._despertar, self._aviso = socket.socketpair()
+        self._despertar.setblocking(False)
+        self._ociosas.register(self._despertar, selectors.EVENT_READ)
+        self._encerrando = False
+        self._vigia = threading.Thread(target=self._vigiar_ociosas, name='http-keep-alive', daemon=True)
+        self._vigia.start()
+
+    def process_request(self, request, client_address):
+        # O manipulador vive enquanto a conexão existir (rfile/wfile e o
+        # buffer de leitura), mas cada ida ao pool processa só o que já chegou.
+        manipulador = self.RequestHandlerClass.__new__(self.RequestHandlerClass)
+        manipulador.request, manipulador.client_address, manipulador.server = request, client_address, self
+        try:
+            manipulador.setup()
+        except Exception:
+            self.handle_error(request, client_address)
+            self.shutdown_request(request)
+            return
+        self.workers.submit(self._atender, manipulador)
+
+    def _atender(self, manipulador):
+        try:
+            while True:
+                manipulador.close_connection = True
+                manipulador.handle_one_request()
+                if manipulador.close_connection or not self._requisicao_no_buffer(manipulador):
+                    break
+        except Exception:
+            self.handle_error(manipulador.request, manipulador.client_address)
+            manipulador.close_connection = True
+        if manipulador.close_connection:
+            self._encerrar(manipulador)
+            return
+        self._devolvidas.append(manipulador)
+        self._aviso.send(b'\0')
+
+    @staticmethod
+    def _requisicao_no_buffer(manipulador):
+        # Requisições em pipeline podem já estar no buffer de rfile, onde o
+        # selector não as enxerga; o peek não bloqueia com o socket em modo
+        # não bloqueante.
+        manipulador.connection.setblocking(False)
+        try:
+            return bool(manipulador.rfile.peek(1))
+        except OSError:
+            return False
+        finally:
+            manipulador.connection.settimeout(manipulador.timeout)
+
+    def _encerrar(self, manipulador):
+        try:
+            manipulador.finish()
+        except OSError:
+            pass
+        self.shutdown_request(manipulador.request)
+
+    def _vigiar_ociosas(self):
+        prazos = {}
+        while True:
+            prazo = min(prazos.values(), default=math.inf)
+            espera = None if prazo == math.inf else max(prazo - time.monotonic(), 0)
+            for chave, _ in self._ociosas.select(espera):
+                if chave.fileobj is self._despertar:
+                    try:
+                        self._despertar.recv(4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                self._ociosas.unregister(chave.fileobj)
+                del prazos[chave.data]
+                self.workers.submit(self._atender, chave.data)
+            if self._encerrando:
+                break
+            while self._devolvidas:
+                manipulador = self._devolvidas.popleft()
+                self._ociosas.register(manipulador.connection, selectors.EVENT_READ, manipulador)
+                timeout = manipulador.timeout
+                prazos[manipulador] = math.inf if timeout is None else time.monotonic() + timeout
+            agora = time.monotonic()
+            for manipulador in [m for m, prazo in prazos.items() if prazo <= agora]:
+                self._ociosas.unregister(manipulador.connection)
+                del prazos[manipulador]
+                self._encerrar(manipulador)
+        for manipulador in prazos:
+            self._encerrar(manipulador)
+
+    def server_close(self):
+        super().server_close()
+        self._encerrando = True
+        self._aviso.send(b'\0')
+        self._vigia.join()
+        self.workers.shutdown(wait=True)
+        while self._devolvidas:
+            self._encerrar(self._devolvidas.popleft())
+        self._ociosas.close()
+        self._despertar.close()
+        self._aviso.close()
+
+
+def iniciar_em_segundo_plano(host='127.0.0.1', porta=0, **opcoes):
+    # Sobe o servidor numa thread; útil para testes com um cliente no mesmo processo.
+    servidor = ServidorBiblioteca((host, porta), **opcoes)
+    threading.Thread(target=servidor.serve_forever, name='servidor-biblioteca', daemon=True).start()
+    return servidor
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--porta', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=WORKERS_PADRAO)
+    parser.add_argument('--keep-alive', type=float, default=KEEP_ALIVE_PADRAO)
+    parser.add_argument('--db')
+    args = parser.parse_args(argv)
+
+    if args.db:
+        app.configurar_db(caminho=args.db)
+    app.create_tables()
+
+    servidor = ServidorBiblioteca(
+        (args.host, args.porta), workers=args.workers, keep_alive=args.keep_alive, registrar_acessos=True,
+    )
+    print(f"Servindo em http://{args.host}:{servidor.server_address[1]}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        app.fechar_conexoes()
+
+
+if __name__ == '__main__':
+    main()
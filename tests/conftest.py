@@ -3,3 +3,44 @@ import os
 
 # Adiciona o diretório pai do módulo app ao caminho de importação
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+import app
+
+
+def cpf_valido(numero):
+    # CPF de 11 dígitos com os dígitos verificadores corretos.
+    digitos = [int(d) for d in f"{numero % 10**9:09d}"]
+    for peso_inicial in (10, 11):
+        soma = sum(d * p for d, p in zip(digitos, range(peso_inicial, 1, -1)))
+        resto = soma * 10 % 11
+        digitos.append(0 if resto == 10 else resto)
+    return ''.join(map(str, digitos))
+
+
+def isbn13_valido(numero):
+    # ISBN-13 com prefixo 978 e dígito verificador correto.
+    corpo = f"978{numero % 10**9:09d}"
+    soma = sum(int(d) * (1 if i % 2 == 0 else 3) for i, d in enumerate(corpo))
+    return corpo + str((10 - soma % 10) % 10)
+
+
+@pytest.fixture
+def db_temporario(tmp_path):
+    # Aponta o app para um banco descartável e restaura a configuração original.
+    original = dict(app._config_db)
+    app.configurar_db(caminho=str(tmp_path / "biblioteca_teste.db"))
+    app.create_tables()
+    yield app._config_db["caminho"]
+    app.configurar_db(**original)
+
+
+@pytest.fixture
+def cadastrar_acervo(db_temporario):
+    # Cadastra a leitora Maria Souza (usuário 1) e os livros "Livro 0" a
+    # "Livro N-1" (ids 1 a N); com leitora=False, só os livros.
+    def cadastrar(livros, leitora=True):
+        if leitora:
+            app.cadastrar_usuario("Maria Souza", "12345678909", "maria@example.com", "11900000000")
+        app.cadastrar_livros_em_lote((f"Livro {i}", "Autor", isbn13_valido(i), "Geral") for i in range(livros))
+    return cadastrar
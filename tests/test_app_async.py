@@ -0,0 +1,136 @@
+import asyncio
+import sqlite3
+import threading
+import pytest
+from unittest.mock import patch
+import app
+from app_async import BibliotecaAsync
+
+
+def _rodar(corrotina):
+    return asyncio.run(corrotina)
+
+
+def test_operacao_async_devolve_mesmo_resultado(db_temporario):
+    async def cenario():
+        biblioteca = BibliotecaAsync(max_workers=2)
+        try:
+            await biblioteca.cadastrar_livro("Dom Casmurro", "Machado de Assis", "9780306406157", "Romance")
+            return await biblioteca.consultar_disponibilidade(1)
+        finally:
+            await biblioteca.fechar()
+
+    assert _rodar(cenario()) == {"success": True, "status": "Disponível", "disponiveis": 1, "total": 1}
+
+
+def test_fechar_nao_fecha_conexoes_de_outras_threads(db_temporario):
+    principal = app.connect_db()
+
+    async def cenario():
+        biblioteca = BibliotecaAsync(max_workers=3)
+        try:
+            return await asyncio.gather(*(biblioteca._executar(app.connect_db) for _ in range(6)))
+        finally:
+            await biblioteca.fechar()
+
+    do_executor = set(_rodar(cenario()))
+    try:
+        assert principal.execute('SELECT 1').fetchone() == (1,)
+        assert principal not in do_executor
+        for conn in do_executor:
+            with pytest.raises(sqlite3.ProgrammingError):
+                conn.execute('SELECT 1')
+    finally:
+        principal.close()
+
+
+def test_operacao_async_roda_fora_do_event_loop():
+    threads = []
+
+    def consultar(livro_id):
+        threads.append(threading.current_thread().name)
+        return {"success": True, "status": "Disponível"}
+
+    async def cenario():
+        biblioteca = BibliotecaAsync(max_workers=1)
+        try:
+            with patch("app.consultar_disponibilidade", consultar):
+                return await biblioteca.consultar_disponibilidade(1)
+        finally:
+            await biblioteca.fechar()
+
+    assert _rodar(cenario())["success"] is True
+    assert threads[0].startswith('biblioteca')
+
+
+def test_limite_de_operacoes_pendentes():
+    ativas = 0
+    pico = 0
+    lock = threading.Lock()
+    liberar = threading.Event()
+
+    def consultar(livro_id):
+        nonlocal ativas, pico
+        with lock:
+            ativas += 1
+            pico = max(pico, ativas)
+        liberar.wait(1)
+        with lock:
+            ativas -= 1
+        return {"success": True, "status": "Disponível"}
+
+    async def cenario():
+        biblioteca = BibliotecaAsync(max_workers=8, max_pendentes=3)
+        try:
+            with patch("app.consultar_disponibilidade", consultar):
+                tarefas = [asyncio.create_task(biblioteca.consultar_disponibilidade(i)) for i in range(10)]
+                await asyncio.sleep(0.05)
+                liberar.set()
+                return await asyncio.gather(*tarefas)
+        finally:
+            await biblioteca.fechar()
+
+    resultados = _rodar(cenario())
+    assert len(resultados) == 10
+    assert pico == 3
+
+
+def test_cancelamento_nao_interrompe_operacao_em_andamento():
+    iniciou = threading.Event()
+    concluidas = []
+
+    def emprestar(usuario_id, livro_id):
+        iniciou.set()
+        threading.Event().wait(0.1)
+        concluidas.append(livro_id)
+        return {"success": True, "message": "ok"}
+
+    async def cenario():
+        biblioteca = BibliotecaAsync(max_workers=1)
+        with patch("app.emprestar_livro", emprestar):
+            tarefa = asyncio.create_task(biblioteca.emprestar_livro(1, 1))
+            pendente = asyncio.create_task(biblioteca.emprestar_livro(1, 2))
+            await asyncio.get_running_loop().run_in_executor(None, iniciou.wait)
+            tarefa.cancel()
+            pendente.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await tarefa
+            with pytest.raises(asyncio.CancelledError):
+                await pendente
+            await biblioteca.fechar()
+
+    _rodar(cenario())
+    assert concluidas == [1]
+
+
+def test_gerar_relatorio_stream_async(cadastrar_acervo):
+    cadastrar_acervo(5, leitora=False)
+
+    async def cenario():
+        biblioteca = BibliotecaAsync(max_workers=2)
+        try:
+            return [linha async for linha in biblioteca.gerar_relatorio_stream('disponiveis', tamanho_pagina=2)]
+        finally:
+            await biblioteca.fechar()
+
+    assert _rodar(cenario()) == [(f"Livro {i}", 1, 1) for i in range(5)]
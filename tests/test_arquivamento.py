@@ -0,0 +1,116 @@
+import os
+import sqlite3
+from datetime import date
+import pytest
+import app
+from app import arquivar_emprestimos, caminho_arquivo, connect_db, consultar_historico
+
+HOJE = date(2024, 6, 1)
+
+
+@pytest.fixture
+def historico(cadastrar_acervo):
+    cadastrar_acervo(3)
+    app.cadastrar_usuario("João Lima", "98765432100", "joao@example.com", "11900000001")
+    conn = connect_db()
+    try:
+        conn.executemany('''
+            INSERT INTO emprestimos (usuario_id, livro_id, exemplar_id, data_emprestimo, data_devolucao, data_retorno)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (1, 1, 1, '2022-01-01', '2022-01-15', '2022-01-10'),
+            (1, 2, 2, '2023-03-01', '2023-03-15', '2023-03-20'),
+            (2, 1, 1, '2023-05-01', '2023-05-15', '2023-05-14'),
+            (1, 3, 3, '2024-04-01', '2024-04-15', '2024-04-12'),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+    app.emprestar_livro(2, 2)
+    yield
+    app.fechar_conexoes()
+    if os.path.exists(caminho_arquivo()):
+        os.remove(caminho_arquivo())
+
+
+def _ids(tabela):
+    conn = sqlite3.connect(caminho_arquivo() if tabela == 'arquivo' else app._config_db["caminho"])
+    try:
+        return sorted(linha[0] for linha in conn.execute('SELECT id FROM emprestimos'))
+    finally:
+        conn.close()
+
+
+def test_arquiva_encerrados_antigos(historico):
+    result = arquivar_emprestimos(meses=12, tamanho_lote=1, pausa_segundos=0, data=HOJE)
+
+    assert result == {"success": True, "arquivados": 3}
+    assert _ids('arquivo') == [1, 2, 3]
+    assert _ids('principal') == [4, 5]
+
+
+def test_historico_une_quente_e_arquivo(historico):
+    antes = consultar_historico(1)["historico"]
+
+    arquivar_emprestimos(meses=1, pausa_segundos=0, data=HOJE)
+
+    assert _ids('principal') == [5]
+    assert sorted(consultar_historico(1)["historico"]) == sorted(antes)
+    assert len(consultar_historico(2)["historico"]) == 2
+
+
+def test_lote_copiado_e_nao_removido_aparece_uma_vez(historico):
+    arquivar_emprestimos(meses=12, pausa_segundos=0, data=HOJE)
+    antes = consultar_historico(1)["historico"]
+    # Simula uma execução interrompida entre a cópia e a remoção.
+    conn = sqlite3.connect(app._config_db["caminho"])
+    conn.execute('ATTACH DATABASE ? AS arquivo', (caminho_arquivo(),))
+    conn.execute('INSERT INTO arquivo.emprestimos SELECT id, usuario_id, livro_id, exemplar_id, '
+                 'data_emprestimo, data_devolucao, data_retorno FROM main.emprestimos WHERE id = 4')
+    conn.commit()
+    conn.close()
+
+    assert sorted(consultar_historico(1)["historico"]) == sorted(antes)
+    assert arquivar_emprestimos(meses=1, pausa_segundos=0, data=HOJE) == {"success": True, "arquivados": 1}
+    assert _ids('arquivo') == [1, 2, 3, 4]
+
+
+def test_circulacao_continua_apos_arquivar(historico):
+    arquivar_emprestimos(meses=0, pausa_segundos=0, data=HOJE)
+
+    assert app.devolver_livro(2, 2)["success"]
+    assert app.emprestar_livro(1, 1)["success"]
+    assert app.consultar_resumo()["resumo"]["emprestimos_abertos"] == 1
+    conn = connect_db()
+    try:
+        assert 'arquivo' not in [linha[1] for linha in conn.execute('PRAGMA database_list')]
+    finally:
+        conn.close()
+
+
+def test_sem_arquivo_consulta_so_o_banco_principal(historico):
+    assert not os.path.exists(caminho_arquivo())
+    assert len(consultar_historico(1)["historico"]) == 3
+
+
+@pytest.mark.parametrize("meses", [-1, None, "3", 1.5, True])
+def test_meses_invalido(historico, meses):
+    assert arquivar_emprestimos(meses=meses) == {"success": False, "message": "Número de meses inválido"}
+
+
+@pytest.mark.parametrize("tamanho_lote", [0, -1, "10", 2.5])
+def test_tamanho_de_lote_invalido(historico, tamanho_lote):
+    result = arquivar_emprestimos(tamanho_lote=tamanho_lote)
+
+    assert result == {"success": False, "message": "Tamanho de lote inválido"}
+
+
+def test_selecao_usa_indice_de_retorno(historico):
+    conn = connect_db()
+    try:
+        plano = conn.execute(
+            'EXPLAIN QUERY PLAN SELECT id FROM main.emprestimos WHERE data_retorno < ? LIMIT ?', ('2024-01-01', 10),
+        ).fetchall()
+    finally:
+        conn.close()
+    assert 'idx_emprestimos_retorno' in plano[0][3]
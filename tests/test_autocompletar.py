@@ -0,0 +1,67 @@
+import pytest
+import app
+from app import autocompletar, IndiceSugestoes
+
+
+@pytest.fixture
+def catalogo(db_temporario):
+    app.cadastrar_usuario("Maria Souza", "12345678909", "maria@example.com", "11900000000")
+    app.cadastrar_livro("Memórias Póstumas de Brás Cubas", "Machado de Assis", "9780306406157", "Romance")
+    app.cadastrar_livro("Dom Casmurro", "Machado de Assis", "9788535910667", "Romance")
+    app.cadastrar_livro("Macunaíma", "Mário de Andrade", "9788572326971", "Romance")
+    app.cadastrar_livro("Memorial de Aires", "Machado de Assis", "9780000000019", "Romance")
+    for _ in range(2):
+        app.emprestar_livro(1, 4)
+        app.devolver_livro(1, 4)
+    app.emprestar_livro(1, 3)
+
+
+def test_sugestoes_ignoram_acentos_e_ordenam_por_circulacao(catalogo):
+    result = autocompletar("ME")
+
+    assert result == {"success": True, "sugestoes": ["Memorial de Aires", "Memórias Póstumas de Brás Cubas"]}
+
+
+def test_autor_soma_a_circulacao_dos_livros(catalogo):
+    # Machado de Assis: 2 empréstimos; Macunaíma: 1; Mário de Andrade: 1.
+    assert autocompletar("ma")["sugestoes"] == ["Machado de Assis", "Macunaíma", "Mário de Andrade"]
+    assert autocompletar("ma", limite=1)["sugestoes"] == ["Machado de Assis"]
+
+
+def test_indice_acompanha_cadastro_e_remocao(catalogo):
+    autocompletar("d")
+    app.cadastrar_livro("Dois Irmãos", "Milton Hatoum", "9780000000002", "Romance")
+    app.cadastrar_livros_em_lote([("Dom Quixote", "Miguel de Cervantes", "9780000000033", "Romance")])
+    app.remover_livro(2)
+
+    assert autocompletar("do")["sugestoes"] == ["Dois Irmãos", "Dom Quixote"]
+    assert autocompletar("machado")["sugestoes"] == ["Machado de Assis"]
+    app.remover_livro(1)
+    app.remover_livro(4)
+    assert autocompletar("machado")["sugestoes"] == []
+
+
+def test_remocao_desconta_a_circulacao_da_construcao(catalogo):
+    autocompletar("ma")
+    # Empréstimos depois da construção não entram no índice.
+    for _ in range(3):
+        app.emprestar_livro(1, 1)
+        app.devolver_livro(1, 1)
+    app.remover_livro(1)
+
+    # Machado de Assis continua com os 2 empréstimos de Memorial de Aires.
+    assert autocompletar("ma")["sugestoes"] == ["Machado de Assis", "Macunaíma", "Mário de Andrade"]
+
+
+def test_prefixo_vazio(catalogo):
+    assert autocompletar("  ") == {"success": True, "sugestoes": []}
+
+
+def test_faixas_grandes_sao_memorizadas_ate_a_proxima_alteracao():
+    indice = IndiceSugestoes.construir((i, f"Livro {i:05d}", "Autor", i) for i in range(3000))
+
+    assert indice.sugerir("livro", 2) == ["Livro 02999", "Livro 02998"]
+    assert indice.sugerir("livro", 2) is indice.sugerir("livro", 2)
+    indice.adicionar("Livro novo", 5000)
+    assert indice.sugerir("livro", 2) == ["Livro novo", "Livro 02999"]
+    assert len(indice) == 3002
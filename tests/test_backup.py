@@ -0,0 +1,118 @@
+import os
+import sqlite3
+import threading
+from datetime import date, timedelta
+import pytest
+import app
+import backup
+
+
+@pytest.fixture
+def acervo(cadastrar_acervo, tmp_path):
+    cadastrar_acervo(50)
+    app.emprestar_livro(1, 1)
+    yield str(tmp_path / "backups")
+    app.fechar_conexoes()
+
+
+def _consultar(caminho, sql):
+    conn = sqlite3.connect(caminho)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def test_backup_copia_o_banco(acervo):
+    result = backup.fazer_backup(acervo, paginas=1, pausa_segundos=0)
+
+    assert result["success"]
+    assert os.path.dirname(result["arquivo"]) == acervo
+    assert os.path.basename(result["arquivo"]).startswith("biblioteca_teste-")
+    assert _consultar(result["arquivo"], 'SELECT COUNT(*) FROM livros') == [(50,)]
+    assert _consultar(result["arquivo"], 'SELECT livro_id FROM emprestimos_abertos') == [(1,)]
+    assert _consultar(result["arquivo"], 'PRAGMA integrity_check') == [('ok',)]
+    assert os.listdir(acervo) == [os.path.basename(result["arquivo"])]
+
+
+def test_backup_inclui_o_arquivo(acervo):
+    app.devolver_livro(1, 1)
+    app.arquivar_emprestimos(meses=0, pausa_segundos=0, data=date.today() + timedelta(days=1))
+
+    primeiro = backup.fazer_backup(acervo, reter=1, pausa_segundos=0)
+    result = backup.fazer_backup(acervo, reter=1, pausa_segundos=0)
+
+    assert result["historico_arquivado"] == result["arquivo"][:-len(".db")] + "-arquivo.db"
+    assert _consultar(result["historico_arquivado"], 'SELECT livro_id FROM emprestimos') == [(1,)]
+    assert _consultar(result["arquivo"], 'SELECT COUNT(*) FROM emprestimos') == [(0,)]
+    assert result["removidos"] == [primeiro["arquivo"], primeiro["historico_arquivado"]]
+    assert sorted(os.listdir(acervo)) == sorted(
+        os.path.basename(caminho) for caminho in (result["arquivo"], result["historico_arquivado"]))
+
+
+def test_retem_os_ultimos(acervo):
+    arquivos = [backup.fazer_backup(acervo, reter=2, pausa_segundos=0)["arquivo"] for _ in range(3)]
+
+    assert sorted(os.path.join(acervo, nome) for nome in os.listdir(acervo)) == arquivos[1:]
+
+
+def test_retencao_informa_removidos(acervo):
+    primeiro = backup.fazer_backup(acervo, reter=1, pausa_segundos=0)["arquivo"]
+
+    assert backup.fazer_backup(acervo, reter=1, pausa_segundos=0)["removidos"] == [primeiro]
+
+
+def test_progresso_por_passo(acervo):
+    avisos = []
+
+    result = backup.fazer_backup(acervo, paginas=2, pausa_segundos=0, progresso=lambda *p: avisos.append(p))
+
+    assert len(avisos) == (result["paginas"] + 1) // 2
+    assert avisos[-1] == (result["paginas"], result["paginas"])
+
+
+def test_snapshot_consistente_com_escritas_concorrentes(acervo):
+    parar = threading.Event()
+
+    def circular():
+        while not parar.is_set():
+            app.emprestar_livro(1, 2)
+            app.devolver_livro(1, 2)
+        app.fechar_conexoes()
+
+    escritor = threading.Thread(target=circular)
+    escritor.start()
+    try:
+        result = backup.fazer_backup(acervo, paginas=1, pausa_segundos=0.001)
+    finally:
+        parar.set()
+        escritor.join()
+
+    assert result["success"]
+    # Os contadores mantidos por trigger batem com as tabelas do mesmo snapshot.
+    abertos = _consultar(result["arquivo"], 'SELECT COUNT(*) FROM emprestimos WHERE data_retorno IS NULL')
+    assert _consultar(result["arquivo"], "SELECT valor FROM resumo WHERE chave = 'emprestimos_abertos'") == abertos
+    assert _consultar(result["arquivo"], 'SELECT COUNT(*) FROM emprestimos_abertos') == abertos
+
+
+def test_agendamento_repete_ate_parar(acervo):
+    parar = threading.Event()
+    resultados = []
+
+    def concluir(resultado):
+        resultados.append(resultado)
+        if len(resultados) == 3:
+            parar.set()
+
+    backup.agendar_backups(0, parar=parar, ao_concluir=concluir, diretorio=acervo, reter=2, pausa_segundos=0)
+
+    assert [r["success"] for r in resultados] == [True, True, True]
+    assert len(os.listdir(acervo)) == 2
+
+
+@pytest.mark.parametrize("argumentos, mensagem", [
+    ({"reter": 0}, "Número de backups a reter inválido"),
+    ({"paginas": 0}, "Número de páginas por passo inválido"),
+])
+def test_parametros_invalidos(acervo, argumentos, mensagem):
+    assert backup.fazer_backup(acervo, **argumentos) == {"success": False, "message": mensagem}
@@ -2,12 +2,12 @@ import pytest
 import sqlite3
 from app import connect_db, create_tables
 
-def test_connect_db():
+def test_connect_db(db_temporario):
     conn = connect_db()
     assert isinstance(conn, sqlite3.Connection)
     conn.close()
 
-def test_create_tables():
+def test_create_tables(db_temporario):
     create_tables()
 
     conn = connect_db()
@@ -0,0 +1,86 @@
+import pytest
+import app
+from app import buscar_livros
+
+
+@pytest.fixture
+def catalogo(db_temporario):
+    app.cadastrar_usuario("Maria Souza", "12345678909", "maria@example.com", "11900000000")
+    app.cadastrar_livro("Memórias Póstumas de Brás Cubas", "Machado de Assis", "9780306406157", "Romance")
+    app.cadastrar_livro("Dom Casmurro", "Machado de Assis", "9788535910667", "Romance")
+    app.cadastrar_livro("Machado de Assis: uma biografia", "Lúcia Miguel Pereira", "9788572326971", "Biografia")
+    app.cadastrar_livro("A Máquina do Tempo", "H. G. Wells", "9780000000019", "Ficção")
+
+
+def _ids(result):
+    return [linha[0] for linha in result["data"]]
+
+
+def test_busca_ignora_acentos_e_maiusculas(catalogo):
+    assert _ids(buscar_livros("MAQUINA")) == [4]
+    assert _ids(buscar_livros("memorias bras")) == [1]
+
+
+def test_busca_ordena_por_relevancia(catalogo):
+    # "machado" no título pesa mais do que no autor.
+    result = buscar_livros("machado")
+
+    assert result["success"] is True
+    assert _ids(result)[0] == 3
+    assert sorted(_ids(result)) == [1, 2, 3]
+
+
+def test_busca_filtra_categoria_e_disponibilidade(catalogo):
+    app.emprestar_livro(1, 2)
+
+    assert sorted(_ids(buscar_livros("machado", categoria="Romance"))) == [1, 2]
+    assert _ids(buscar_livros("machado", categoria="Romance", apenas_disponiveis=True)) == [1]
+
+
+def test_busca_paginada_percorre_todos_os_resultados(catalogo):
+    vistos = []
+    cursor = None
+    while True:
+        result = buscar_livros("machado", limite=1, cursor=cursor)
+        vistos.extend(_ids(result))
+        cursor = result["proximo_cursor"]
+        if cursor is None:
+            break
+
+    assert vistos == _ids(buscar_livros("machado"))
+
+
+def test_indice_acompanha_cadastro_remocao_e_atualizacao(catalogo):
+    app.remover_livro(2)
+    conn = app.connect_db()
+    try:
+        conn.execute("UPDATE livros SET titulo = 'O Alienista' WHERE id = 1")
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert _ids(buscar_livros("casmurro")) == []
+    assert _ids(buscar_livros("memorias")) == []
+    assert _ids(buscar_livros("alienista")) == [1]
+
+
+def test_sintaxe_fts_e_tratada_como_texto(catalogo):
+    assert buscar_livros('"dom" OR NEAR(') == {"success": True, "data": [], "proximo_cursor": None}
+    assert _ids(buscar_livros('dom*')) == [2]
+
+
+@pytest.mark.parametrize("termo", ["", "   ", "!?", None])
+def test_termo_invalido(catalogo, termo):
+    assert buscar_livros(termo) == {"success": False, "message": "Termo de busca inválido"}
+
+
+def test_cursor_invalido(catalogo):
+    cursor = app.gerar_relatorio_paginado('disponiveis', tamanho_pagina=1)["proximo_cursor"]
+
+    assert buscar_livros("machado", cursor=cursor) == {"success": False, "message": "Cursor inválido"}
+    assert buscar_livros("machado", cursor="xyz") == {"success": False, "message": "Cursor inválido"}
+
+
+@pytest.mark.parametrize("limite", [0, -5, None, "10"])
+def test_limite_invalido(catalogo, limite):
+    assert buscar_livros("machado", limite=limite) == {"success": False, "message": "Limite inválido"}
@@ -0,0 +1,112 @@
+import sqlite3
+import threading
+import pytest
+import app
+from app import configurar_cache, consultar_disponibilidade, estatisticas_cache
+
+
+@pytest.fixture
+def cache(db_temporario):
+    app.cadastrar_usuario("Maria Souza", "12345678909", "maria@example.com", "11900000000")
+    app.cadastrar_livro("Dom Casmurro", "Machado de Assis", "9780306406157", "Romance")
+    app.cadastrar_livro("Iracema", "José de Alencar", "9788535910667", "Romance")
+    cache = configurar_cache(tamanho_maximo=1)
+    yield cache
+    configurar_cache(None)
+
+
+def test_cache_desativado_por_padrao():
+    assert estatisticas_cache() is None
+
+
+def test_consulta_repetida_usa_cache(cache):
+    consultar_disponibilidade(1)
+    result = consultar_disponibilidade(1)
+
+    assert result == {"success": True, "status": "Disponível", "disponiveis": 1, "total": 1}
+    assert estatisticas_cache()["acertos"] == 1
+    assert estatisticas_cache()["falhas"] == 1
+
+
+def test_emprestimo_e_devolucao_atualizam_cache(cache):
+    consultar_disponibilidade(1)
+
+    app.emprestar_livro(1, 1)
+    assert consultar_disponibilidade(1) == {"success": True, "status": "Emprestado", "disponiveis": 0, "total": 1}
+
+    app.devolver_livro(1, 1)
+    assert consultar_disponibilidade(1) == {"success": True, "status": "Disponível", "disponiveis": 1, "total": 1}
+    assert estatisticas_cache()["acertos"] == 2
+
+
+def test_remover_livro_invalida_cache(cache):
+    consultar_disponibilidade(1)
+
+    app.remover_livro(1)
+
+    assert consultar_disponibilidade(1) == {"success": False, "message": "Livro não encontrado"}
+
+
+def test_escrita_de_outra_thread_nao_descarta_cache(cache):
+    configurar_cache(tamanho_maximo=10)
+    consultar_disponibilidade(1)
+    consultar_disponibilidade(2)
+
+    emprestimo = threading.Thread(target=app.emprestar_livro, args=(1, 2))
+    emprestimo.start()
+    emprestimo.join()
+
+    assert consultar_disponibilidade(1)["status"] == "Disponível"
+    assert consultar_disponibilidade(2)["status"] == "Emprestado"
+    estatisticas = estatisticas_cache()
+    assert (estatisticas["acertos"], estatisticas["invalidacoes"]) == (2, 1)
+
+
+def test_atualizacoes_chegam_ao_cache_na_ordem_dos_commits(cache, monkeypatch):
+    consultar_disponibilidade(1)
+    em_atualizacao = threading.Event()
+    liberar = threading.Event()
+    atualizar = cache.atualizar
+
+    def atualizar_devagar(livro_id, status):
+        # Segura a atualização do empréstimo, já confirmado, enquanto a
+        # devolução tenta passar à frente.
+        if status[1] == 0:
+            em_atualizacao.set()
+            liberar.wait(5)
+        atualizar(livro_id, status)
+    monkeypatch.setattr(cache, 'atualizar', atualizar_devagar)
+
+    emprestimo = threading.Thread(target=app.emprestar_livro, args=(1, 1))
+    emprestimo.start()
+    assert em_atualizacao.wait(5)
+    devolucao = threading.Thread(target=app.devolver_livro, args=(1, 1))
+    devolucao.start()
+    devolucao.join(0.2)
+    liberar.set()
+    emprestimo.join()
+    devolucao.join()
+
+    assert consultar_disponibilidade(1) == {"success": True, "status": "Disponível", "disponiveis": 1, "total": 1}
+
+
+def test_escrita_de_outra_conexao_invalida_cache(cache, db_temporario):
+    consultar_disponibilidade(1)
+
+    externa = sqlite3.connect(db_temporario)
+    externa.execute("UPDATE exemplares SET status = 'Emprestado' WHERE livro_id = 1")
+    externa.commit()
+    externa.close()
+
+    assert consultar_disponibilidade(1) == {"success": True, "status": "Emprestado", "disponiveis": 0, "total": 1}
+
+
+def test_despejo_lru(cache):
+    consultar_disponibilidade(1)
+    consultar_disponibilidade(2)
+    consultar_disponibilidade(1)
+
+    estatisticas = estatisticas_cache()
+    assert estatisticas["itens"] == 1
+    assert estatisticas["despejos"] == 2
+    assert estatisticas["acertos"] == 0
@@ -6,7 +6,7 @@ from app import cadastrar_usuario
 
 def test_cadastrar_usuario_sucesso():
     nome = "João da Silva"
-    cpf = "12345678901"
+    cpf = "12345678909"
     email = "joao.silva@example.com"
     telefone = "(11) 91234-5678"
     
@@ -25,7 +25,7 @@ def test_cadastrar_usuario_sucesso():
 
 
 def test_cadastrar_usuario_campos_faltando():
-    result = cadastrar_usuario("", "12345678901", "joao.silva@example.com", "(11) 91234-5678")
+    result = cadastrar_usuario("", "12345678909", "joao.silva@example.com", "(11) 91234-5678")
     
     assert result == "Todos os campos são obrigatórios"
 
@@ -44,7 +44,7 @@ def test_cadastrar_usuario_cpf_invalido():
 
 def test_cadastrar_usuario_email_invalido():
     nome = "João da Silva"
-    cpf = "12345678901"
+    cpf = "12345678909"
     email = "joao.silvaexample.com"  
     telefone = "(11) 91234-5678"
     
@@ -56,7 +56,7 @@ def test_cadastrar_usuario_email_invalido():
 
 def test_cadastrar_usuario_erro_bd():
     nome = "João da Silva"
-    cpf = "12345678901"
+    cpf = "12345678909"
     email = "joao.silva@example.com"
     telefone = "(11) 91234-5678"
     
@@ -73,3 +73,9 @@ def test_cadastrar_usuario_erro_bd():
         
         assert result == "CPF ou e-mail já cadastrado"
 
+
+
+def test_cadastrar_usuario_cpf_com_digito_verificador_errado():
+    result = cadastrar_usuario("João da Silva", "123.456.789-01", "joao.silva@example.com", "(11) 91234-5678")
+
+    assert result == "CPF inválido"
@@ -0,0 +1,109 @@
+import csv
+import io
+import pytest
+from app import cadastrar_livros_em_lote, cadastrar_usuarios_em_lote, connect_db
+from tests.conftest import cpf_valido
+
+
+def _contar(tabela):
+    conn = connect_db()
+    try:
+        return conn.execute(f'SELECT COUNT(*) FROM {tabela}').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_cadastrar_livros_em_lote_sucesso(db_temporario):
+    registros = [
+        {"titulo": "Dom Casmurro", "autor": "Machado de Assis", "isbn": "9780306406157", "categoria": "Romance"},
+        ("Iracema", "José de Alencar", "9788535910667", "Romance"),
+    ]
+
+    result = cadastrar_livros_em_lote(registros)
+
+    assert result == {"success": True, "aceitos": 2, "rejeitados": []}
+    assert _contar('livros') == 2
+
+
+def test_cadastrar_livros_em_lote_rejeita_linhas_invalidas(db_temporario):
+    registros = [
+        ("Dom Casmurro", "Machado de Assis", "9780306406157", "Romance"),
+        ("Sem ISBN", "Autor", "123", "Romance"),
+        ("", "Autor", "9788535910667", "Romance"),
+        ("Dom Casmurro (cópia)", "Machado de Assis", "9780306406157", "Romance"),
+    ]
+
+    result = cadastrar_livros_em_lote(registros, tamanho_lote=2)
+
+    assert result["aceitos"] == 1
+    assert result["rejeitados"] == [
+        {"linha": 1, "motivo": "ISBN inválido"},
+        {"linha": 2, "motivo": "Todos os campos são obrigatórios"},
+        {"linha": 3, "motivo": "ISBN já cadastrado"},
+    ]
+
+
+def test_cadastrar_livros_em_lote_isbn_ja_existente_no_banco(db_temporario):
+    cadastrar_livros_em_lote([("Dom Casmurro", "Machado de Assis", "9780306406157", "Romance")])
+
+    result = cadastrar_livros_em_lote([("Outro", "Autor", "9780306406157", "Romance")])
+
+    assert result["aceitos"] == 0
+    assert result["rejeitados"] == [{"linha": 0, "motivo": "ISBN já cadastrado"}]
+
+
+def test_cadastrar_usuarios_em_lote_de_csv(db_temporario):
+    arquivo = io.StringIO(
+        "nome,cpf,email,telefone\n"
+        "Ana,12345678909,ana@example.com,11900000000\n"
+        "Bruno,111,bruno@example.com,11900000001\n"
+        "Carla,98765432100,carla-sem-arroba,11900000002\n"
+        "Ana de novo,12345678909,ana2@example.com,11900000003\n"
+    )
+
+    result = cadastrar_usuarios_em_lote(csv.DictReader(arquivo))
+
+    assert result["aceitos"] == 1
+    assert result["rejeitados"] == [
+        {"linha": 1, "motivo": "CPF inválido"},
+        {"linha": 2, "motivo": "E-mail inválido"},
+        {"linha": 3, "motivo": "CPF ou e-mail já cadastrado"},
+    ]
+    assert _contar('usuarios') == 1
+
+
+def test_cadastrar_usuarios_em_lote_gerador(db_temporario):
+    registros = (
+        (f"Leitor {i}", cpf_valido(i), f"leitor{i}@example.com", "11900000000")
+        for i in range(1, 2501)
+    )
+
+    result = cadastrar_usuarios_em_lote(registros, tamanho_lote=1000)
+
+    assert result["aceitos"] == 2500
+    assert _contar('usuarios') == 2500
+
+
+def test_erro_de_banco_recusa_so_as_linhas_pendentes(db_temporario):
+    cadastrar_usuarios_em_lote([("Ana", "12345678909", "ana@example.com", "11900000000")])
+    conn = connect_db()
+    conn.execute("""
+        CREATE TRIGGER falhar BEFORE INSERT ON usuarios WHEN NEW.nome = 'Falha'
+        BEGIN SELECT RAISE(ABORT, 'falha simulada'); END
+    """)
+    conn.commit()
+    conn.close()
+
+    result = cadastrar_usuarios_em_lote([
+        ("Ana de novo", "12345678909", "ana2@example.com", "11900000001"),
+        ("Bruno", cpf_valido(1), "bruno@example.com", "11900000002"),
+        ("Falha", cpf_valido(2), "falha@example.com", "11900000003"),
+    ])
+
+    assert result["aceitos"] == 0
+    assert result["rejeitados"] == [
+        {"linha": 0, "motivo": "CPF ou e-mail já cadastrado"},
+        {"linha": 1, "motivo": "Erro de banco de dados: falha simulada"},
+        {"linha": 2, "motivo": "Erro de banco de dados: falha simulada"},
+    ]
+    assert _contar('usuarios') == 1
@@ -0,0 +1,121 @@
+import pytest
+from datetime import date, timedelta
+import app
+from app import emprestar_livros, devolver_livros, connect_db
+from tests.conftest import isbn13_valido
+
+SUCESSO_EMPRESTIMO = f"Empréstimo realizado com sucesso. Data de devolução: {date.today() + timedelta(days=14)}"
+
+
+@pytest.fixture
+def acervo(cadastrar_acervo):
+    cadastrar_acervo(5)
+    app.cadastrar_usuario("João Lima", "98765432100", "joao@example.com", "11900000001")
+
+
+def _status():
+    conn = connect_db()
+    try:
+        return dict(conn.execute('SELECT id, status FROM livros'))
+    finally:
+        conn.close()
+
+
+def _mensagens(result):
+    return [(item["livro_id"], item["message"]) for item in result["itens"]]
+
+
+def test_emprestar_livros_melhor_esforco(acervo):
+    app.emprestar_livro(2, 3)
+
+    result = emprestar_livros(1, [1, 2, 3, 99, 1])
+
+    assert result["success"] is True
+    assert result["processados"] == 2
+    assert _mensagens(result) == [
+        (1, SUCESSO_EMPRESTIMO),
+        (2, SUCESSO_EMPRESTIMO),
+        (3, "O livro não está disponível"),
+        (99, "Livro não encontrado"),
+        (1, "O livro não está disponível"),
+    ]
+    assert _status() == {1: 'Emprestado', 2: 'Emprestado', 3: 'Emprestado', 4: 'Disponível', 5: 'Disponível'}
+    assert app.consultar_resumo()["resumo"]["emprestimos_abertos"] == 3
+
+
+def test_emprestar_livros_tudo_ou_nada(acervo):
+    result = emprestar_livros(1, [1, 2, 99], tudo_ou_nada=True)
+
+    assert result["success"] is False
+    assert result["message"] == "Lote cancelado: nenhum item foi processado"
+    assert _mensagens(result) == [
+        (1, "Não processado: lote cancelado"),
+        (2, "Não processado: lote cancelado"),
+        (99, "Livro não encontrado"),
+    ]
+    assert set(_status().values()) == {'Disponível'}
+
+
+def test_ids_em_texto_como_nas_operacoes_individuais(acervo):
+    assert app.emprestar_livro("1", "1")["success"] is True
+
+    result = emprestar_livros("1", ["2", "abc"])
+
+    assert _mensagens(result) == [(2, SUCESSO_EMPRESTIMO), ("abc", "Livro não encontrado")]
+    result = devolver_livros([("1", "1"), {"usuario_id": "1", "livro_id": "2"}])
+    assert [item["message"] for item in result["itens"]] == ["Devolução registrada com sucesso"] * 2
+    assert set(_status().values()) == {'Disponível'}
+
+
+def test_devolver_livros_confere_o_usuario(acervo):
+    emprestar_livros(1, [1, 2])
+    app.emprestar_livro(2, 3)
+
+    result = devolver_livros([(1, 1), {"usuario_id": 1, "livro_id": 3}, (1, 4), (1, 99), (1, 2)])
+
+    assert result["processados"] == 2
+    assert _mensagens(result) == [
+        (1, "Devolução registrada com sucesso"),
+        (3, "O livro não está registrado como emprestado para este usuário"),
+        (4, "O livro não está marcado como emprestado"),
+        (99, "Livro não encontrado"),
+        (2, "Devolução registrada com sucesso"),
+    ]
+    assert _status()[3] == 'Emprestado'
+    assert app.consultar_resumo()["resumo"]["emprestimos_abertos"] == 1
+
+
+def test_devolucao_sem_usuario_como_na_caixa_de_devolucao(acervo):
+    app.emprestar_livro(1, 1)
+    app.emprestar_livro(2, 2)
+
+    result = devolver_livros([{"livro_id": 1}, {"livro_id": 2}, {"livro_id": 2}])
+
+    assert [(item["usuario_id"], item["success"]) for item in result["itens"]] == [(1, True), (2, True), (None, False)]
+    assert set(_status().values()) == {'Disponível'}
+
+
+def test_devolver_livros_tudo_ou_nada(acervo):
+    emprestar_livros(1, [1, 2])
+
+    result = devolver_livros([(1, 1), (1, 5)], tudo_ou_nada=True)
+
+    assert result["success"] is False
+    assert _status()[1] == 'Emprestado'
+
+
+def test_lote_grande_e_dividido_em_partes(acervo):
+    app.cadastrar_livros_em_lote((f"Extra {i}", "Autor", isbn13_valido(10000 + i), "Geral") for i in range(1200))
+    livro_ids = list(range(1, 1206))
+
+    assert emprestar_livros(1, livro_ids)["processados"] == 1205
+    assert devolver_livros((None, livro_id) for livro_id in livro_ids)["processados"] == 1205
+
+
+@pytest.mark.parametrize("chamada", [
+    lambda: emprestar_livros(None, [1]),
+    lambda: emprestar_livros(1, []),
+    lambda: devolver_livros([]),
+])
+def test_lote_vazio_ou_sem_usuario(acervo, chamada):
+    assert chamada() == {"success": False, "message": "ID do usuário e do livro são obrigatórios"}
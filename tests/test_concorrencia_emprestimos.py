@@ -0,0 +1,89 @@
+import multiprocessing
+import random
+import sqlite3
+from collections import Counter
+from unittest.mock import patch
+import pytest
+import app
+
+ESCRITORES = 4
+LIVROS = 40
+CPFS = ("00000000191", "00000000272", "00000000353", "00000000434")
+
+
+def _disputar(caminho, usuario_id, semente):
+    # Cada processo tenta emprestar todos os livros, em ordem própria.
+    app.configurar_db(caminho=caminho, busy_timeout=100)
+    livros = list(range(1, LIVROS + 1))
+    random.Random(semente).shuffle(livros)
+    mensagens = Counter()
+    for livro_id in livros:
+        mensagem = app.emprestar_livro(usuario_id, livro_id)["message"]
+        mensagens["sucesso" if mensagem.startswith("Empréstimo realizado") else mensagem] += 1
+    app.fechar_conexoes()
+    return mensagens
+
+
+@pytest.fixture
+def acervo(db_temporario, cadastrar_acervo):
+    for i, cpf in enumerate(CPFS, start=1):
+        app.cadastrar_usuario(f"Leitor {i}", cpf, f"leitor{i}@example.com", "11900000000")
+    cadastrar_acervo(LIVROS, leitora=False)
+    return db_temporario
+
+
+def test_processos_concorrentes_nao_emprestam_o_mesmo_livro_duas_vezes(acervo):
+    contexto = multiprocessing.get_context('spawn')
+    with contexto.Pool(ESCRITORES) as pool:
+        resultados = pool.starmap(_disputar, [(acervo, i, i) for i in range(1, ESCRITORES + 1)])
+    total = sum(resultados, Counter())
+
+    assert total == {"sucesso": LIVROS, "O livro não está disponível": LIVROS * (ESCRITORES - 1)}
+    conn = app.connect_db()
+    try:
+        por_livro = conn.execute('SELECT livro_id, COUNT(*) FROM emprestimos GROUP BY livro_id').fetchall()
+    finally:
+        conn.close()
+    assert len(por_livro) == LIVROS
+    assert all(quantidade == 1 for _, quantidade in por_livro)
+
+
+def test_repete_transacao_quando_banco_esta_ocupado(db_temporario):
+    ocupado = sqlite3.OperationalError("database is locked")
+    ocupado.sqlite_errorcode = sqlite3.SQLITE_BUSY
+    transacao = iter([ocupado, ocupado, "ok"])
+
+    def tentar():
+        resultado = next(transacao)
+        if isinstance(resultado, Exception):
+            raise resultado
+        return resultado
+
+    conn = app.connect_db()
+    with patch("app.time.sleep") as dormir:
+        assert app._com_retentativas(conn, tentar) == "ok"
+    conn.close()
+    assert dormir.call_count == 2
+
+
+def test_desiste_apos_tentativas_ou_erro_que_nao_e_de_lock(db_temporario):
+    ocupado = sqlite3.OperationalError("database is locked")
+    ocupado.sqlite_errorcode = sqlite3.SQLITE_BUSY
+    outro = sqlite3.OperationalError("no such table: x")
+    chamadas = []
+
+    def sempre(erro):
+        def tentar():
+            chamadas.append(erro)
+            raise erro
+        return tentar
+
+    conn = app.connect_db()
+    with patch("app.time.sleep"):
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            app._com_retentativas(conn, sempre(ocupado))
+        with pytest.raises(sqlite3.OperationalError, match="no such table"):
+            app._com_retentativas(conn, sempre(outro))
+    conn.close()
+    assert chamadas.count(ocupado) == app.TENTATIVAS_ESCRITA
+    assert chamadas.count(outro) == 1
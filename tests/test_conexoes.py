@@ -0,0 +1,79 @@
+import threading
+import pytest
+import sqlite3
+from app import connect_db, fechar_conexoes
+
+
+def test_connect_db_reutiliza_conexao_na_mesma_thread(db_temporario):
+    conn1 = connect_db()
+    conn1.close()
+    conn2 = connect_db()
+    conn2.close()
+
+    assert conn1 is conn2
+
+
+def test_connect_db_conexoes_distintas_por_thread(db_temporario):
+    conexoes = []
+
+    def abrir():
+        conn = connect_db()
+        conexoes.append(conn)
+        conn.close()
+
+    thread = threading.Thread(target=abrir)
+    thread.start()
+    thread.join()
+    conn = connect_db()
+    conn.close()
+
+    assert conexoes[0] is not conn
+
+
+def test_connect_db_aplica_pragmas(db_temporario):
+    conn = connect_db()
+    try:
+        assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1
+    finally:
+        conn.close()
+
+
+def test_close_desfaz_transacao_pendente(db_temporario):
+    conn = connect_db()
+    conn.execute("INSERT INTO livros (titulo, autor, isbn, categoria, status) VALUES ('A', 'B', '9780306406157', 'C', 'Disponível')")
+    conn.close()
+
+    conn = connect_db()
+    try:
+        assert conn.execute('SELECT COUNT(*) FROM livros').fetchone()[0] == 0
+    finally:
+        conn.close()
+
+
+def test_fechar_conexoes_encerra_conexoes_abertas(db_temporario):
+    conn = connect_db()
+    conn.close()
+    fechar_conexoes()
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute('SELECT 1')
+
+    nova = connect_db()
+    nova.close()
+    assert nova is not conn
+
+
+def test_conexao_somente_leitura_separada_e_recusa_escrita(db_temporario):
+    escrita = connect_db()
+    leitura = connect_db(somente_leitura=True)
+    try:
+        assert leitura is not escrita
+        assert connect_db(somente_leitura=True) is leitura
+        leitura.close()
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            leitura.execute("DELETE FROM livros")
+    finally:
+        leitura.close()
+        escrita.close()
@@ -0,0 +1,93 @@
+import pytest
+import sqlite3
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import app
+from app import consultar_atrasos, consultar_vencimentos, connect_db
+
+
+@pytest.fixture
+def emprestimos(cadastrar_acervo):
+    cadastrar_acervo(4)
+    for livro_id in range(1, 5):
+        app.emprestar_livro(1, livro_id)
+
+
+def _abertos():
+    conn = connect_db()
+    try:
+        return conn.execute('SELECT livro_id FROM emprestimos_abertos ORDER BY livro_id').fetchall()
+    finally:
+        conn.close()
+
+
+def test_emprestimo_entra_e_devolucao_sai_dos_abertos(emprestimos):
+    assert _abertos() == [(1,), (2,), (3,), (4,)]
+
+    app.devolver_livro(1, 2)
+
+    assert _abertos() == [(1,), (3,), (4,)]
+
+
+def test_consultar_atrasos_por_data(emprestimos):
+    vencimento = datetime.now().date() + timedelta(days=14)
+
+    assert consultar_atrasos()["data"] == []
+    atrasados = consultar_atrasos(vencimento + timedelta(days=1))["data"]
+
+    assert [linha[1] for linha in atrasados] == ["Livro 0", "Livro 1", "Livro 2", "Livro 3"]
+    assert atrasados[0][2:] == (1, vencimento.isoformat())
+
+
+def test_renovacao_atualiza_vencimento(emprestimos):
+    vencimento = datetime.now().date() + timedelta(days=14)
+
+    app.renovar_emprestimo(1, 3)
+
+    atrasados = consultar_atrasos(vencimento + timedelta(days=1))["data"]
+    assert [linha[0] for linha in atrasados] == [1, 2, 4]
+
+
+def test_consultar_vencimentos(emprestimos):
+    hoje = datetime.now().date()
+    app.renovar_emprestimo(1, 1)
+
+    assert len(consultar_vencimentos(13)["data"]) == 0
+    assert [linha[0] for linha in consultar_vencimentos(14)["data"]] == [2, 3, 4]
+    assert [linha[0] for linha in consultar_vencimentos(7, hoje + timedelta(days=14))["data"]] == [2, 3, 4, 1]
+
+
+@pytest.mark.parametrize("dias", [-1, None, "7", 1.5, True])
+def test_consultar_vencimentos_dias_invalido(dias):
+    assert consultar_vencimentos(dias) == {"success": False, "message": "Número de dias inválido"}
+
+
+def test_relatorio_atraso_usa_apenas_emprestimos_abertos(emprestimos):
+    app.devolver_livro(1, 1)
+    depois = datetime.now() + timedelta(days=30)
+
+    with patch("app.datetime") as mock_datetime:
+        mock_datetime.now.return_value = depois
+        result = app.gerar_relatorio('atraso')
+
+    assert [linha[0] for linha in result["data"]] == ["Livro 1", "Livro 2", "Livro 3"]
+
+
+def test_reconstruir_emprestimos_abertos(emprestimos):
+    conn = connect_db()
+    conn.execute('DELETE FROM emprestimos_abertos')
+    conn.commit()
+    conn.close()
+
+    app.reconstruir_emprestimos_abertos()
+
+    assert _abertos() == [(1,), (2,), (3,), (4,)]
+
+
+def test_consultar_atrasos_erro_bd():
+    with patch("app.connect_db") as mock_connect_db:
+        mock_connect_db.return_value.execute.side_effect = sqlite3.Error("falhou")
+
+        result = consultar_atrasos()
+
+    assert result == {"success": False, "message": "Erro de banco de dados: falhou"}
@@ -14,7 +14,7 @@ def test_consultar_disponibilidade_sucesso():
         mock_conn.cursor.return_value = mock_cursor
 
         mock_cursor.execute.side_effect = [MagicMock()]
-        mock_cursor.fetchone.return_value = ['Disponível']
+        mock_cursor.fetchone.return_value = ['Disponível', 1, 1]
 
         result = consultar_disponibilidade(livro_id)
 
@@ -0,0 +1,74 @@
+import pytest
+import sqlite3
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import app
+from app import consultar_resumo, reparar_resumo, connect_db
+
+
+@pytest.fixture
+def circulacao(cadastrar_acervo):
+    cadastrar_acervo(5)
+    app.cadastrar_usuario("João Lima", "98765432100", "joao@example.com", "11900000001")
+    app.emprestar_livro(1, 1)
+    app.emprestar_livro(1, 2)
+    app.emprestar_livro(2, 3)
+
+
+def test_consultar_resumo(circulacao):
+    result = consultar_resumo()
+
+    assert result == {"success": True, "resumo": {
+        "livros_total": 5,
+        "livros_disponiveis": 2,
+        "livros_emprestados": 3,
+        "usuarios_total": 2,
+        "usuarios_ativos": 2,
+        "emprestimos_abertos": 3,
+        "atrasados": 0,
+    }}
+
+
+def test_resumo_acompanha_devolucao_e_remocao(circulacao):
+    app.devolver_livro(2, 3)
+    app.remover_livro(5)
+
+    resumo = consultar_resumo()["resumo"]
+
+    assert resumo["livros_total"] == 4
+    assert resumo["livros_disponiveis"] == 2
+    assert resumo["livros_emprestados"] == 2
+    assert resumo["usuarios_ativos"] == 1
+    assert resumo["emprestimos_abertos"] == 2
+
+
+def test_resumo_conta_atrasados(circulacao):
+    with patch("app.datetime") as mock_datetime:
+        mock_datetime.now.return_value = datetime.now() + timedelta(days=15)
+        resumo = consultar_resumo()["resumo"]
+
+    assert resumo["atrasados"] == 3
+
+
+def test_reparar_resumo_sem_divergencias(circulacao):
+    assert reparar_resumo() == {"success": True, "divergencias": {}}
+
+
+def test_reparar_resumo_corrige_divergencias(circulacao):
+    conn = connect_db()
+    conn.execute("UPDATE resumo SET valor = 99 WHERE chave = 'livros_total'")
+    conn.commit()
+    conn.close()
+
+    assert reparar_resumo(corrigir=False)["divergencias"] == {"livros_total": (99, 5)}
+    assert reparar_resumo()["divergencias"] == {"livros_total": (99, 5)}
+    assert consultar_resumo()["resumo"]["livros_total"] == 5
+
+
+def test_consultar_resumo_erro_bd():
+    with patch("app.connect_db") as mock_connect_db:
+        mock_connect_db.return_value.execute.side_effect = sqlite3.Error("falhou")
+
+        result = consultar_resumo()
+
+    assert result == {"success": False, "message": "Erro de banco de dados: falhou"}
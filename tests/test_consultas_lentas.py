@@ -0,0 +1,79 @@
+import json
+import pytest
+import app
+import consultas_lentas
+
+
+@pytest.fixture
+def log_lento(db_temporario, tmp_path):
+    caminho = tmp_path / 'lentas.jsonl'
+    consultas_lentas.ativar(str(caminho), limite_ms=0)
+    yield caminho
+    consultas_lentas.desativar()
+
+
+def _entradas(caminho):
+    return [json.loads(linha) for linha in caminho.read_text(encoding='utf-8').splitlines()]
+
+
+def test_registra_comando_com_operacao_e_plano(log_lento):
+    app.consultar_disponibilidade(1)
+
+    # A primeira consulta também abre a conexão somente leitura (PRAGMAs).
+    entrada = [e for e in _entradas(log_lento) if e["sql"].startswith("SELECT")][-1]
+    assert entrada["operacao"] == "consultar_disponibilidade"
+    assert entrada["sql"] == "SELECT status, exemplares_disponiveis, exemplares_total FROM livros WHERE id = ?"
+    assert entrada["parametros"] == [1]
+    assert entrada["plano"] == ["SEARCH livros USING INTEGER PRIMARY KEY (rowid=?)"]
+    assert entrada["duracao_ms"] >= 0
+
+
+def test_mascara_cpf_e_email(log_lento):
+    app.cadastrar_usuario("Maria Souza", "123.456.789-09", "maria@example.com", "(11) 90000-0000")
+
+    entrada = [e for e in _entradas(log_lento) if e["sql"].startswith("INSERT INTO usuarios")][0]
+    assert entrada["parametros"] == ["Maria Souza", "***", "***", "(11) 90000-0000"]
+
+
+@pytest.mark.parametrize("valor", ["12345678909", "123.456.789-09", "123 456 789 09", " 123.456.789 09 "])
+def test_mascara_cpf_com_os_separadores_aceitos_no_cadastro(valor):
+    assert consultas_lentas.mascarar(valor) == "***"
+
+
+def test_limite_filtra_comandos_rapidos(db_temporario, tmp_path):
+    caminho = tmp_path / 'lentas.jsonl'
+    consultas_lentas.ativar(str(caminho), limite_ms=60000)
+    try:
+        app.consultar_disponibilidade(1)
+    finally:
+        consultas_lentas.desativar()
+
+    assert caminho.read_text() == ''
+
+
+def test_desativar_remove_observador(log_lento):
+    consultas_lentas.desativar()
+
+    app.consultar_disponibilidade(1)
+
+    assert log_lento.read_text() == ''
+
+
+def test_resumir_agrupa_por_comando_normalizado(tmp_path):
+    caminho = tmp_path / 'lentas.jsonl'
+    entradas = [
+        {"sql": "SELECT status FROM livros WHERE id = 1", "duracao_ms": 5.0, "operacao": "consultar_disponibilidade"},
+        {"sql": "SELECT status FROM livros WHERE id = 2", "duracao_ms": 7.0, "operacao": "emprestar_livro"},
+        {"sql": "SELECT titulo FROM livros WHERE status = 'Disponível'", "duracao_ms": 9.0, "operacao": "gerar_relatorio"},
+    ]
+    caminho.write_text('\n'.join(json.dumps(e) for e in entradas), encoding='utf-8')
+
+    resumo = consultas_lentas.resumir([str(caminho)])
+
+    assert [item["sql"] for item in resumo] == [
+        "SELECT status FROM livros WHERE id = ?",
+        "SELECT titulo FROM livros WHERE status = ?",
+    ]
+    assert resumo[0]["ocorrencias"] == 2
+    assert resumo[0]["total_ms"] == 12.0
+    assert resumo[0]["operacoes"] == ["consultar_disponibilidade", "emprestar_livro"]
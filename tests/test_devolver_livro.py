@@ -38,7 +38,7 @@ def test_devolver_livro_nao_encontrado():
         mock_connect_db.return_value = mock_conn
         mock_conn.cursor.return_value = mock_cursor
         
-        mock_cursor.execute.side_effect = [MagicMock()]
+        mock_cursor.execute.side_effect = [MagicMock(), MagicMock()]
         mock_cursor.fetchone.return_value = None
 
         result = devolver_livro(usuario_id, livro_id)
@@ -57,8 +57,8 @@ def test_devolver_livro_nao_emprestado():
         mock_connect_db.return_value = mock_conn
         mock_conn.cursor.return_value = mock_cursor
         
-        mock_cursor.execute.side_effect = [MagicMock()]
-        mock_cursor.fetchone.side_effect = None
+        mock_cursor.execute.side_effect = [MagicMock(), MagicMock()]
+        mock_cursor.fetchone.side_effect = [None, ['Disponível']]
 
         result = devolver_livro(usuario_id, livro_id)
         
@@ -81,7 +81,7 @@ def test_devolver_livro_nao_emprestado_para_este_usuario():
             MagicMock(),  
             MagicMock()   
         ]
-        mock_cursor.fetchone.side_effect = [['Emprestado'], None] 
+        mock_cursor.fetchone.side_effect = [None, ['Emprestado']]
 
         result = devolver_livro(usuario_id, livro_id)
         
@@ -58,7 +58,7 @@ def test_emprestar_livro_nao_disponivel():
         mock_connect_db.return_value = mock_conn
         mock_conn.cursor.return_value = mock_cursor
         mock_cursor.execute.return_value = None
-        mock_cursor.fetchone.return_value = ['Emprestado']  
+        mock_cursor.fetchone.side_effect = [None, ['Emprestado']]
         
         result = emprestar_livro(usuario_id, livro_id)
         
@@ -0,0 +1,111 @@
+import pytest
+import sqlite3
+from datetime import date, timedelta
+from unittest.mock import patch
+import app
+from app import connect_db, devolver_livro, renovar_emprestimo
+
+
+def _emprestimos(livro_id):
+    conn = connect_db()
+    try:
+        return conn.execute(
+            'SELECT usuario_id, data_devolucao, data_retorno FROM emprestimos WHERE livro_id = ? ORDER BY id',
+            (livro_id,),
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def historico(db_temporario):
+    app.cadastrar_usuario("Maria Souza", "12345678909", "maria@example.com", "11900000000")
+    app.cadastrar_usuario("João Lima", "98765432100", "joao@example.com", "11900000001")
+    app.cadastrar_livro("Dom Casmurro", "Machado de Assis", "9780306406157", "Romance")
+    # Maria já pegou e devolveu o livro duas vezes antes do empréstimo atual.
+    for _ in range(3):
+        app.emprestar_livro(1, 1)
+        app.devolver_livro(1, 1)
+    app.emprestar_livro(1, 1)
+
+
+def test_devolucao_encerra_o_emprestimo_em_aberto_e_preserva_o_prazo(historico):
+    hoje = date.today().isoformat()
+    prazo = (date.today() + timedelta(days=14)).isoformat()
+
+    assert devolver_livro(1, 1)["success"] is True
+
+    assert _emprestimos(1) == [(1, prazo, hoje)] * 4
+
+
+def test_renovacao_altera_apenas_o_emprestimo_em_aberto(historico):
+    renovado = (date.today() + timedelta(days=21)).isoformat()
+
+    assert renovar_emprestimo(1, 1)["success"] is True
+
+    assert [linha[1:] for linha in _emprestimos(1)][-1] == (renovado, None)
+    assert all(linha[1] != renovado for linha in _emprestimos(1)[:-1])
+
+
+def test_historico_mostra_a_data_de_retorno(historico):
+    hoje = date.today().isoformat()
+    prazo = (date.today() + timedelta(days=14)).isoformat()
+
+    assert app.consultar_historico(1, ordem='asc')["historico"] == [("Dom Casmurro", hoje, prazo, hoje)] * 3 + [
+        ("Dom Casmurro", hoje, prazo, None)]
+
+
+def test_devolucao_por_outro_usuario_e_recusada(historico):
+    result = devolver_livro(2, 1)
+
+    assert result == {"success": False, "message": "O livro não está registrado como emprestado para este usuário"}
+    assert _emprestimos(1)[-1][2] is None
+
+
+def test_indice_unico_impede_dois_emprestimos_em_aberto(historico):
+    conn = connect_db()
+    try:
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute(
+                "INSERT INTO emprestimos (usuario_id, livro_id, exemplar_id, data_emprestimo, data_devolucao) "
+                "VALUES (2, 1, 1, '2024-01-01', '2024-01-15')"
+            )
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def test_migracao_preenche_data_retorno(tmp_path):
+    original = dict(app._config_db)
+    app.configurar_db(caminho=str(tmp_path / "legado.db"))
+    try:
+        with patch.object(app, "MIGRACOES", [m for m in app.MIGRACOES if m[0] < 7]):
+            app.create_tables()
+        conn = connect_db()
+        conn.executescript('''
+            INSERT INTO livros (id, titulo, autor, isbn, categoria, status) VALUES
+                (1, 'Dom Casmurro', 'Machado de Assis', '9780306406157', 'Romance', 'Emprestado'),
+                (2, 'Iracema', 'José de Alencar', '9788572326971', 'Romance', 'Emprestado');
+            INSERT INTO emprestimos (usuario_id, livro_id, data_emprestimo, data_devolucao) VALUES
+                (1, 1, '2024-01-01', '2024-01-10'),
+                (1, 2, '2024-01-05', '2024-01-12');
+        ''')
+        # Legado: a devolução sobrescrevia data_devolucao e só mudava o status.
+        conn.execute("UPDATE livros SET status = 'Disponível' WHERE id = 1")
+        conn.execute("UPDATE livros SET status = 'Emprestado' WHERE id = 1")
+        conn.execute("INSERT INTO emprestimos (usuario_id, livro_id, data_emprestimo, data_devolucao) VALUES (2, 1, '2024-02-01', '2024-02-15')")
+        conn.commit()
+        conn.close()
+
+        app.create_tables()
+
+        conn = connect_db()
+        try:
+            linhas = conn.execute('SELECT id, data_devolucao, data_retorno FROM emprestimos ORDER BY id').fetchall()
+            abertos = conn.execute('SELECT emprestimo_id FROM emprestimos_abertos').fetchall()
+        finally:
+            conn.close()
+        assert linhas == [(1, '2024-01-10', '2024-01-10'), (2, '2024-01-12', None), (3, '2024-02-15', None)]
+        assert abertos == [(2,), (3,)]
+    finally:
+        app.configurar_db(**original)
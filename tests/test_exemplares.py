@@ -0,0 +1,177 @@
+import sqlite3
+import pytest
+from unittest.mock import patch
+import app
+from app import (
+    adicionar_exemplares, cadastrar_livro, consultar_disponibilidade, connect_db,
+    devolver_livro, devolver_livros, emprestar_livro, emprestar_livros, gerar_relatorio,
+)
+
+
+@pytest.fixture
+def acervo(db_temporario):
+    app.cadastrar_usuario("Maria Souza", "12345678909", "maria@example.com", "11900000000")
+    app.cadastrar_usuario("João Lima", "98765432100", "joao@example.com", "11900000001")
+    cadastrar_livro("Dom Casmurro", "Machado de Assis", "9780306406157", "Romance", exemplares=3)
+    cadastrar_livro("Iracema", "José de Alencar", "9788572326971", "Romance")
+
+
+def _disponibilidade(livro_id):
+    resultado = consultar_disponibilidade(livro_id)
+    return resultado["status"], resultado["disponiveis"], resultado["total"]
+
+
+def test_cadastro_cria_exemplares(acervo):
+    assert _disponibilidade(1) == ('Disponível', 3, 3)
+    assert _disponibilidade(2) == ('Disponível', 1, 1)
+
+
+def test_cadastro_rejeita_quantidade_invalida(db_temporario):
+    result = cadastrar_livro("Dom Casmurro", "Machado de Assis", "9780306406157", "Romance", exemplares=0)
+
+    assert result == {"success": False, "message": "Número de exemplares inválido"}
+
+
+def test_emprestimos_consomem_exemplares_ate_esgotar(acervo):
+    assert emprestar_livro(1, 1)["success"]
+    assert emprestar_livro(2, 1)["success"]
+    assert _disponibilidade(1) == ('Disponível', 1, 3)
+
+    assert emprestar_livro(1, 1)["success"]
+    assert _disponibilidade(1) == ('Emprestado', 0, 3)
+    assert emprestar_livro(2, 1) == {"success": False, "message": "O livro não está disponível"}
+
+    assert devolver_livro(2, 1)["success"]
+    assert _disponibilidade(1) == ('Disponível', 1, 3)
+
+
+def test_cada_emprestimo_usa_um_exemplar_distinto(acervo):
+    for usuario_id in (1, 2, 1):
+        emprestar_livro(usuario_id, 1)
+
+    conn = connect_db()
+    try:
+        exemplares = [linha[0] for linha in conn.execute(
+            'SELECT exemplar_id FROM emprestimos WHERE livro_id = 1 AND data_retorno IS NULL')]
+    finally:
+        conn.close()
+    assert sorted(exemplares) == sorted(set(exemplares))
+    assert len(exemplares) == 3
+
+
+def test_devolucao_sem_emprestimo_do_usuario(acervo):
+    emprestar_livro(1, 1)
+
+    result = devolver_livro(2, 1)
+
+    assert result == {"success": False, "message": "O livro não está registrado como emprestado para este usuário"}
+    assert _disponibilidade(1) == ('Disponível', 2, 3)
+
+
+def test_adicionar_exemplares(acervo):
+    emprestar_livro(1, 2)
+    assert _disponibilidade(2) == ('Emprestado', 0, 1)
+
+    result = adicionar_exemplares(2, 2)
+
+    assert result == {"success": True, "message": "Exemplares adicionados com sucesso"}
+    assert _disponibilidade(2) == ('Disponível', 2, 3)
+
+
+@pytest.mark.parametrize("livro_id, quantidade, mensagem", [
+    (99, 1, "Livro não encontrado"),
+    (1, 0, "Número de exemplares inválido"),
+    (1, "2", "Número de exemplares inválido"),
+    (None, 1, "ID do livro é obrigatório"),
+])
+def test_adicionar_exemplares_invalido(acervo, livro_id, quantidade, mensagem):
+    assert adicionar_exemplares(livro_id, quantidade) == {"success": False, "message": mensagem}
+
+
+def test_lote_empresta_o_mesmo_titulo_varias_vezes(acervo):
+    result = emprestar_livros(1, [1, 1, 1, 1])
+
+    assert [item["success"] for item in result["itens"]] == [True, True, True, False]
+    assert _disponibilidade(1) == ('Emprestado', 0, 3)
+
+    result = devolver_livros([(1, 1), (None, 1)])
+
+    assert result["processados"] == 2
+    assert _disponibilidade(1) == ('Disponível', 2, 3)
+
+
+def test_relatorios_agregados_por_titulo(acervo):
+    emprestar_livro(1, 1)
+    emprestar_livro(2, 1)
+
+    disponiveis = gerar_relatorio('disponiveis')["data"]
+    emprestados = gerar_relatorio('emprestados')["data"]
+
+    assert disponiveis == [("Dom Casmurro", 1, 3), ("Iracema", 1, 1)]
+    assert [linha[:2] for linha in emprestados] == [("Dom Casmurro", 2)]
+
+
+def test_indice_unico_impede_emprestar_o_mesmo_exemplar(acervo):
+    emprestar_livro(1, 2)
+
+    conn = connect_db()
+    try:
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute(
+                "INSERT INTO emprestimos (usuario_id, livro_id, exemplar_id, data_emprestimo, data_devolucao) "
+                "VALUES (2, 2, 4, '2024-01-01', '2024-01-15')"
+            )
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def test_migracao_cria_um_exemplar_por_livro(tmp_path):
+    original = dict(app._config_db)
+    app.configurar_db(caminho=str(tmp_path / "legado.db"))
+    try:
+        with patch.object(app, "MIGRACOES", [m for m in app.MIGRACOES if m[0] < 8]):
+            app.create_tables()
+        conn = connect_db()
+        conn.executescript('''
+            INSERT INTO usuarios (id, nome, cpf, email, telefone) VALUES (1, 'Maria Souza', '12345678909', 'maria@example.com', '11900000000');
+            INSERT INTO livros (id, titulo, autor, isbn, categoria, status) VALUES
+                (1, 'Dom Casmurro', 'Machado de Assis', '9780306406157', 'Romance', 'Emprestado'),
+                (2, 'Iracema', 'José de Alencar', '9788572326971', 'Romance', 'Disponível');
+            INSERT INTO emprestimos (usuario_id, livro_id, data_emprestimo, data_devolucao) VALUES
+                (1, 1, '2024-01-01', '2024-01-15');
+        ''')
+        conn.commit()
+        conn.close()
+
+        app.create_tables()
+
+        assert _disponibilidade(1) == ('Emprestado', 0, 1)
+        assert _disponibilidade(2) == ('Disponível', 1, 1)
+        assert devolver_livro(1, 1)["success"]
+        assert _disponibilidade(1) == ('Disponível', 1, 1)
+    finally:
+        app.fechar_conexoes()
+        app.configurar_db(**original)
+
+
+def test_remocao_recusada_com_exemplar_emprestado(acervo):
+    emprestar_livro(1, 1)
+
+    assert app.remover_livro(1) == {"success": False, "message": "Livro com exemplares emprestados"}
+    assert _disponibilidade(1) == ('Disponível', 2, 3)
+
+
+def test_exemplar_removido_nao_tem_id_reaproveitado(acervo):
+    emprestar_livro(1, 2)
+    devolver_livro(1, 2)
+    assert app.remover_livro(2)["success"]
+
+    cadastrar_livro("Senhora", "José de Alencar", "9780000000019", "Romance")
+
+    assert emprestar_livro(1, 3)["success"]
+    conn = connect_db()
+    try:
+        assert conn.execute('SELECT exemplar_id FROM emprestimos ORDER BY id').fetchall() == [(4,), (5,)]
+    finally:
+        conn.close()
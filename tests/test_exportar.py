@@ -0,0 +1,108 @@
+import csv
+import gzip
+import json
+import os
+from datetime import date
+import pytest
+import app
+import exportar
+
+
+@pytest.fixture
+def acervo(cadastrar_acervo):
+    cadastrar_acervo(5)
+    app.adicionar_exemplares(1, 2)
+    app.emprestar_livro(1, 1)
+    app.emprestar_livro(1, 2)
+    app.devolver_livro(1, 2)
+    yield
+    app.fechar_conexoes()
+    if os.path.exists(app.caminho_arquivo()):
+        os.remove(app.caminho_arquivo())
+
+
+def _ler_csv(caminho, abrir=open):
+    with abrir(caminho, 'rt', encoding='utf-8', newline='') as arquivo:
+        return list(csv.reader(arquivo))
+
+
+def test_catalogo_csv(acervo, tmp_path):
+    destino = str(tmp_path / "catalogo.csv")
+
+    result = exportar.exportar('catalogo', destino)
+
+    assert result == {"success": True, "linhas": 5, "arquivo": destino}
+    linhas = _ler_csv(destino)
+    assert linhas[0] == ['id', 'titulo', 'autor', 'isbn', 'categoria', 'status',
+                         'exemplares_disponiveis', 'exemplares_total']
+    assert linhas[1] == ['1', 'Livro 0', 'Autor', '9780000000002', 'Geral', 'Disponível', '2', '3']
+    assert len(linhas) == 6
+
+
+def test_relatorio_jsonl_compactado(acervo, tmp_path):
+    destino = str(tmp_path / "emprestados.jsonl.gz")
+
+    result = exportar.exportar('emprestados', destino)
+
+    assert result["linhas"] == 1
+    with gzip.open(destino, 'rt', encoding='utf-8') as arquivo:
+        registros = [json.loads(linha) for linha in arquivo]
+    assert registros == [{
+        "titulo": "Livro 0",
+        "exemplares_emprestados": 1,
+        "proxima_devolucao": registros[0]["proxima_devolucao"],
+    }]
+
+
+def test_formato_explicito_sobrepoe_extensao(acervo, tmp_path):
+    destino = str(tmp_path / "abertos.txt")
+
+    assert exportar.exportar('emprestimos_abertos', destino, formato='csv', comprimir=True)["linhas"] == 1
+    assert _ler_csv(destino, gzip.open)[0] == ['id', 'usuario_id', 'livro_id', 'titulo', 'data_devolucao']
+
+
+def test_historico_inclui_o_arquivo(acervo, tmp_path):
+    app.arquivar_emprestimos(meses=0, pausa_segundos=0, data=date(2100, 1, 1))
+    destino = str(tmp_path / "historico.csv")
+
+    assert exportar.exportar('historico', destino)["linhas"] == 2
+    assert sorted(linha[0] for linha in _ler_csv(destino)[1:]) == ['1', '2']
+
+
+def test_progresso_por_intervalo(acervo, tmp_path):
+    avisos = []
+
+    exportar.exportar('catalogo', str(tmp_path / "catalogo.jsonl"), progresso=avisos.append,
+                      intervalo_progresso=2, tamanho_lote=1)
+
+    assert avisos == [2, 4, 5]
+
+
+def test_falha_preserva_destino_anterior(acervo, tmp_path, monkeypatch):
+    destino = tmp_path / "catalogo.csv"
+    destino.write_text("exportação anterior")
+
+    def falhar(*args):
+        raise OSError("disco cheio")
+    monkeypatch.setattr(exportar, '_escrever', falhar)
+
+    result = exportar.exportar('catalogo', str(destino))
+
+    assert result == {"success": False, "message": "Erro ao gravar arquivo: disco cheio"}
+    assert destino.read_text() == "exportação anterior"
+    assert not [nome for nome in os.listdir(tmp_path) if nome.startswith('.exportacao-')]
+
+
+def test_diretorio_inexistente(acervo, tmp_path):
+    result = exportar.exportar('catalogo', str(tmp_path / "nada" / "catalogo.csv"))
+
+    assert result["success"] is False
+    assert result["message"].startswith("Erro ao gravar arquivo:")
+
+
+@pytest.mark.parametrize("fonte, destino, mensagem", [
+    ('usuarios', 'saida.csv', "Fonte de exportação inválida"),
+    ('catalogo', 'saida.xml', "Formato inválido"),
+])
+def test_parametros_invalidos(acervo, tmp_path, fonte, destino, mensagem):
+    assert exportar.exportar(fonte, str(tmp_path / destino)) == {"success": False, "message": mensagem}
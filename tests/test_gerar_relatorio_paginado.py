@@ -0,0 +1,93 @@
+import pytest
+import app
+from app import gerar_relatorio, gerar_relatorio_paginado, gerar_relatorio_stream
+from tests.conftest import isbn13_valido
+
+
+@pytest.fixture
+def catalogo(db_temporario):
+    app.cadastrar_usuario("Maria Souza", "12345678909", "maria@example.com", "11900000000")
+    for i in range(25):
+        app.cadastrar_livro(f"Livro {i:02d}", "Autor", isbn13_valido(i), "Geral")
+    for livro_id in range(1, 6):
+        app.emprestar_livro(1, livro_id)
+
+
+def test_gerar_relatorio_stream_disponiveis(catalogo):
+    result = gerar_relatorio_stream('disponiveis', tamanho_lote=4)
+
+    assert result["success"] is True
+    assert list(result["data"]) == gerar_relatorio('disponiveis')["data"]
+
+
+def test_gerar_relatorio_stream_emprestados(catalogo):
+    result = gerar_relatorio_stream('emprestados')
+
+    assert [linha[0] for linha in result["data"]] == [f"Livro {i:02d}" for i in range(5)]
+
+
+def test_gerar_relatorio_stream_invalido():
+    result = gerar_relatorio_stream('invalido')
+
+    assert result == {"success": False, "message": "Tipo de relatório inválido"}
+
+
+@pytest.mark.parametrize("tamanho_lote", [0, -1, "4", 2.5])
+def test_gerar_relatorio_stream_tamanho_de_lote_invalido(catalogo, tamanho_lote):
+    result = gerar_relatorio_stream('disponiveis', tamanho_lote=tamanho_lote)
+
+    assert result == {"success": False, "message": "Tamanho de lote inválido"}
+
+
+def test_gerar_relatorio_paginado_percorre_todas_as_paginas(catalogo):
+    titulos = []
+    cursor = None
+    paginas = 0
+    while True:
+        result = gerar_relatorio_paginado('disponiveis', tamanho_pagina=7, cursor=cursor)
+        assert result["success"] is True
+        titulos.extend(linha[0] for linha in result["data"])
+        paginas += 1
+        cursor = result["proximo_cursor"]
+        if cursor is None:
+            break
+
+    assert paginas == 3
+    assert titulos == [f"Livro {i:02d}" for i in range(5, 25)]
+
+
+def test_gerar_relatorio_paginado_emprestados(catalogo):
+    primeira = gerar_relatorio_paginado('emprestados', tamanho_pagina=3)
+    segunda = gerar_relatorio_paginado('emprestados', tamanho_pagina=3, cursor=primeira["proximo_cursor"])
+
+    assert [linha[0] for linha in primeira["data"]] == ["Livro 00", "Livro 01", "Livro 02"]
+    assert [linha[0] for linha in segunda["data"]] == ["Livro 03", "Livro 04"]
+    assert segunda["proximo_cursor"] is None
+
+
+def test_gerar_relatorio_paginado_cursor_de_outro_tipo(catalogo):
+    cursor = gerar_relatorio_paginado('disponiveis', tamanho_pagina=1)["proximo_cursor"]
+
+    result = gerar_relatorio_paginado('emprestados', cursor=cursor)
+
+    assert result == {"success": False, "message": "Cursor inválido"}
+
+
+def test_gerar_relatorio_paginado_cursor_corrompido():
+    result = gerar_relatorio_paginado('disponiveis', cursor='nao-e-um-cursor')
+
+    assert result == {"success": False, "message": "Cursor inválido"}
+
+
+@pytest.mark.parametrize("cursor", [123, ["x"], {"tipo": "disponiveis"}])
+def test_gerar_relatorio_paginado_cursor_de_tipo_errado(cursor):
+    result = gerar_relatorio_paginado('disponiveis', cursor=cursor)
+
+    assert result == {"success": False, "message": "Cursor inválido"}
+
+
+@pytest.mark.parametrize("tamanho_pagina", [0, -1, None, "10"])
+def test_gerar_relatorio_paginado_tamanho_invalido(tamanho_pagina):
+    result = gerar_relatorio_paginado('disponiveis', tamanho_pagina=tamanho_pagina)
+
+    assert result == {"success": False, "message": "Tamanho de página inválido"}
@@ -0,0 +1,124 @@
+import os
+from datetime import date, datetime, timedelta
+import pytest
+import app
+from app import connect_db, consultar_historico
+
+INICIO = date(2023, 1, 1)
+
+
+@pytest.fixture
+def historico(cadastrar_acervo):
+    app.cadastrar_usuario("Escola Estadual", "12345678909", "escola@example.com", "11900000000")
+    app.cadastrar_usuario("João Lima", "98765432100", "joao@example.com", "11900000001")
+    cadastrar_acervo(10, leitora=False)
+    conn = connect_db()
+    try:
+        # Dois empréstimos por dia, para exercitar o desempate por id.
+        conn.executemany('''
+            INSERT INTO emprestimos (usuario_id, livro_id, exemplar_id, data_emprestimo, data_devolucao, data_retorno)
+            VALUES (1, ?1, ?1, ?2, ?3, ?3)
+        ''', [
+            (i % 10 + 1, INICIO + timedelta(days=i // 2), INICIO + timedelta(days=i // 2 + 14))
+            for i in range(20)
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+    app.emprestar_livro(1, 1)
+    app.emprestar_livro(2, 2)
+    yield
+    app.fechar_conexoes()
+    if os.path.exists(app.caminho_arquivo()):
+        os.remove(app.caminho_arquivo())
+
+
+def _todas_as_paginas(**filtros):
+    paginas = []
+    cursor = None
+    while True:
+        result = consultar_historico(1, cursor=cursor, **filtros)
+        assert result["success"], result
+        paginas.append(result)
+        cursor = result["proximo_cursor"]
+        if cursor is None:
+            return paginas
+
+
+def test_paginas_cobrem_o_historico_na_ordem(historico):
+    completo = consultar_historico(1)["historico"]
+    paginas = _todas_as_paginas(tamanho_pagina=4)
+
+    assert [len(p["historico"]) for p in paginas] == [4, 4, 4, 4, 4, 1]
+    assert paginas[0]["total"] == 21
+    assert "total" not in paginas[1]
+    assert [linha for p in paginas for linha in p["historico"]] == completo
+    datas = [linha[1] for linha in completo]
+    assert datas == sorted(datas, reverse=True)
+
+
+def test_ordem_crescente(historico):
+    paginas = _todas_as_paginas(tamanho_pagina=7, ordem='asc')
+    datas = [linha[1] for p in paginas for linha in p["historico"]]
+
+    assert datas == sorted(datas)
+    assert len(datas) == 21
+
+
+def test_intervalo_de_datas(historico):
+    result = consultar_historico(1, inicio=date(2023, 1, 3), fim=date(2023, 1, 5), tamanho_pagina=10)
+
+    assert result["total"] == 6
+    assert {linha[1] for linha in result["historico"]} == {'2023-01-03', '2023-01-04', '2023-01-05'}
+
+
+def test_apenas_abertos(historico):
+    result = consultar_historico(1, apenas_abertos=True, tamanho_pagina=10)
+
+    assert result["total"] == 1
+    assert [linha[0] for linha in result["historico"]] == ["Livro 0"]
+    assert result["proximo_cursor"] is None
+
+
+def test_paginas_incluem_o_arquivo(historico):
+    completo = consultar_historico(1)["historico"]
+    app.arquivar_emprestimos(meses=1, pausa_segundos=0, data=date(2023, 3, 1))
+
+    paginas = _todas_as_paginas(tamanho_pagina=5)
+
+    assert paginas[0]["total"] == 21
+    assert [linha for p in paginas for linha in p["historico"]] == completo
+
+
+@pytest.mark.parametrize("argumentos, mensagem", [
+    ({"ordem": "aleatoria"}, "Ordem inválida"),
+    ({"inicio": date(2024, 1, 2), "fim": date(2024, 1, 1)}, "Intervalo de datas inválido"),
+    ({"inicio": "2024-01-02", "fim": date(2024, 1, 1)}, "Intervalo de datas inválido"),
+    ({"inicio": "02/01/2024"}, "Intervalo de datas inválido"),
+    ({"fim": 20240101}, "Intervalo de datas inválido"),
+    ({"tamanho_pagina": 0}, "Tamanho de página inválido"),
+    ({"tamanho_pagina": 5, "cursor": "invalido"}, "Cursor inválido"),
+    ({"cursor": "invalido"}, "Cursor exige tamanho de página"),
+])
+def test_parametros_invalidos(historico, argumentos, mensagem):
+    assert consultar_historico(1, **argumentos) == {"success": False, "message": mensagem}
+
+
+def test_datas_em_texto_e_datetime(historico):
+    result = consultar_historico(1, inicio="2023-01-03", fim=datetime(2023, 1, 5, 12), tamanho_pagina=10)
+
+    assert {linha[1] for linha in result["historico"]} == {'2023-01-03', '2023-01-04', '2023-01-05'}
+
+
+def test_total_ignora_livros_removidos_como_as_paginas(historico):
+    app.remover_livro(10)
+
+    paginas = _todas_as_paginas(tamanho_pagina=4)
+
+    assert paginas[0]["total"] == sum(len(p["historico"]) for p in paginas) == 19
+
+
+def test_cursor_de_outro_tipo_e_recusado(historico):
+    cursor = app.gerar_relatorio_paginado('disponiveis', tamanho_pagina=1)["proximo_cursor"]
+
+    assert consultar_historico(1, tamanho_pagina=5, cursor=cursor) == {"success": False, "message": "Cursor inválido"}
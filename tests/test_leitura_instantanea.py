@@ -0,0 +1,87 @@
+import threading
+import pytest
+import app
+from app import connect_db, instantaneo
+
+
+def _em_outra_thread(funcao, *args):
+    resultado = []
+    thread = threading.Thread(target=lambda: resultado.append(funcao(*args)))
+    thread.start()
+    thread.join()
+    return resultado[0]
+
+
+@pytest.fixture
+def acervo(cadastrar_acervo):
+    cadastrar_acervo(3)
+
+
+def test_escrita_nao_espera_relatorio_em_andamento(acervo):
+    app.configurar_db(busy_timeout=0)
+
+    linhas = app.gerar_relatorio_stream('disponiveis', tamanho_lote=1)["data"]
+    primeira = next(linhas)
+    emprestimo = _em_outra_thread(app.emprestar_livro, 1, 3)
+    restantes = list(linhas)
+
+    assert emprestimo["success"]
+    # O relatório continua no snapshot em que começou.
+    assert [primeira] + restantes == [("Livro 0", 1, 1), ("Livro 1", 1, 1), ("Livro 2", 1, 1)]
+
+
+def test_instantaneo_mantem_consultas_consistentes(acervo):
+
+    with instantaneo():
+        antes = app.consultar_resumo()["resumo"]
+        _em_outra_thread(app.emprestar_livro, 1, 1)
+        emprestados = app.gerar_relatorio('emprestados')
+        disponibilidade = app.consultar_disponibilidade(1)
+        depois = app.consultar_resumo()["resumo"]
+
+    assert depois == antes
+    assert emprestados == {"success": False, "message": "Nenhum dado disponível para o relatório solicitado"}
+    assert disponibilidade["disponiveis"] == 1
+    assert app.consultar_disponibilidade(1)["disponiveis"] == 0
+    assert len(app.gerar_relatorio('emprestados')["data"]) == 1
+
+
+def test_instantaneo_ignora_cache(acervo):
+    app.configurar_cache()
+    try:
+        with instantaneo():
+            _em_outra_thread(app.emprestar_livro, 1, 1)
+            app.emprestar_livro(1, 2)
+            assert app.consultar_disponibilidade(2)["disponiveis"] == 1
+        assert app.consultar_disponibilidade(2)["disponiveis"] == 0
+    finally:
+        app.configurar_cache(None)
+
+
+def test_disponibilidade_em_cache_nao_usa_conexao_de_escrita(acervo, monkeypatch):
+    app.configurar_cache()
+    try:
+        _em_outra_thread(app.emprestar_livro, 1, 1)
+        app.consultar_disponibilidade(2)
+        pedidos = []
+        original = app.connect_db
+        monkeypatch.setattr(app, 'connect_db', lambda somente_leitura=False: (
+            pedidos.append(somente_leitura), original(somente_leitura))[1])
+
+        assert _em_outra_thread(app.consultar_disponibilidade, 1)["disponiveis"] == 0
+        assert app.consultar_disponibilidade(2)["disponiveis"] == 1
+        assert pedidos == [True, True]
+        assert app.estatisticas_cache()["acertos"] == 2
+    finally:
+        app.configurar_cache(None)
+
+
+def test_instantaneo_encerra_transacao_de_leitura(db_temporario):
+    with instantaneo() as conn:
+        assert conn.in_transaction
+
+    conn = connect_db(somente_leitura=True)
+    try:
+        assert not conn.in_transaction
+    finally:
+        conn.close()
@@ -0,0 +1,61 @@
+import pytest
+import app
+import metricas
+
+
+@pytest.fixture
+def instrumentacao(db_temporario):
+    metricas.limpar()
+    metricas.ativar()
+    yield metricas
+    metricas.desativar()
+    metricas.limpar()
+
+
+def test_metricas_desativadas_nao_registram(db_temporario):
+    metricas.limpar()
+
+    app.consultar_disponibilidade(1)
+
+    assert metricas.snapshot()["operacoes"] == {}
+
+
+def test_registra_chamadas_comandos_e_linhas(instrumentacao):
+    app.cadastrar_usuario("Maria Souza", "12345678909", "maria@example.com", "11900000000")
+    app.cadastrar_livro("Dom Casmurro", "Machado de Assis", "9780306406157", "Romance")
+    app.emprestar_livro(1, 1)
+    app.devolver_livro(1, 1)
+
+    devolver = metricas.snapshot()["operacoes"]["devolver_livro"]
+    assert devolver["chamadas"] == 1
+    assert devolver["comandos"] == 3
+    assert devolver["linhas"] == 2
+    assert devolver["sucessos"] == 1
+
+
+def test_registra_falhas_por_mensagem(instrumentacao):
+    app.consultar_disponibilidade(999)
+    app.consultar_disponibilidade(998)
+    app.consultar_disponibilidade(None)
+
+    falhas = metricas.snapshot()["operacoes"]["consultar_disponibilidade"]["falhas"]
+    assert falhas == {"Livro não encontrado": 2, "ID do livro é obrigatório": 1}
+
+
+def test_registra_aquisicao_de_conexao(instrumentacao):
+    app.consultar_disponibilidade(1)
+    app.consultar_disponibilidade(2)
+
+    assert metricas.snapshot()["aquisicao_conexao"]["total"] == 2
+
+
+def test_exportacao_prometheus(instrumentacao):
+    app.consultar_disponibilidade(999)
+
+    texto = metricas.prometheus()
+
+    assert '# TYPE biblioteca_operacao_duracao_segundos histogram' in texto
+    assert 'biblioteca_operacao_duracao_segundos_count{operacao="consultar_disponibilidade"} 1' in texto
+    assert 'biblioteca_operacao_duracao_segundos_bucket{operacao="consultar_disponibilidade",le="+Inf"} 1' in texto
+    assert ('biblioteca_operacao_resultados_total{operacao="consultar_disponibilidade",'
+            'resultado="falha",mensagem="Livro não encontrado"} 1') in texto
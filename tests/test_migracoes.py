@@ -0,0 +1,55 @@
+import pytest
+import sqlite3
+import app
+from app import connect_db, create_tables, aplicar_migracoes, versao_esquema, MIGRACOES
+
+
+def test_create_tables_registra_versao(db_temporario):
+    conn = connect_db()
+    try:
+        assert versao_esquema(conn) == MIGRACOES[-1][0]
+    finally:
+        conn.close()
+
+
+def test_aplicar_migracoes_idempotente(db_temporario):
+    create_tables()
+
+    conn = connect_db()
+    try:
+        assert aplicar_migracoes(conn) == []
+    finally:
+        conn.close()
+
+
+def test_migracoes_criam_indices(db_temporario):
+    conn = connect_db()
+    try:
+        indices = {linha[0] for linha in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    finally:
+        conn.close()
+
+    assert {
+        'idx_emprestimos_livro',
+        'idx_emprestimos_abertos_devolucao',
+        'idx_emprestimos_usuario_data',
+        'idx_livros_status_id',
+    } <= indices
+    # Substituídos por índices de migrações posteriores.
+    assert not {'idx_emprestimos_devolucao', 'idx_emprestimos_usuario_livro', 'idx_livros_status'} & indices
+
+
+def test_migracao_com_erro_desfaz_transacao(db_temporario):
+    versao = MIGRACOES[-1][0] + 1
+    quebrada = (versao, ['CREATE TABLE temporaria (id INTEGER)', 'COMANDO INVALIDO'])
+
+    conn = connect_db()
+    try:
+        app.MIGRACOES.append(quebrada)
+        with pytest.raises(sqlite3.Error):
+            aplicar_migracoes(conn)
+        assert versao_esquema(conn) == versao - 1
+        assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'temporaria'").fetchone() is None
+    finally:
+        app.MIGRACOES.remove(quebrada)
+        conn.close()
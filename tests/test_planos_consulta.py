@@ -0,0 +1,98 @@
+import pytest
+from datetime import date
+import app
+from app import connect_db
+
+
+# Executa todas as operações públicas de app.py num banco real, captura cada
+# comando enviado ao SQLite e falha se algum plano recorrer a um SCAN. A
+# consulta ao índice FTS5 aparece como "SCAN ... VIRTUAL TABLE INDEX" e não é
+# uma varredura da tabela; os comandos internos do FTS5 sobre as tabelas
+# auxiliares (livros_busca_*) também são ignorados. Percorrer um índice
+# parcial também é aceito: ele só contém as linhas que satisfazem o filtro.
+# O mesmo vale para "SCAN (subquery-N)", que lê o resultado já limitado de
+# uma subconsulta (a união paginada do histórico com o arquivo).
+# Rotinas que percorrem tabelas inteiras de propósito (reconstruir_emprestimos_abertos,
+# reparar_resumo e a construção do índice de autocompletar) ficam de fora.
+
+COMANDOS_COM_PLANO = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+TABELAS_INTERNAS_FTS = "'main'.'livros_busca_"
+
+
+def _executar_operacoes():
+    app.cadastrar_usuario("Maria Souza", "12345678909", "maria@example.com", "11900000000")
+    app.atualizar_usuario(1, nome="Maria S. Souza", email="maria.s@example.com", telefone="11911111111")
+    app.cadastrar_livro("Dom Casmurro", "Machado de Assis", "9780306406157", "Romance")
+    app.cadastrar_livro("Memórias Póstumas", "Machado de Assis", "9788535910667", "Romance")
+    app.cadastrar_usuarios_em_lote([("João Lima", "98765432100", "joao@example.com", "11922222222")])
+    app.cadastrar_livros_em_lote([("Iracema", "José de Alencar", "9788572326971", "Romance")])
+    app.adicionar_exemplares(1, 2)
+    app.emprestar_livro(1, 1)
+    app.renovar_emprestimo(1, 1)
+    app.consultar_disponibilidade(1)
+    app.arquivar_emprestimos(meses=0, pausa_segundos=0)
+    app.consultar_historico(1)
+    pagina = app.consultar_historico(1, tamanho_pagina=1, inicio=date(2000, 1, 1))
+    app.consultar_historico(1, tamanho_pagina=1, cursor=pagina.get("proximo_cursor"))
+    app.consultar_historico(1, tamanho_pagina=1, apenas_abertos=True, ordem='asc')
+    app.consultar_atrasos()
+    app.consultar_vencimentos(7)
+    app.consultar_resumo()
+    app.buscar_livros("machado", categoria="Romance", apenas_disponiveis=True)
+    pagina = app.buscar_livros("machado", limite=1)
+    app.buscar_livros("machado", limite=1, cursor=pagina["proximo_cursor"])
+    for tipo in ('emprestados', 'disponiveis', 'atraso'):
+        app.gerar_relatorio(tipo)
+        list(app.gerar_relatorio_stream(tipo)["data"])
+        app.gerar_relatorio_paginado(tipo, tamanho_pagina=1)
+    app.devolver_livro(1, 1)
+    app.emprestar_livros(1, [1, 3, 99])
+    app.devolver_livros([(1, 1), (None, 3), (1, 99)])
+    app.remover_livro(2)
+
+
+def _capturar_comandos():
+    # Escritas e consultas usam conexões diferentes; as duas são observadas.
+    conexoes = [connect_db(), connect_db(somente_leitura=True)]
+    comandos = []
+    for conn in conexoes:
+        conn.set_trace_callback(comandos.append)
+    try:
+        _executar_operacoes()
+    finally:
+        for conn in conexoes:
+            conn.set_trace_callback(None)
+            conn.close()
+    return [
+        c for c in comandos
+        if c.lstrip().upper().startswith(COMANDOS_COM_PLANO) and TABELAS_INTERNAS_FTS not in c
+    ]
+
+
+def test_nenhum_comando_faz_scan(db_temporario):
+    comandos = _capturar_comandos()
+    assert comandos, "Nenhum comando capturado"
+
+    conn = connect_db()
+    try:
+        # Para explicar também as consultas ao histórico arquivado.
+        app._anexar_arquivo(conn)
+        parciais = [
+            linha[0] for linha in
+            conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '% WHERE %'")
+        ]
+        scans = []
+        for comando in comandos:
+            plano = conn.execute('EXPLAIN QUERY PLAN ' + comando).fetchall()
+            for linha in plano:
+                if not linha[3].startswith('SCAN') or 'VIRTUAL TABLE INDEX' in linha[3]:
+                    continue
+                if linha[3].startswith('SCAN (subquery-'):
+                    continue
+                if any(linha[3].endswith(f'INDEX {indice}') for indice in parciais):
+                    continue
+                scans.append((' '.join(comando.split()), linha[3]))
+    finally:
+        conn.close()
+
+    assert scans == []
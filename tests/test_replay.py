@@ -0,0 +1,61 @@
+import random
+import pytest
+from benchmarks.bench_operacoes import percentil
+from benchmarks.replay import (
+    EXPOENTE_MAXIMO, EXPOENTE_MINIMO, SUBDIVISOES, HistogramaLatencia, _faixa, _limite_ms,
+)
+
+
+@pytest.mark.parametrize("ms, faixa", [
+    (0, 0),
+    (2 ** EXPOENTE_MINIMO, 0),
+    (2 ** EXPOENTE_MINIMO * (1 + 1 / SUBDIVISOES), 1),
+    (1, -EXPOENTE_MINIMO * SUBDIVISOES),
+    (1.0001, -EXPOENTE_MINIMO * SUBDIVISOES + 1),
+    (2 ** EXPOENTE_MAXIMO, (EXPOENTE_MAXIMO - EXPOENTE_MINIMO) * SUBDIVISOES),
+    (2 ** EXPOENTE_MAXIMO * 10, (EXPOENTE_MAXIMO - EXPOENTE_MINIMO) * SUBDIVISOES),
+])
+def test_faixas_nas_bordas(ms, faixa):
+    assert _faixa(ms) == faixa
+
+
+@pytest.mark.parametrize("expoente", range(EXPOENTE_MINIMO, EXPOENTE_MAXIMO))
+def test_potencia_exata_e_o_limite_da_sua_faixa(expoente):
+    ms = 2 ** expoente
+
+    assert _limite_ms(_faixa(ms)) == ms
+    assert _limite_ms(_faixa(ms * 1.0001)) > ms
+
+
+def test_faixa_cobre_o_valor_com_erro_limitado():
+    rng = random.Random(3)
+    for _ in range(10000):
+        ms = 2 ** rng.uniform(EXPOENTE_MINIMO, EXPOENTE_MAXIMO)
+        limite = _limite_ms(_faixa(ms))
+
+        assert ms <= limite <= ms * (1 + 1 / SUBDIVISOES)
+        assert _faixa(ms) == 0 or _limite_ms(_faixa(ms) - 1) < ms
+
+
+def test_percentil_acompanha_a_lista_ordenada():
+    rng = random.Random(7)
+    segundos = sorted(rng.lognormvariate(-6, 1.5) for _ in range(5000))
+    histograma = HistogramaLatencia()
+    for valor in segundos:
+        histograma.observar(valor)
+
+    for fracao in (0, 0.5, 0.95, 0.99, 1):
+        referencia = percentil(segundos, fracao)
+        assert referencia <= histograma.percentil(fracao) <= referencia * (1 + 1 / SUBDIVISOES)
+
+
+def test_percentil_sem_observacoes():
+    assert HistogramaLatencia().percentil(0.5) == 0.0
+
+
+def test_potencias_de_2():
+    histograma = HistogramaLatencia()
+    for ms in (0.0001, 0.5, 1, 1.5, 2, 2.1, 4, 3000):
+        histograma.observar(ms / 1000)
+
+    assert histograma.potencias_de_2() == {"<=1": 3, "<=2": 2, "<=4": 2, "<=4096": 1}
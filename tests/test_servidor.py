@@ -0,0 +1,178 @@
+import http.client
+import json
+import socket
+import time
+from datetime import date
+import pytest
+import app
+from servidor import iniciar_em_segundo_plano
+
+
+@pytest.fixture
+def servidor(db_temporario):
+    servidor = iniciar_em_segundo_plano(workers=2, keep_alive=1)
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+@pytest.fixture
+def cliente(servidor):
+    conexao = http.client.HTTPConnection(*servidor.server_address, timeout=5)
+    yield conexao
+    conexao.close()
+
+
+def _requisitar(cliente, metodo, caminho, corpo=None):
+    dados = json.dumps(corpo) if corpo is not None else None
+    cliente.request(metodo, caminho, body=dados, headers={'Content-Type': 'application/json'})
+    resposta = cliente.getresponse()
+    return resposta.status, json.loads(resposta.read())
+
+
+def test_fluxo_de_emprestimo_na_mesma_conexao(cliente):
+    status, corpo = _requisitar(cliente, 'POST', '/usuarios', {
+        "nome": "Maria Souza", "cpf": "12345678909", "email": "maria@example.com", "telefone": "11900000000",
+    })
+    assert (status, corpo) == (200, {"success": True, "message": "Usuário cadastrado com sucesso"})
+
+    status, corpo = _requisitar(cliente, 'POST', '/livros', {
+        "titulo": "Dom Casmurro", "autor": "Machado de Assis", "isbn": "9780306406157", "categoria": "Romance",
+    })
+    assert status == 200
+
+    status, corpo = _requisitar(cliente, 'POST', '/emprestimos', {"usuario_id": 1, "livro_id": 1})
+    assert status == 200
+    assert corpo["message"].startswith("Empréstimo realizado com sucesso")
+
+    status, corpo = _requisitar(cliente, 'GET', '/livros/1/disponibilidade')
+    assert corpo == {"success": True, "status": "Emprestado", "disponiveis": 0, "total": 1}
+
+    status, corpo = _requisitar(cliente, 'POST', '/devolucoes', {"usuario_id": 1, "livro_id": 1})
+    assert corpo == {"success": True, "message": "Devolução registrada com sucesso"}
+
+    status, corpo = _requisitar(cliente, 'GET', '/usuarios/1/historico')
+    assert status == 200
+    titulo, _, _, data_retorno = corpo["historico"][0]
+    assert (titulo, data_retorno) == ("Dom Casmurro", date.today().isoformat())
+
+
+def test_livro_nao_encontrado_responde_404(cliente):
+    status, corpo = _requisitar(cliente, 'DELETE', '/livros/999')
+
+    assert (status, corpo) == (404, {"success": False, "message": "Livro não encontrado"})
+
+
+def test_requisicao_invalida_responde_400(cliente):
+    status, corpo = _requisitar(cliente, 'POST', '/emprestimos', {"usuario_id": "abc", "livro_id": 1})
+
+    assert (status, corpo) == (400, {"success": False, "message": "Requisição inválida"})
+
+
+def test_erro_inesperado_responde_500_e_mantem_a_conexao(cliente, monkeypatch):
+    def falhar():
+        raise IndexError("falha inesperada")
+    monkeypatch.setattr(app, 'consultar_resumo', falhar)
+
+    status, corpo = _requisitar(cliente, 'GET', '/resumo')
+
+    assert (status, corpo) == (500, {"success": False, "message": "Erro interno do servidor"})
+    monkeypatch.undo()
+    status, _ = _requisitar(cliente, 'GET', '/resumo')
+    assert status == 200
+
+
+def test_conexao_ociosa_nao_prende_worker(db_temporario):
+    servidor = iniciar_em_segundo_plano(workers=1, keep_alive=5)
+    conexoes = [http.client.HTTPConnection(*servidor.server_address, timeout=5) for _ in range(3)]
+    try:
+        for conexao in conexoes[:2]:
+            assert _requisitar(conexao, 'GET', '/resumo')[0] == 200
+
+        inicio = time.perf_counter()
+        status, _ = _requisitar(conexoes[2], 'GET', '/resumo')
+
+        assert status == 200
+        assert time.perf_counter() - inicio < 1
+        assert _requisitar(conexoes[0], 'GET', '/resumo')[0] == 200
+    finally:
+        for conexao in conexoes:
+            conexao.close()
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def test_requisicoes_em_pipeline(servidor):
+    with socket.create_connection(servidor.server_address, timeout=5) as conexao:
+        conexao.sendall(b"GET /resumo HTTP/1.1\r\nHost: x\r\n\r\n" * 2)
+        recebido = b""
+        while recebido.count(b"HTTP/1.1 200") < 2:
+            recebido += conexao.recv(65536)
+
+
+def test_rota_inexistente(cliente):
+    status, corpo = _requisitar(cliente, 'POST', '/nada', {"x": 1})
+
+    assert status == 404
+    status, _ = _requisitar(cliente, 'GET', '/livros/1/disponibilidade')
+    assert status == 404
+
+
+def test_relatorio_completo_em_stream(cliente, cadastrar_acervo):
+    cadastrar_acervo(1500, leitora=False)
+
+    cliente.request('GET', '/relatorios/disponiveis')
+    resposta = cliente.getresponse()
+
+    assert resposta.getheader('Transfer-Encoding') == 'chunked'
+    corpo = json.loads(resposta.read())
+    assert len(corpo["data"]) == 1500
+
+
+def test_relatorio_paginado(cliente, cadastrar_acervo):
+    cadastrar_acervo(3, leitora=False)
+
+    status, corpo = _requisitar(cliente, 'GET', '/relatorios/disponiveis?tamanho_pagina=2')
+
+    assert status == 200
+    assert corpo["data"] == [["Livro 0", 1, 1], ["Livro 1", 1, 1]]
+    assert corpo["proximo_cursor"]
+
+
+def test_relatorio_paginado_tamanho_invalido(cliente):
+    status, corpo = _requisitar(cliente, 'GET', '/relatorios/disponiveis?tamanho_pagina=0')
+
+    assert (status, corpo) == (400, {"success": False, "message": "Tamanho de página inválido"})
+
+
+def test_busca_com_limite_invalido(cliente):
+    status, corpo = _requisitar(cliente, 'GET', '/livros/busca?q=machado&limite=0')
+
+    assert (status, corpo) == (400, {"success": False, "message": "Limite inválido"})
+
+
+def test_emprestimo_e_devolucao_em_lote(cliente, cadastrar_acervo):
+    cadastrar_acervo(2)
+
+    status, corpo = _requisitar(cliente, 'POST', '/emprestimos/lote', {"usuario_id": 1, "livro_ids": [1, 2]})
+    assert (status, corpo["processados"]) == (200, 2)
+
+    status, corpo = _requisitar(cliente, 'POST', '/devolucoes/lote', {"itens": [{"livro_id": 1}, {"livro_id": 2}]})
+    assert [item["message"] for item in corpo["itens"]] == ["Devolução registrada com sucesso"] * 2
+
+
+def test_busca_no_catalogo(cliente):
+    app.cadastrar_livro("Memórias Póstumas de Brás Cubas", "Machado de Assis", "9780306406157", "Romance")
+
+    status, corpo = _requisitar(cliente, 'GET', '/livros/busca?q=memorias&disponiveis=1')
+
+    assert status == 200
+    assert corpo["data"] == [[1, "Memórias Póstumas de Brás Cubas", "Machado de Assis", "Romance", "Disponível"]]
+
+
+def test_metricas_de_latencia(cliente):
+    _requisitar(cliente, 'GET', '/livros/1/disponibilidade')
+
+    status, corpo = _requisitar(cliente, 'GET', '/metricas')
+
+    assert corpo["latencia"]["consultar_disponibilidade"]["requisicoes"] == 1
@@ -0,0 +1,86 @@
+import pytest
+import validacao
+from validacao import (
+    DIGITO_VERIFICADOR, DIGITOS_REPETIDOS, FORMATO, VALIDO, VAZIO,
+    motivo_cpf, motivo_isbn, validar_colunas,
+)
+from app import is_valid_cpf, is_valid_isbn
+from tests.conftest import cpf_valido, isbn13_valido
+
+CPFS = [
+    "123.456.789-09", "12345678909", "123.456.789-00", "111.111.111-11", "1234567890", "123.456.789-0a", "", None,
+]
+ISBNS = [
+    "978-0-306-40615-7", "9780306406158", "0-306-40615-2", "0-8044-2957-x", "0306406153", "978030640615X", "12345", "",
+]
+EMAILS = ["ana@example.com", "ana@example", "", None, "a.b+c@d.com.br", "x y@z.com", "leitor@example.org", "@a.com"]
+
+
+@pytest.mark.parametrize("cpf, motivo", list(zip(CPFS, [
+    VALIDO, VALIDO, DIGITO_VERIFICADOR, DIGITOS_REPETIDOS, FORMATO, FORMATO, VAZIO, VAZIO,
+])))
+def test_motivo_cpf(cpf, motivo):
+    assert motivo_cpf(cpf) == motivo
+
+
+@pytest.mark.parametrize("isbn, motivo", list(zip(ISBNS, [
+    VALIDO, DIGITO_VERIFICADOR, VALIDO, VALIDO, DIGITO_VERIFICADOR, FORMATO, FORMATO, VAZIO,
+])))
+def test_motivo_isbn(isbn, motivo):
+    assert motivo_isbn(isbn) == motivo
+
+
+def test_funcoes_unitarias_do_app_verificam_digitos():
+    assert is_valid_cpf("123.456.789-09")
+    assert not is_valid_cpf("123.456.789-00")
+    assert is_valid_isbn("978-3-16-148410-0")
+    assert not is_valid_isbn("978-3-16-148410-1")
+
+
+def test_validar_colunas_mascara_e_motivos():
+    result = validar_colunas(cpfs=CPFS, isbns=ISBNS, emails=EMAILS, usar_numpy=False)
+
+    assert result["success"]
+    assert result["motivos"]["cpf"] == bytearray([0, 0, 3, 4, 2, 2, 1, 1])
+    assert result["motivos"]["isbn"] == bytearray([0, 3, 0, 0, 3, 2, 2, 1])
+    assert result["motivos"]["email"] == bytearray([0, 2, 1, 1, 0, 2, 0, 2])
+    assert result["validos"] == bytearray([1, 0, 0, 0, 0, 0, 0, 0])
+
+
+def test_validar_colunas_com_uma_coluna():
+    cpfs = [cpf_valido(i) for i in range(1, 1001)] + ["00000000000"]
+
+    result = validar_colunas(cpfs=cpfs, usar_numpy=False)
+
+    assert result["validos"] == bytearray([1] * 1000 + [0])
+
+
+def test_numpy_da_o_mesmo_resultado():
+    np = pytest.importorskip("numpy")
+    cpfs = CPFS + [cpf_valido(i) for i in range(1, 101)] + [f"{i:011d}" for i in range(100)]
+    isbns = ISBNS + [isbn13_valido(i) for i in range(100)] + [f"978000000{i:04d}" for i in range(100)]
+    emails = EMAILS * (len(cpfs) // len(EMAILS))
+
+    puro = validar_colunas(cpfs=cpfs, isbns=isbns, emails=emails, usar_numpy=False)
+    vetorizado = validar_colunas(cpfs=cpfs, isbns=isbns, emails=emails, usar_numpy=True)
+
+    assert isinstance(vetorizado["validos"], np.ndarray)
+    for coluna in ("cpf", "isbn", "email"):
+        assert vetorizado["motivos"][coluna].tolist() == list(puro["motivos"][coluna])
+    assert vetorizado["validos"].tolist() == [bool(v) for v in puro["validos"]]
+
+
+@pytest.mark.parametrize("argumentos, mensagem", [
+    ({}, "Nenhuma coluna para validar"),
+    ({"cpfs": ["12345678909"], "emails": []}, "Colunas com tamanhos diferentes"),
+])
+def test_parametros_invalidos(argumentos, mensagem):
+    assert validar_colunas(**argumentos) == {"success": False, "message": mensagem}
+
+
+def test_numpy_exigido_sem_numpy(monkeypatch):
+    monkeypatch.setattr(validacao, 'np', None)
+
+    assert validar_colunas(cpfs=[], usar_numpy=True) == {"success": False, "message": "NumPy não está instalado"}
+    assert validar_colunas(cpfs=["12345678909"] * validacao.LIMIAR_NUMPY)["validos"] == bytearray(
+        [1] * validacao.LIMIAR_NUMPY)
@@ -0,0 +1,206 @@
+import re
+from operator import mul
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Validação de CPF, ISBN e e-mail com dígitos verificadores: CPF pelo
+# módulo 11, ISBN-10 (módulo 11, com X valendo 10) e ISBN-13 (pesos 1 e 3,
+# módulo 10). validar_colunas valida colunas inteiras e devolve uma máscara
+# de válidos e um código de motivo por linha; com NumPy instalado e colunas
+# grandes, a aritmética dos dígitos é feita de uma vez sobre a matriz de
+# caracteres.
+#
+#   validar_colunas(cpfs=['123.456.789-09', '123.456.789-00'])
+#   -> {"success": True, "validos": bytearray(b'\x01\x00'),
+#       "motivos": {"cpf": bytearray(b'\x00\x03')}}
+
+VALIDO = 0
+VAZIO = 1
+FORMATO = 2
+DIGITO_VERIFICADOR = 3
+DIGITOS_REPETIDOS = 4
+
+MOTIVOS = {
+    VALIDO: "válido",
+    VAZIO: "vazio",
+    FORMATO: "formato inválido",
+    DIGITO_VERIFICADOR: "dígito verificador inválido",
+    DIGITOS_REPETIDOS: "dígitos repetidos",
+}
+
+# Abaixo disso, converter as colunas para matrizes custa mais que o laço.
+LIMIAR_NUMPY = 10000
+
+_SEPARADORES = '.- '
+_SEM_SEPARADORES = str.maketrans('', '', _SEPARADORES)
+_CPF = re.compile(r'[0-9]{11}')
+_ISBN10 = re.compile(r'[0-9]{9}[0-9X]')
+_ISBN13 = re.compile(r'[0-9]{13}')
+_EMAIL = re.compile(r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$')
+# Pesos dos dígitos verificadores. As somas são feitas sobre os bytes ASCII
+# (map(mul) roda em C), descontando 48 ('0') vezes a soma dos pesos.
+_PESOS_CPF = (tuple(range(10, 1, -1)), tuple(range(11, 1, -1)))
+_PESOS_ISBN10 = tuple(range(10, 0, -1))
+_PESOS_ISBN13 = (1, 3) * 6 + (1,)
+# Códigos 0 e 1 viram máscara 1 e 0 com bytes.translate.
+_CODIGO_PARA_MASCARA = bytes([1]) + bytes(255)
+
+
+def _texto(valor):
+    return '' if valor is None else str(valor)
+
+
+def sem_separadores(valor):
+    # Os separadores aceitos em CPF e ISBN: ponto, hífen e espaço.
+    return _texto(valor).translate(_SEM_SEPARADORES)
+
+
+def motivo_cpf(cpf):
+    cpf = _texto(cpf)
+    if not cpf:
+        return VAZIO
+    cpf = sem_separadores(cpf)
+    if not _CPF.fullmatch(cpf):
+        return FORMATO
+    if cpf == cpf[0] * 11:
+        return DIGITOS_REPETIDOS
+    ascii_ = cpf.encode()
+    for pesos in _PESOS_CPF:
+        soma = sum(map(mul, ascii_, pesos)) - 48 * sum(pesos)
+        if soma * 10 % 11 % 10 != ascii_[len(pesos)] - 48:
+            return DIGITO_VERIFICADOR
+    return VALIDO
+
+
+def motivo_isbn(isbn):
+    isbn = _texto(isbn)
+    if not isbn:
+        return VAZIO
+    isbn = sem_separadores(isbn).upper()
+    if _ISBN10.fullmatch(isbn):
+        # X (só no fim, com peso 1) vale 10, mas ord('X') - ord('0') dá 40.
+        soma = sum(map(mul, isbn.encode(), _PESOS_ISBN10)) - 48 * 55 - (30 if isbn[9] == 'X' else 0)
+        return VALIDO if soma % 11 == 0 else DIGITO_VERIFICADOR
+    if _ISBN13.fullmatch(isbn):
+        soma = sum(map(mul, isbn.encode(), _PESOS_ISBN13)) - 48 * 25
+        return VALIDO if soma % 10 == 0 else DIGITO_VERIFICADOR
+    return FORMATO
+
+
+def motivo_email(email):
+    email = _texto(email)
+    if not email:
+        return VAZIO
+    return VALIDO if _EMAIL.match(email) else FORMATO
+
+
+_POR_REGISTRO = {"cpf": motivo_cpf, "isbn": motivo_isbn, "email": motivo_email}
+
+
+def _matriz(valores, largura_minima):
+    # Uma linha de códigos Unicode (uint32) por valor, completada com zeros.
+    textos = np.array([_texto(valor) for valor in valores], dtype=str)
+    largura = max(textos.dtype.itemsize // 4, largura_minima)
+    textos = textos.astype(f'<U{largura}')
+    return textos.view(np.uint32).reshape(len(textos), largura)
+
+
+def _digitos(codigos, aceita_x=False):
+    # Desloca os dígitos de cada linha para o início, na ordem original.
+    # Devolve os valores (X vale 10), quantos são e se a linha tem algum
+    # caractere que não é dígito nem separador.
+    digito = (codigos >= ord('0')) & (codigos <= ord('9'))
+    valores = codigos.astype(np.int64) - ord('0')
+    if aceita_x:
+        x = (codigos == ord('X')) | (codigos == ord('x'))
+        valores[x] = 10
+        digito |= x
+    separador = np.isin(codigos, [0] + [ord(c) for c in _SEPARADORES])
+    ordem = np.argsort(~digito, axis=1, kind='stable')
+    return (
+        np.take_along_axis(valores, ordem, axis=1),
+        digito.sum(axis=1),
+        ~(digito | separador).all(axis=1),
+    )
+
+
+def _vazios(codigos):
+    return (codigos == 0).all(axis=1)
+
+
+def _cpfs_vetorizado(valores):
+    codigos = _matriz(valores, 11)
+    digitos, quantidade, estranhos = _digitos(codigos)
+    d = digitos[:, :11]
+    dv1 = d[:, :9] @ np.arange(10, 1, -1) * 10 % 11 % 10
+    dv2 = d[:, :10] @ np.arange(11, 1, -1) * 10 % 11 % 10
+    motivos = np.zeros(len(codigos), dtype=np.uint8)
+    # Atribuídos do menos para o mais prioritário, como em motivo_cpf.
+    motivos[(d[:, 9] != dv1) | (d[:, 10] != dv2)] = DIGITO_VERIFICADOR
+    motivos[(d == d[:, :1]).all(axis=1)] = DIGITOS_REPETIDOS
+    motivos[estranhos | (quantidade != 11)] = FORMATO
+    motivos[_vazios(codigos)] = VAZIO
+    return motivos
+
+
+def _isbns_vetorizado(valores):
+    codigos = _matriz(valores, 13)
+    digitos, quantidade, estranhos = _digitos(codigos, aceita_x=True)
+    isbn10 = (quantidade == 10) & (digitos[:, :9] <= 9).all(axis=1)
+    isbn13 = (quantidade == 13) & (digitos[:, :13] <= 9).all(axis=1)
+    soma10 = digitos[:, :10] @ np.arange(10, 0, -1)
+    soma13 = digitos[:, :13] @ np.tile([1, 3], 7)[:13]
+    confere = np.where(isbn10, soma10 % 11 == 0, soma13 % 10 == 0)
+    motivos = np.zeros(len(codigos), dtype=np.uint8)
+    motivos[~confere] = DIGITO_VERIFICADOR
+    motivos[estranhos | ~(isbn10 | isbn13)] = FORMATO
+    motivos[_vazios(codigos)] = VAZIO
+    return motivos
+
+
+def _emails_vetorizado(valores):
+    return np.fromiter(map(motivo_email, valores), dtype=np.uint8, count=len(valores))
+
+
+_VETORIZADOS = {"cpf": _cpfs_vetorizado, "isbn": _isbns_vetorizado, "email": _emails_vetorizado}
+
+
+def validar_colunas(cpfs=None, isbns=None, emails=None, usar_numpy=None):
+    # Colunas do mesmo tamanho, uma linha por registro. "validos" tem 1 (ou
+    # True) nas linhas em que todas as colunas informadas são válidas;
+    # "motivos" traz o código por coluna. Sem NumPy são bytearrays; com
+    # NumPy, arrays bool e uint8. usar_numpy=None decide pelo tamanho.
+    colunas = {
+        nome: list(valores)
+        for nome, valores in (("cpf", cpfs), ("isbn", isbns), ("email", emails))
+        if valores is not None
+    }
+    if not colunas:
+        return {"success": False, "message": "Nenhuma coluna para validar"}
+    tamanhos = {len(valores) for valores in colunas.values()}
+    if len(tamanhos) > 1:
+        return {"success": False, "message": "Colunas com tamanhos diferentes"}
+    total = tamanhos.pop()
+    if usar_numpy and np is None:
+        return {"success": False, "message": "NumPy não está instalado"}
+    if usar_numpy is None:
+        usar_numpy = np is not None and total >= LIMIAR_NUMPY
+
+    if usar_numpy:
+        motivos = {nome: _VETORIZADOS[nome](valores) for nome, valores in colunas.items()}
+        validos = np.ones(total, dtype=bool)
+        for codigos in motivos.values():
+            validos &= codigos == VALIDO
+    else:
+        motivos = {nome: bytearray(map(_POR_REGISTRO[nome], valores)) for nome, valores in colunas.items()}
+        # A máscara tem um byte 0/1 por linha, então o AND entre colunas
+        # pode ser feito de uma vez sobre os bytes como inteiros.
+        mascara = -1
+        for codigos in motivos.values():
+            mascara &= int.from_bytes(codigos.translate(_CODIGO_PARA_MASCARA), 'big')
+        validos = bytearray(mascara.to_bytes(total, 'big') if total else b'')
+    return {"success": True, "validos": validos, "motivos": motivos}